@@ -0,0 +1,133 @@
+"""
+Caches the currently valid CBAC entries of a user so that permission checks can be evaluated
+in Python instead of issuing a claims__contained_by query per check. A single GraphQL query may
+check permissions once per field per object.
+
+The entries are cached on the user object, which in practice makes the cache request scoped
+(request.user lives as long as the request). Entries of other users are not affected. Optionally,
+entries can also be shared between requests via the Django cache for CBAC_SHARED_CACHE_SECONDS
+(only enable this if the cache backend is shared between processes, as invalidation happens by
+deleting the cache key).
+
+Any change to CBAC entries (see access/handlers) invalidates the cached entries of the users
+concerned in the shared cache and all user object scoped caches of the current process.
+"""
+
+from collections.abc import Collection
+from dataclasses import dataclass, field
+from datetime import datetime
+from time import monotonic
+
+from django.conf import settings
+from django.contrib.auth.models import AbstractUser
+from django.core.cache import cache
+from django.utils.timezone import now
+
+from metrics.registry import counter
+
+from .models.cbac_entry import CBACEntry, Claims
+
+# how long entries cached on a (long-lived) user object are trusted before reloading
+USER_CACHE_MAX_AGE_SECONDS = 30
+
+CACHE_ATTR = "_cbac_entries"
+
+cbac_checks = counter(
+    "kompassi_cbac_checks_total",
+    "Number of CBAC permission checks by how they were resolved",
+    ["source"],
+)
+
+
+@dataclass(frozen=True)
+class CompiledCBACEntry:
+    valid_from: datetime
+    valid_until: datetime
+    claims: tuple[tuple[str, str], ...]
+
+    def matches(self, claims: Claims, t: datetime) -> bool:
+        """
+        Python equivalent of claims__contained_by=claims within the validity period.
+        """
+        return self.valid_from <= t < self.valid_until and all(claims.get(key) == value for key, value in self.claims)
+
+
+@dataclass
+class UserCBACEntries:
+    generation: int
+    loaded_at: float
+    entries: list[CompiledCBACEntry]
+    decisions: dict[frozenset[tuple[str, str]], bool] = field(default_factory=dict)
+
+    def is_allowed(self, claims: Claims, t: datetime) -> bool:
+        key = frozenset(claims.items())
+
+        try:
+            allowed = self.decisions[key]
+        except KeyError:
+            allowed = self.decisions[key] = any(entry.matches(claims, t) for entry in self.entries)
+            cbac_checks.inc(source="evaluated")
+        else:
+            cbac_checks.inc(source="memoized")
+
+        return allowed
+
+
+class CBACCache:
+    def __init__(self):
+        self.enabled = True
+
+        # incremented on every invalidation so that user object scoped caches can be invalidated
+        self.generation = 0
+
+    @staticmethod
+    def get_cache_key(user_id: int) -> str:
+        return f"access.cbac_entries:{user_id}"
+
+    def _load(self, user: AbstractUser) -> list[CompiledCBACEntry]:
+        cache_seconds = settings.CBAC_SHARED_CACHE_SECONDS
+        cache_key = self.get_cache_key(user.id)
+
+        if cache_seconds and (cached := cache.get(cache_key)) is not None:
+            cbac_checks.inc(source="shared_cache")
+            return cached
+
+        # entries that will become valid later are included and filtered by time when evaluating
+        entries = [
+            CompiledCBACEntry(valid_from, valid_until, tuple(sorted(claims.items())))
+            for valid_from, valid_until, claims in CBACEntry.objects.filter(
+                user=user,
+                valid_until__gt=now(),
+            ).values_list("valid_from", "valid_until", "claims")
+        ]
+
+        if cache_seconds:
+            cache.set(cache_key, entries, cache_seconds)
+
+        return entries
+
+    def get_user_entries(self, user: AbstractUser) -> UserCBACEntries:
+        user_entries: UserCBACEntries | None = getattr(user, CACHE_ATTR, None)
+
+        if (
+            user_entries is None
+            or user_entries.generation != self.generation
+            or monotonic() - user_entries.loaded_at > USER_CACHE_MAX_AGE_SECONDS
+        ):
+            generation = self.generation
+            user_entries = UserCBACEntries(generation, monotonic(), self._load(user))
+            setattr(user, CACHE_ATTR, user_entries)
+
+        return user_entries
+
+    def is_allowed(self, user: AbstractUser, claims: Claims) -> bool:
+        return self.get_user_entries(user).is_allowed(claims, now())
+
+    def invalidate(self, user_ids: Collection[int]):
+        self.generation += 1
+
+        if settings.CBAC_SHARED_CACHE_SECONDS:
+            cache.delete_many([self.get_cache_key(user_id) for user_id in user_ids])
+
+
+cbac_cache = CBACCache()
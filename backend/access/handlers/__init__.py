@@ -0,0 +1 @@
+from . import cbac_entry
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from ..cbac_cache import cbac_cache
+from ..models import CBACEntry
+
+
+@receiver(post_save, sender=CBACEntry)
+@receiver(post_delete, sender=CBACEntry)
+def cbac_entry_post_save_or_delete(sender, instance: CBACEntry, **kwargs):
+    cbac_cache.invalidate([instance.user_id])  # type: ignore
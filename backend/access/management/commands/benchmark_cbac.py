@@ -0,0 +1,97 @@
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from tabulate import tabulate
+
+from graphql_api.schema import schema
+
+from ...cbac_cache import cbac_cache
+
+# a typical admin query: survey list with response counts and responses
+QUERY = """
+query BenchmarkCBAC($eventSlug: String!) {
+  event(slug: $eventSlug) {
+    forms {
+      surveys(includeInactive: true) {
+        slug
+        countResponses
+        responses {
+          id
+          sequenceNumber
+          createdAt
+          cachedDimensions
+        }
+      }
+    }
+  }
+}
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure a typical admin GraphQL query with CBAC checks served from the database (as before) "
+        "versus from the CBAC cache (see access/cbac_cache.py)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--event-slug",
+            metavar="EVENT_SLUG",
+            required=True,
+        )
+        parser.add_argument(
+            "--username",
+            metavar="USERNAME",
+            required=True,
+            help="Run the query as this user (should be an admin of the event)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=10,
+        )
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.get(username=options["username"])
+        rows = []
+
+        for name, enabled in [("database", False), ("cache", True)]:
+            cbac_cache.enabled = enabled
+            timings = []
+
+            for _ in range(options["repeat"]):
+                # fresh request and user object every time, like in real requests
+                request = RequestFactory().post("/graphql")
+                request.user = get_user_model().objects.get(id=user.id)
+
+                with CaptureQueriesContext(connection) as queries:
+                    t0 = perf_counter()
+                    result = schema.execute(
+                        QUERY,
+                        variable_values=dict(eventSlug=options["event_slug"]),
+                        context_value=request,
+                    )
+                    timings.append(perf_counter() - t0)
+
+                if result.errors:
+                    raise CommandError(f"Query failed: {result.errors}")
+
+            timings.sort()
+            rows.append(
+                (
+                    name,
+                    len(queries),
+                    f"{1000 * timings[0]:.2f}",
+                    f"{1000 * timings[len(timings) // 2]:.2f}",
+                    f"{1000 * timings[-1]:.2f}",
+                )
+            )
+
+        cbac_cache.enabled = True
+
+        print(tabulate(rows, headers=["cbac", "queries", "min ms", "median ms", "max ms"]))
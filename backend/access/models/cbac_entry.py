@@ -82,9 +82,17 @@ class CBACEntry(models.Model):
 
     @classmethod
     def is_allowed(cls, user: AbstractUser, claims: Claims, t: datetime | None = None):
+        """
+        Checks for the current time are served from the CBAC cache (see access/cbac_cache.py).
+        """
+        from ..cbac_cache import cbac_cache
+
         if not user.is_authenticated:
             return False
 
+        if t is None and cbac_cache.enabled:
+            return cbac_cache.is_allowed(user, claims)
+
         return cls.get_entries(user, claims, t=t).exists()
 
     @classmethod
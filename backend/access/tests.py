@@ -1,7 +1,9 @@
 from unittest import TestCase as NonDatabaseTestCase
 
 import pytest
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from core.models import Person
 from core.models.event import Event
@@ -111,3 +113,35 @@ def test_ensure_admin_group_privileges():
 
     assert not CBACEntry.is_allowed(person.user, get_claims(event, "labour"))
     assert not CBACEntry.is_allowed(person.user, get_claims(event, "programme"))
+
+
+@pytest.mark.django_db
+def test_cbac_cache_agrees_with_database():
+    """
+    The CBAC cache must give the same answers as claims__contained_by and
+    only query the database once per user until CBAC entries change.
+    """
+    # TODO find out how to hook this up to pytest.mark.django_db
+    Entry.ensure_partitions()
+
+    meta, unused = LabourEventMeta.get_or_create_dummy()
+    event = meta.event
+    person, unused = Person.get_or_create_dummy()
+    assert person.user
+
+    meta.admin_group.user_set.add(person.user)
+    CBACEntry.ensure_admin_group_privileges()
+
+    all_claims = [
+        get_claims(event, "labour"),
+        get_claims(event, "programme"),
+        dict(get_claims(event, "labour"), organization="other-organization"),
+        {"app": "labour"},
+    ]
+
+    with CaptureQueriesContext(connection) as queries:
+        cached = [CBACEntry.is_allowed(person.user, claims) for claims in all_claims * 2]
+    assert len(queries) == 1
+
+    assert cached == [CBACEntry.get_entries(person.user, claims).exists() for claims in all_claims * 2]
+    assert cached[:4] == [True, False, False, False]
@@ -0,0 +1,93 @@
+"""
+Refreshing the perks of badges in bulk.
+
+Badge.reemperkelate asks the emperkelator for the perks of one person at a time, which takes
+several queries per badge. Here badges are processed in chunks: the emperkelator computes the
+perks of all persons of a chunk at once (emperkelate_many), and the changed perks are written
+with bulk_update in a short transaction per chunk. This way a change in perk logic during the
+event does not lock all badges of the event for minutes. The chunks may also be fanned out to
+background workers (see the reemperkelate_badges task).
+"""
+
+import logging
+from collections import defaultdict
+from collections.abc import Collection
+from itertools import batched
+
+from django.conf import settings
+from django.db import transaction
+
+from core.models import Event
+
+from .models import Badge
+
+logger = logging.getLogger("kompassi")
+
+CHUNK_SIZE = 500
+
+
+def reemperkelate_badges(badge_ids: Collection[int], commit: bool = True) -> int:
+    """
+    Refreshes the perks of the given badges like Badge.reemperkelate. Returns the number of badges whose perks changed.
+    """
+    badges_by_event: dict[int, list[Badge]] = defaultdict(list)
+    for badge in (
+        Badge.objects.filter(id__in=badge_ids)
+        .select_related("person", "personnel_class__event__badges_event_meta")
+        .order_by("id")
+    ):
+        badges_by_event[badge.personnel_class.event_id].append(badge)
+
+    changed_badges = []
+    for badges in badges_by_event.values():
+        event = badges[0].event
+        Emperkelator = badges[0].meta.emperkelator
+        perks_by_person = Emperkelator.emperkelate_many(event, [badge.person for badge in badges if badge.person])
+
+        for badge in badges:
+            if badge.person_id is not None:
+                perks_dict = perks_by_person[badge.person_id].model_dump()
+            else:
+                perks_dict = badge.personnel_class.perks
+
+            if badge.perks != perks_dict:
+                badge.perks = perks_dict
+                changed_badges.append(badge)
+
+    if commit and changed_badges:
+        with transaction.atomic():
+            Badge.objects.bulk_update(changed_badges, ["perks"])
+
+    return len(changed_badges)
+
+
+def reemperkelate_event(
+    event: Event,
+    *,
+    chunk_size: int = CHUNK_SIZE,
+    background: bool = False,
+    commit: bool = True,
+) -> int:
+    """
+    Refreshes the perks of all badges of the event chunk by chunk. Returns the number of badges whose perks changed.
+    If background is set and background tasks are available, the chunks are processed by workers and 0 is returned.
+    """
+    badge_ids = list(Badge.objects.filter(personnel_class__event=event).order_by("id").values_list("id", flat=True))
+    background = background and commit and "background_tasks" in settings.INSTALLED_APPS
+
+    num_changed = 0
+    for chunk in batched(badge_ids, chunk_size):
+        if background:
+            from .tasks import reemperkelate_badges as reemperkelate_badges_task
+
+            reemperkelate_badges_task.delay(list(chunk))  # type: ignore
+        else:
+            num_changed += reemperkelate_badges(chunk, commit=commit)
+
+    logger.info(
+        "Re-emperkelated %d badges of %s%s",
+        len(badge_ids),
+        event.slug,
+        " in the background" if background else "",
+    )
+    return num_changed
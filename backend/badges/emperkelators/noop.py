@@ -1,3 +1,4 @@
+from collections.abc import Iterable
 from typing import Self
 
 from pydantic import BaseModel
@@ -15,5 +16,13 @@ class NoopEmperkelator(BaseModel):
     ) -> Self:
         return cls()
 
+    @classmethod
+    def emperkelate_many(
+        cls,
+        event: Event,
+        persons: Iterable[Person],
+    ) -> dict[int, Self]:
+        return {person.id: cls() for person in persons}
+
     def __str__(self):
         return "N/A"
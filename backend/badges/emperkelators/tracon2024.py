@@ -1,3 +1,5 @@
+from collections import defaultdict
+from collections.abc import Iterable
 from enum import IntEnum
 from typing import Self
 
@@ -95,14 +97,51 @@ class TraconEmperkelator(BaseModel):
         cls,
         event: Event,
         person: Person,
+    ) -> Self:
+        return cls.emperkelate_many(event, [person])[person.id]
+
+    @classmethod
+    def emperkelate_many(
+        cls,
+        event: Event,
+        persons: Iterable[Person],
+    ) -> dict[int, Self]:
+        """
+        Returns person id -> perks. The signups and programme roles of all the persons are loaded at once.
+        """
+        person_ids = [person.id for person in persons]
+
+        signups: dict[int, Signup] = {}
+        for signup in Signup.objects.filter(event=event, person_id__in=person_ids).prefetch_related(
+            "personnel_classes",
+            "shifts",
+        ):
+            signups.setdefault(signup.person_id, signup)
+
+        programme_roles: dict[int, list[ProgrammeRole]] = defaultdict(list)
+        for programme_role in ProgrammeRole.objects.filter(
+            programme__category__event=event,
+            person_id__in=person_ids,
+        ).select_related("role"):
+            programme_roles[programme_role.person_id].append(programme_role)
+
+        return {
+            person_id: cls._emperkelate(signups.get(person_id), programme_roles[person_id]) for person_id in person_ids
+        }
+
+    @classmethod
+    def _emperkelate(
+        cls,
+        signup: Signup | None,
+        programme_roles: list[ProgrammeRole],
     ) -> Self:
         perks = cls()
         extra_meal_token = cls(meals=1)
         extra_swag = cls(extra_swag=True)
 
-        signup = Signup.objects.filter(event=event, person=person).first()
-        if signup and (personnel_class := signup.personnel_class):
-            pc_perks = cls.model_validate(personnel_class.perks)
+        # the highest personnel class (see Signup.personnel_class) from the prefetched ones
+        if signup and (personnel_classes := signup.personnel_classes.all()):
+            pc_perks = cls.model_validate(personnel_classes[0].perks)
             perks.imbibe(pc_perks)
             hours = signup.working_hours
 
@@ -114,7 +153,7 @@ class TraconEmperkelator(BaseModel):
             if hours >= EXTRA_SWAG_MIN_HOURS:
                 perks.imbibe(extra_swag)
 
-        for programme_role in ProgrammeRole.objects.filter(programme__category__event=event, person=person):
+        for programme_role in programme_roles:
             programme_perks = cls.model_validate(programme_role.perks)
             perks.imbibe(programme_perks)
 
@@ -1,13 +1,9 @@
 from sys import stderr
 
-from django.core.management.base import BaseCommand
-from django.db import transaction
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
 
-from ...models.badge import Badge
-
-
-class NotReally(RuntimeError):
-    pass
+from ...emperkelation import CHUNK_SIZE, reemperkelate_event
 
 
 class Command(BaseCommand):
@@ -22,23 +18,39 @@ class Command(BaseCommand):
         )
 
         parser.add_argument("--really", default=False, action="store_true")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=CHUNK_SIZE,
+            help=f"Number of badges refreshed per transaction (default: {CHUNK_SIZE})",
+        )
+        parser.add_argument(
+            "--background",
+            default=False,
+            action="store_true",
+            help="Refresh the chunks in background workers",
+        )
 
     def handle(self, *args, **options):
         from core.models import Event
 
         really = options["really"]
-
-        with transaction.atomic():
-            for event_slug in options["event_slugs"]:
-                event = Event.objects.get(slug=event_slug)
-                stderr.write(event.slug + "\n")
-
-                for badge in Badge.objects.filter(personnel_class__event=event).select_for_update():
-                    _, updated = badge.reemperkelate()
-                    stderr.write("+" if updated else ".")
-                    stderr.flush()
-
-                stderr.write("\n")
-
-            if not really:
-                raise NotReally("It was only a dream :')")
+        if options["background"] and not really:
+            raise CommandError("--background requires --really")
+
+        for event_slug in options["event_slugs"]:
+            event = Event.objects.get(slug=event_slug)
+            num_changed = reemperkelate_event(
+                event,
+                chunk_size=options["chunk_size"],
+                background=options["background"],
+                commit=really,
+            )
+
+            if options["background"] and "background_tasks" in settings.INSTALLED_APPS:
+                stderr.write(f"{event.slug}: queued\n")
+            else:
+                stderr.write(f"{event.slug}: {num_changed} badges {'updated' if really else 'would be updated'}\n")
+
+        if not really:
+            stderr.write("It was only a dream :')\n")
@@ -0,0 +1,133 @@
+import random
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from tabulate import tabulate
+
+from core.models import Event
+from labour.models import PersonnelClass
+
+from ...models import Badge, Batch
+from ...models.constants import BADGE_ELIGIBLE_FOR_BATCHING
+from ...utils import contains_moon_runes
+
+FIRST_NAMES = ["Santtu", "Aino", "Mikko", "Jyrki", "Åsa", "Zoë", "Łukasz", "Ярослав", "陽菜"]
+SURNAMES = ["Pajukanta", "Virtanen", "Korhonen", "Müller", "Nowak", "Šimić", "Иванов", "佐藤"]
+
+
+class NotReally(RuntimeError):
+    pass
+
+
+def create_batch_per_badge(event: Event, max_items: int | None, moon_rune_policy: str) -> Batch:
+    """
+    Batch.create as it used to be: every eligible badge is loaded, tested and saved one by one.
+    """
+    fields = Badge.get_csv_fields(event)
+    if moon_rune_policy == "onlyinclude":
+        test = lambda badge: contains_moon_runes(badge.get_printable_text(fields))
+    elif moon_rune_policy == "exclude":
+        test = lambda badge: not contains_moon_runes(badge.get_printable_text(fields))
+    else:
+        test = lambda badge: True
+
+    batch = Batch.objects.create(event=event)
+    num_selected_badges = 0
+
+    for badge in Badge.objects.filter(personnel_class__event=event, **BADGE_ELIGIBLE_FOR_BATCHING).order_by(
+        "created_at"
+    ):
+        if test(badge):
+            badge.batch = batch
+            badge.save()
+
+            num_selected_badges += 1
+            if max_items is not None and num_selected_badges >= max_items:
+                break
+
+    return batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare creating badge batches badge by badge versus with a single UPDATE. "
+        "Synthetic badges are added to the event first. Everything is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--event-slug",
+            metavar="EVENT_SLUG",
+            required=True,
+        )
+        parser.add_argument(
+            "--num-badges",
+            type=int,
+            default=3000,
+            help="Number of synthetic badges to add to the event (default: 3000, 0 to use existing badges only)",
+        )
+        parser.add_argument(
+            "--max-items",
+            type=int,
+            default=None,
+            help="Maximum number of badges per batch (default: all eligible badges)",
+        )
+
+    def handle(self, *args, **options):
+        event = Event.objects.get(slug=options["event_slug"])
+        max_items = options["max_items"]
+        rows = []
+
+        try:
+            with transaction.atomic():
+                self.create_badges(event, options["num_badges"])
+
+                for moon_rune_policy in ["dontcare", "exclude", "onlyinclude"]:
+                    for name, create in [
+                        ("per badge", create_batch_per_badge),
+                        ("set-based", Batch.create),
+                    ]:
+                        # roll back each batch so that every run sees the same eligible badges
+                        try:
+                            with transaction.atomic():
+                                with CaptureQueriesContext(connection) as queries:
+                                    t0 = perf_counter()
+                                    batch = create(event, max_items=max_items, moon_rune_policy=moon_rune_policy)
+                                    elapsed = perf_counter() - t0
+
+                                num_badges = batch.badges.count()
+                                raise NotReally("rollback")
+                        except NotReally:
+                            pass
+
+                        rows.append((moon_rune_policy, name, num_badges, len(queries), f"{elapsed:.2f}"))
+
+                raise NotReally("rollback")
+        except NotReally:
+            pass
+
+        print(tabulate(rows, headers=["moon rune policy", "implementation", "badges", "queries", "seconds"]))
+
+    def create_badges(self, event: Event, num_badges: int):
+        personnel_classes = list(PersonnelClass.objects.filter(event=event))
+        if not personnel_classes:
+            raise ValueError(f"Event {event.slug} has no personnel classes")
+
+        badges = []
+        for i in range(num_badges):
+            personnel_class = random.choice(personnel_classes)
+            badge = Badge(
+                personnel_class=personnel_class,
+                first_name=random.choice(FIRST_NAMES),
+                surname=random.choice(SURNAMES),
+                nick=f"Benchmark {i}",
+                is_nick_visible=random.choice([True, False, False]),
+                job_title="Järjestyksenvalvoja",
+                perks=personnel_class.perks,
+            )
+            badge.contains_moon_runes = badge.get_contains_moon_runes()
+            badges.append(badge)
+
+        Badge.objects.bulk_create(badges, batch_size=1000)
@@ -0,0 +1,53 @@
+# Generated by Django 5.0.8 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+from badges.proxies.badge.privacy import BadgePrivacyAdapter
+from badges.utils import contains_moon_runes
+
+
+def populate_contains_moon_runes(apps, schema_editor):
+    Badge = apps.get_model("badges", "Badge")
+
+    badges = []
+    for badge in Badge.objects.only(
+        "first_name",
+        "is_first_name_visible",
+        "surname",
+        "is_surname_visible",
+        "nick",
+        "is_nick_visible",
+        "job_title",
+    ).iterator(chunk_size=2000):
+        # see Badge.get_contains_moon_runes
+        privacy = BadgePrivacyAdapter(badge)
+        text = "\n".join(
+            [
+                privacy.surname,
+                privacy.first_name,
+                privacy.nick,
+                privacy.nick_or_first_name,
+                privacy.surname_or_full_name,
+                badge.job_title,
+            ]
+        )
+        if contains_moon_runes(text):
+            badge.contains_moon_runes = True
+            badges.append(badge)
+
+    Badge.objects.bulk_update(badges, ["contains_moon_runes"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("badges", "0027_badge_perks_badgeseventmeta_emperkelator_name"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="badge",
+            name="contains_moon_runes",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(populate_contains_moon_runes, reverse_code=migrations.RunPython.noop),
+    ]
@@ -14,11 +14,22 @@ from core.models.event import Event
 from core.utils import time_bool_property
 
 from ..proxies.badge.privacy import BadgePrivacyAdapter
-from ..utils import default_badge_factory
+from ..utils import contains_moon_runes, default_badge_factory
 from .badges_event_meta import BadgesEventMeta
 
 logger = logging.getLogger("kompassi")
 
+# changing these may change the value of Badge.contains_moon_runes
+MOON_RUNE_FIELDS = {
+    "first_name",
+    "is_first_name_visible",
+    "surname",
+    "is_surname_visible",
+    "nick",
+    "is_nick_visible",
+    "job_title",
+}
+
 
 @dataclass
 class ArrivalsRow:
@@ -139,6 +150,10 @@ class Badge(models.Model, CsvExportMixin):
         related_name="badges",
     )
 
+    # Whether the printable text of the badge (apart from the personnel class name) contains characters
+    # outside ISO-8859-1. Maintained by save() so that Batch.create can apply the moon rune policy in SQL.
+    contains_moon_runes = models.BooleanField(default=False, editable=False)
+
     perks = models.JSONField(
         default=dict,
         blank=True,
@@ -254,8 +269,32 @@ class Badge(models.Model, CsvExportMixin):
         if not update_fields or "perks" in update_fields:
             self.reemperkelate(commit=False)
 
+        if not update_fields or MOON_RUNE_FIELDS.intersection(update_fields):
+            self.contains_moon_runes = self.get_contains_moon_runes()
+            if update_fields:
+                kwargs["update_fields"] = [*update_fields, "contains_moon_runes"]
+
         return super().save(*args, **kwargs)
 
+    def get_contains_moon_runes(self) -> bool:
+        """
+        Like contains_moon_runes(badge.get_printable_text(fields)) but without the personnel class name,
+        which is checked separately by Batch.create.
+        """
+        privacy = BadgePrivacyAdapter(self)
+        return contains_moon_runes(
+            "\n".join(
+                [
+                    privacy.surname,
+                    privacy.first_name,
+                    privacy.nick,
+                    privacy.nick_or_first_name,
+                    privacy.surname_or_full_name,
+                    self.job_title,
+                ]
+            )
+        )
+
     def reemperkelate(self, commit=True):
         """
         Refresh the perks on the badge based on the current state of the event and the person.
@@ -6,21 +6,13 @@ from django.utils.translation import gettext_lazy as _
 
 from core.utils import time_bool_property
 
+from ..utils import contains_moon_runes
 from .constants import BADGE_ELIGIBLE_FOR_BATCHING
 
 if TYPE_CHECKING:
     from .badge import Badge
 
 
-def contains_moon_runes(unicode_str):
-    try:
-        unicode_str.encode("ISO-8859-1")
-    except UnicodeEncodeError:
-        return True
-    else:
-        return False
-
-
 class Batch(models.Model):
     event = models.ForeignKey(
         "core.Event",
@@ -45,6 +37,14 @@ class Batch(models.Model):
 
     @classmethod
     def create(cls, event, personnel_class=None, max_items=100, moon_rune_policy="dontcare"):
+        """
+        Assigns up to max_items badges eligible for batching, oldest first, to a new batch.
+
+        The badges are selected and assigned with a single UPDATE. Perks are not printed on the badge,
+        so they are not refreshed here.
+        """
+        from labour.models import PersonnelClass
+
         from .badge import Badge
 
         if personnel_class is not None:
@@ -54,32 +54,40 @@ class Batch(models.Model):
         else:
             badges = Badge.objects.filter(personnel_class__event=event)
 
-        if moon_rune_policy == "onlyinclude":
-            fields = Badge.get_csv_fields(event)
-            test = lambda badge: contains_moon_runes(badge.get_printable_text(fields))
-        elif moon_rune_policy == "exclude":
-            fields = Badge.get_csv_fields(event)
-            test = lambda badge: not contains_moon_runes(badge.get_printable_text(fields))
-        elif moon_rune_policy == "dontcare":
-            test = lambda badge: True
-        else:
+        badges = badges.filter(**BADGE_ELIGIBLE_FOR_BATCHING)
+
+        if moon_rune_policy in ("onlyinclude", "exclude"):
+            # Badge.contains_moon_runes covers the printable text of the badge apart from the personnel class name.
+            moon_rune_personnel_class_ids = [
+                pc_id
+                for pc_id, pc_name in PersonnelClass.objects.filter(event=event).values_list("id", "name")
+                if contains_moon_runes(pc_name)
+            ]
+            has_moon_runes = models.Q(contains_moon_runes=True) | models.Q(
+                personnel_class__in=moon_rune_personnel_class_ids
+            )
+
+            if moon_rune_policy == "onlyinclude":
+                badges = badges.filter(has_moon_runes)
+            else:
+                badges = badges.exclude(has_moon_runes)
+        elif moon_rune_policy != "dontcare":
             raise NotImplementedError(moon_rune_policy)
 
+        selected_badge_ids = badges.order_by("created_at").values("id")
+        if max_items is not None:
+            selected_badge_ids = selected_badge_ids[:max_items]
+
         with transaction.atomic():
             batch = cls(personnel_class=personnel_class, event=event)
             batch.save()
 
-            badges = badges.filter(**BADGE_ELIGIBLE_FOR_BATCHING).order_by("created_at")
-            num_selected_badges = 0
-
-            for badge in badges:
-                if test(badge):
-                    badge.batch = batch
-                    badge.save()
-
-                    num_selected_badges += 1
-                    if max_items is not None and num_selected_badges >= max_items:
-                        break
+            # UPDATE … WHERE id IN (SELECT … LIMIT max_items)
+            # Eligibility is checked again in case a concurrent batch took some of the same badges.
+            Badge.objects.filter(id__in=selected_badge_ids, **BADGE_ELIGIBLE_FOR_BATCHING).update(
+                batch=batch,
+                updated_at=now(),
+            )
 
         return batch
 
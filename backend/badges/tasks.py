@@ -0,0 +1,8 @@
+from celery import shared_task
+
+
+@shared_task(ignore_result=True)
+def reemperkelate_badges(badge_ids: list[int]):
+    from .emperkelation import reemperkelate_badges
+
+    reemperkelate_badges(badge_ids)
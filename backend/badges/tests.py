@@ -7,6 +7,7 @@ from core.models import Person
 from labour.models import JobCategory, LabourEventMeta, PersonnelClass, Signup
 from programme.models import Programme, ProgrammeEventMeta, ProgrammeRole, Role
 
+from .emperkelation import reemperkelate_badges
 from .emperkelators.tracon2024 import TicketType, TraconEmperkelator
 from .models import Badge, BadgesEventMeta, Batch
 
@@ -152,6 +153,31 @@ class BadgesTestCase(TestCase):
         assert created
         assert not badge.is_revoked
 
+    def test_batch_create_moon_rune_policy(self):
+        personnel_class, unused = PersonnelClass.get_or_create_dummy()
+        latin = Badge.objects.create(personnel_class=personnel_class, first_name="Åsa", surname="Müller")
+        runes = Badge.objects.create(personnel_class=personnel_class, first_name="Ярослав", surname="Müller")
+        hidden = Badge.objects.create(
+            personnel_class=personnel_class,
+            first_name="陽菜",
+            is_first_name_visible=False,
+            surname="Sato",
+        )
+        assert not latin.contains_moon_runes
+        assert runes.contains_moon_runes
+        assert not hidden.contains_moon_runes
+
+        batch = Batch.create(event=self.event, moon_rune_policy="onlyinclude")
+        assert list(batch.badges.all()) == [runes]
+
+        batch = Batch.create(event=self.event, moon_rune_policy="exclude", max_items=1)
+        assert list(batch.badges.all()) == [latin]
+
+        hidden.is_first_name_visible = True
+        hidden.save(update_fields=["is_first_name_visible"])
+        hidden.refresh_from_db()
+        assert hidden.contains_moon_runes
+
     def test_condb_137_intra_labour(self):
         """
         If the personnel class of the worker changes, the badge shall be revoked and a new one issued.
@@ -367,3 +393,10 @@ def test_tracon2024_perks():
     assert perks.swag
     assert not perks.extra_swag, "Two sources of normal swag should not an extra swag make"
     assert str(perks) == "Badge (internal), 4 ruokalippua, valittu työvoimatuote"
+
+    # bulk re-emperkelation arrives at the same perks
+    Badge.objects.filter(id=badge.id).update(perks={})
+    assert reemperkelate_badges([badge.id]) == 1
+    badge.refresh_from_db()
+    assert TraconEmperkelator.model_validate(badge.perks) == perks
+    assert reemperkelate_badges([badge.id]) == 0
@@ -1,3 +1,12 @@
+def contains_moon_runes(unicode_str):
+    try:
+        unicode_str.encode("ISO-8859-1")
+    except UnicodeEncodeError:
+        return True
+    else:
+        return False
+
+
 def get_priority(pair):
     personnel_class, job_title = pair
     return personnel_class.priority
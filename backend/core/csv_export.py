@@ -1,8 +1,9 @@
 from collections import namedtuple
+from collections.abc import Iterable, Iterator
 
 import unicodecsv as csv
 from django.db import models
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 
 ENCODING = "ISO-8859-15"
 
@@ -144,41 +145,94 @@ def make_writer(output_stream, dialect):
         return csv.writer(output_stream, encoding=ENCODING, dialect=dialect, errors="ignore")
 
 
-def export_csv(event, model, model_instances, output_file, m2m_mode="separate_columns", dialect="excel-tab"):
+# chunk size used when iterating over querysets in exports
+EXPORT_CHUNK_SIZE = 500
+
+
+class Echo:
+    """
+    A file-like object that returns what is written into it instead of storing it.
+    Used to stream CSV rows with StreamingHttpResponse.
+    """
+
+    def write(self, value):
+        return value
+
+
+def get_export_fields(event, model, model_instances):
     # XXX Horrible hack.
     try:
         # EventSurveys force us to get this from an instance instead of the model class because they may differ
-        fields = model_instances[0].get_csv_fields(event)
+        return model_instances[0].get_csv_fields(event)
     except IndexError:
         # empty set, use the old way
-        fields = model.get_csv_fields(event)
-    writer = make_writer(output_file, dialect)
-    writer.writerow(model.get_csv_header(event, fields, m2m_mode))
+        return model.get_csv_fields(event)
+
+
+def iter_model_instances(model, model_instances) -> Iterable:
+    if isinstance(model_instances, models.QuerySet):
+        # avoid holding the whole result set in memory
+        return model_instances.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    return (
+        model.objects.get(pk=int(model_instance)) if isinstance(model_instance, str | int) else model_instance
+        for model_instance in model_instances
+    )
+
+
+def iter_rows(event, model, model_instances, m2m_mode="separate_columns") -> Iterator[list]:
+    """
+    Yields the header row followed by a row for each model instance.
+    """
+    fields = get_export_fields(event, model, model_instances)
+    yield model.get_csv_header(event, fields, m2m_mode)
 
-    for model_instance in model_instances:
-        if isinstance(model_instance, str | int):
-            model_instance = model.objects.get(pk=int(model_instances))
+    for model_instance in iter_model_instances(model, model_instances):
+        yield model_instance.get_csv_row(event, fields, m2m_mode)
 
-        write_row(event, writer, fields, model_instance, m2m_mode)
+
+def export_csv(event, model, model_instances, output_file, m2m_mode="separate_columns", dialect="excel-tab"):
+    writer = make_writer(output_file, dialect)
+
+    for row in iter_rows(event, model, model_instances, m2m_mode):
+        writer.writerow(row)
 
     if getattr(writer, "must_close", False):
         writer.close()
 
 
+def iter_csv(event, model, model_instances, m2m_mode="separate_columns", dialect="excel-tab") -> Iterator[bytes]:
+    """
+    Like export_csv, but yields the CSV (not XLSX) output row by row.
+    """
+    writer = make_writer(Echo(), dialect)
+
+    for row in iter_rows(event, model, model_instances, m2m_mode):
+        yield writer.writerow(row)
+
+
 CONTENT_TYPES = dict(
     xlsx="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
 )
 
 
-def csv_response(*args, **kwargs):
-    filename = kwargs.pop("filename")
-    dialect = kwargs.get("dialect", "excel")
-
-    response = HttpResponse(content_type=CONTENT_TYPES.get(dialect, "text/csv"))
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+def csv_response(event, model, model_instances, filename, m2m_mode="separate_columns", dialect="excel"):
+    """
+    Streams the export to the client. CSV is generated row by row as it is sent and
+    XLSX is generated into a temporary file in constant_memory mode and streamed from there.
+    """
+    if dialect == "xlsx":
+        from .excel_export import TemporaryFileXlsxWriter
 
-    kwargs["output_file"] = response
+        writer = TemporaryFileXlsxWriter()
+        for row in iter_rows(event, model, model_instances, m2m_mode):
+            writer.writerow(row)
+        return writer.as_response(filename)
 
-    export_csv(*args, **kwargs)
+    response = StreamingHttpResponse(
+        iter_csv(event, model, model_instances, m2m_mode=m2m_mode, dialect=dialect),
+        content_type=CONTENT_TYPES.get(dialect, "text/csv"),
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
 
     return response
@@ -1,11 +1,16 @@
 import io
+import tempfile
 
 import xlsxwriter
+from django.http import FileResponse
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
 
 
 class XlsxWriter:
     """
     An almost csv.writer compatible wrapper for XlsxWriter. Horribly inefficient.
+    For large exports, use TemporaryFileXlsxWriter instead.
 
     Must .close() to get the data actually written. Use getattr(writer, 'must_close', False)
     to distinguish from an actual csv.writer.
@@ -37,3 +42,37 @@ class XlsxWriter:
         self.buf.seek(0)
         self.output_stream.write(self.buf.read())
         self.buf.close()
+
+
+class TemporaryFileXlsxWriter(XlsxWriter):
+    """
+    Like XlsxWriter, but uses XlsxWriter's constant_memory mode (rows are flushed to disk
+    as they are written, so they must be written in order) and writes the workbook into a
+    temporary file instead of memory. Use .as_response() to stream the file to the client.
+    The temporary file is removed when the response has been sent.
+    """
+
+    def __init__(self):
+        self.row = 0
+        self.temp_file = tempfile.NamedTemporaryFile(suffix=".xlsx")
+        self.workbook = xlsxwriter.Workbook(self.temp_file.name, {"constant_memory": True})
+        self.worksheet = self.workbook.add_worksheet()
+        self.must_close = True
+        self.closed = False
+
+    def close(self):
+        if not self.closed:
+            self.workbook.close()
+            self.closed = True
+
+    def as_response(self, filename: str) -> FileResponse:
+        self.close()
+        self.temp_file.seek(0)
+
+        # FileResponse closes (and thus removes) the temporary file when done
+        return FileResponse(
+            self.temp_file,
+            as_attachment=True,
+            filename=filename,
+            content_type=XLSX_CONTENT_TYPE,
+        )
@@ -3,6 +3,8 @@ from typing import Self, TypeVar
 import graphene
 from django.db import models
 
+from core.utils.dimension_utils import filter_by_dimensions
+
 T = TypeVar("T", bound=models.Model)
 
 
@@ -12,13 +14,10 @@ class DimensionFilterInput(graphene.InputObjectType):
 
     @classmethod
     def filter(cls, queryset: models.QuerySet[T], filters: list[Self] | None) -> models.QuerySet[T]:
-        if filters is None:
-            filters = []
-
-        for filter in filters:
-            queryset = queryset.filter(
-                dimensions__dimension__slug=filter.dimension,
-                dimensions__value__slug__in=filter.values,
-            )
+        """
+        The model must have a `cached_dimensions` field. See core/utils/dimension_utils.py.
+        """
+        if not filters:
+            return queryset
 
-        return queryset
+        return filter_by_dimensions(queryset, [(filter.dimension, filter.values or []) for filter in filters])
@@ -0,0 +1,91 @@
+import logging
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from tabulate import tabulate
+
+from ...models import Event
+from ...utils.dimension_utils import filter_by_dimensions, filter_by_dimensions_join
+
+logger = logging.getLogger("kompassi")
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare dimension filtering via the cached_dimensions GIN index to joining through dimension values. "
+        "Filters programs of the event unless --survey is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--event-slug",
+            metavar="EVENT_SLUG",
+            required=True,
+        )
+        parser.add_argument(
+            "--survey-slug",
+            metavar="SURVEY_SLUG",
+            help="Filter responses to this survey instead of programs",
+        )
+        parser.add_argument(
+            "--filter",
+            dest="filters",
+            metavar="DIMENSION=VALUE1,VALUE2",
+            action="append",
+            default=[],
+            help="May be given multiple times. Values are ORed, filters are ANDed.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+        )
+
+    def handle(self, *args, **options):
+        event = Event.objects.get(slug=options["event_slug"])
+
+        if survey_slug := options["survey_slug"]:
+            queryset = event.surveys.get(slug=survey_slug).responses.all()
+        else:
+            queryset = event.programs.all()
+
+        filters = []
+        for filter in options["filters"]:
+            dimension_slug, sep, value_slugs = filter.partition("=")
+            if not sep:
+                raise CommandError(f"Invalid filter: {filter}")
+            filters.append((dimension_slug, value_slugs.split(",")))
+
+        methods = [
+            ("join", filter_by_dimensions_join),
+            ("index", filter_by_dimensions),
+        ]
+
+        results = {}
+        rows = []
+        for name, method in methods:
+            timings = []
+            for _ in range(options["repeat"]):
+                t0 = perf_counter()
+                ids = set(method(queryset, filters).values_list("id", flat=True))
+                timings.append(perf_counter() - t0)
+
+            results[name] = ids
+            timings.sort()
+            rows.append(
+                (
+                    name,
+                    len(ids),
+                    f"{1000 * timings[0]:.2f}",
+                    f"{1000 * timings[len(timings) // 2]:.2f}",
+                    f"{1000 * timings[-1]:.2f}",
+                )
+            )
+
+        print(tabulate(rows, headers=["method", "rows", "min ms", "median ms", "max ms"]))
+
+        if results["join"] != results["index"]:
+            raise CommandError(
+                "Results differ between methods (cached_dimensions may be stale): "
+                f"{len(results['join'] ^ results['index'])} rows"
+            )
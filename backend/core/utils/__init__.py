@@ -1,5 +1,6 @@
 # flake8: noqa
 
+from .dimension_utils import filter_by_dimensions
 from .form_utils import (
     DateField,
     horizontal_form_helper,
@@ -52,4 +53,5 @@ from .time_utils import (
     get_objects_within_period,
     is_within_period,
 )
+from .versioned_cache import VersionedCache
 from .view_utils import get_next, login_redirect, url
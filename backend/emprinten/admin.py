@@ -29,7 +29,7 @@ class ProjectFileAdmin(admin.ModelAdmin):
 
 @admin.register(models.RenderResult)
 class RenderResultAdmin(admin.ModelAdmin):
-    list_display = ("id", "project", "row_count", "started")
+    list_display = ("id", "project", "row_count", "rows_done", "started", "finished", "result_name")
 
     def has_add_permission(self, request, obj=None):
         return settings.DEBUG
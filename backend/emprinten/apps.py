@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class EmprintenConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "emprinten"
+
+    def ready(self) -> None:
+        from . import handlers  # noqa: F401
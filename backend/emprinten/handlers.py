@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import FileVersion
+from .renderer import evict_compiled_project
+
+
+@receiver(post_save, sender=FileVersion)
+@receiver(post_delete, sender=FileVersion)
+def file_version_changed(sender, instance: FileVersion, **kwargs):
+    """
+    Changed file versions already miss the compiled project cache (see get_compiled_project).
+    Evict the stale compiled project of this process early to free the memory.
+    """
+    evict_compiled_project(instance.file.project_id)
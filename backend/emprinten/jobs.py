@@ -0,0 +1,232 @@
+"""
+Render jobs of emprinten.
+
+Uploading data to a project creates a RenderResult and renders it in the background
+(render_result_render task) so that big print batches do not tie up web workers. The uploader
+is redirected to a page that reports progress and offers the result for download once finished.
+API clients may ask for JSON instead and poll the status URL they are given.
+
+Results are kept for EMPRINTEN_RESULT_TTL_DAYS. Submitting the same data to the same file
+versions and patterns of the project again within that time is served from the stored result
+without rendering (see get_input_hash). The files of expired results are deleted by the
+cleanup_render_results task, which is run periodically and also by submit_render at most every
+CLEANUP_INTERVAL_SECONDS, so that results do not pile up if the periodic task is not running.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from time import monotonic
+
+import jinja2.exceptions
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files import File
+from django.db import transaction
+from django.utils.timezone import now
+
+from .models import FileVersion, Project, RenderResult
+from .renderer import DataSet, RenderError, get_compiled_project, render_archive, render_document
+
+logger = logging.getLogger("kompassi")
+
+# how often progress of background renders is written to the database
+PROGRESS_INTERVAL_SECONDS = 1.0
+
+# how often submit_render runs cleanup_render_results at most
+CLEANUP_INTERVAL_SECONDS = 3600
+CLEANUP_CACHE_KEY = "emprinten.cleanup_render_results"
+
+
+def get_input_hash(project: Project, files: Iterable[FileVersion], data: bytes, return_archive: bool) -> str:
+    """
+    Identifies a render by everything that goes into its result.
+    File versions are immutable, so their ids stand for their content.
+    """
+    content = json.dumps(
+        [
+            sorted((fv.id, fv.data.name) for fv in files),
+            project.name_pattern,
+            project.title_pattern,
+            return_archive,
+            hashlib.sha256(data).hexdigest(),
+        ]
+    )
+    return hashlib.sha256(content.encode("UTF-8")).hexdigest()
+
+
+def get_expiry_cutoff(t: datetime | None = None) -> datetime:
+    if t is None:
+        t = now()
+    return t - timedelta(days=settings.EMPRINTEN_RESULT_TTL_DAYS)
+
+
+def find_stored_result(project: Project, input_hash: str) -> RenderResult | None:
+    return (
+        RenderResult.objects.filter(
+            project=project,
+            input_hash=input_hash,
+            finished__isnull=False,
+            started__gte=get_expiry_cutoff(),
+            error="",
+        )
+        .exclude(result="")
+        .exclude(result__isnull=True)
+        .order_by("-started")
+        .first()
+    )
+
+
+def submit_render(
+    project: Project,
+    user: User | None,
+    data: DataSet,
+    input_hash: str,
+    *,
+    return_archive: bool,
+) -> RenderResult:
+    """
+    Creates a RenderResult for the data and starts rendering it, unless an identical render is stored.
+    """
+    t = now()
+
+    if cache.add(CLEANUP_CACHE_KEY, True, CLEANUP_INTERVAL_SECONDS):
+        schedule_cleanup()
+
+    if stored := find_stored_result(project, input_hash):
+        # The stored file is shared; it is deleted once no unexpired render refers to it.
+        return RenderResult.objects.create(
+            project=project,
+            user=user,
+            row_count=stored.row_count,
+            started=t,
+            rows_done=stored.rows_done,
+            finished=t,
+            result=stored.result.name,
+            result_name=stored.result_name,
+            input_hash=input_hash,
+        )
+
+    render_result = RenderResult.objects.create(
+        project=project,
+        user=user,
+        row_count=len(data),
+        started=t,
+        input_hash=input_hash,
+    )
+
+    if "background_tasks" in settings.INSTALLED_APPS:
+        from .tasks import render_result_render
+
+        transaction.on_commit(
+            lambda: render_result_render.delay(render_result.id, data, return_archive)  # type: ignore
+        )
+    else:
+        render_to_result(render_result, data, return_archive=return_archive, processes=1)
+
+    return render_result
+
+
+def render_to_result(
+    render_result: RenderResult,
+    data: DataSet,
+    *,
+    return_archive: bool,
+    processes: int | None = None,
+) -> None:
+    """
+    Renders the rows into a PDF, or an archive of PDFs, stored as the result of the render result.
+    Progress of archives is updated as rows complete.
+    """
+    project = render_result.project
+    last_update = monotonic()
+
+    def progress(rows_done: int) -> None:
+        nonlocal last_update
+        if monotonic() - last_update >= PROGRESS_INTERVAL_SECONDS:
+            RenderResult.objects.filter(id=render_result.id).update(rows_done=rows_done)
+            last_update = monotonic()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        try:
+            compiled = get_compiled_project(project.current_files())
+
+            if return_archive:
+                file_name = os.path.join(tmpdir, "result.zip")
+                result_name = f"{project.slug}.zip"
+                render_archive(
+                    compiled,
+                    project.name_pattern,
+                    project.title_pattern,
+                    data,
+                    file_name,
+                    processes=processes,
+                    progress=progress,
+                )
+            else:
+                file_name = os.path.join(tmpdir, "result.pdf")
+                result_name = render_document(
+                    compiled,
+                    project.name_pattern,
+                    project.title_pattern,
+                    data,
+                    file_name,
+                )
+        except Exception as e:
+            logger.exception("Render %s of project %s failed", render_result.id, project.slug)
+            # template errors are meant for the user, others could leak internals
+            if isinstance(e, jinja2.exceptions.TemplateError | RenderError):
+                render_result.error = str(e)
+            else:
+                render_result.error = "Rendering failed"
+            render_result.finished = now()
+            render_result.save(update_fields=["error", "finished"])
+            return
+
+        with open(file_name, "rb") as f:
+            render_result.result.save(result_name, File(f), save=False)
+
+    render_result.result_name = result_name
+    render_result.rows_done = len(data)
+    render_result.finished = now()
+    render_result.save(update_fields=["result", "result_name", "rows_done", "finished"])
+
+
+def cleanup_render_results(t: datetime | None = None) -> int:
+    """
+    Forgets the results of renders older than EMPRINTEN_RESULT_TTL_DAYS and deletes their files
+    unless an unexpired render shares them. Returns the number of files deleted.
+    """
+    cutoff = get_expiry_cutoff(t)
+    expired = RenderResult.objects.filter(started__lt=cutoff).exclude(result="").exclude(result__isnull=True)
+
+    names = set(expired.values_list("result", flat=True))
+    if not names:
+        return 0
+
+    expired.update(result="")
+    names -= set(RenderResult.objects.filter(result__in=names).values_list("result", flat=True))
+
+    storage = RenderResult._meta.get_field("result").storage  # type: ignore
+    for name in names:
+        storage.delete(name)
+
+    logger.info("Deleted %d expired emprinten render results", len(names))
+    return len(names)
+
+
+def schedule_cleanup():
+    """
+    Runs cleanup_render_results once the current transaction (if any) commits.
+    """
+    if "background_tasks" in settings.INSTALLED_APPS:
+        from .tasks import cleanup_render_results as cleanup_render_results_task
+
+        transaction.on_commit(lambda: cleanup_render_results_task.delay())
+    else:
+        transaction.on_commit(cleanup_render_results)
@@ -0,0 +1,71 @@
+import http
+import json
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from tabulate import tabulate
+
+from ...models import Project
+from ...renderer import evict_compiled_project
+from ...utils import render_obj
+from ...var_help import find_vars
+
+
+class Command(BaseCommand):
+    help = (
+        "Time repeated single row renders (eg. a single badge) of a project "
+        "with and without the compiled project cache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "project_slug",
+            metavar="PROJECT_SLUG",
+        )
+        parser.add_argument(
+            "--rounds",
+            type=int,
+            default=20,
+            help="Number of renders per mode (default: 20)",
+        )
+        parser.add_argument(
+            "--data",
+            default=None,
+            help="Row to render as a JSON object (default: each variable of the template set to its name)",
+        )
+
+    def handle(self, *args, **options):
+        project = Project.objects.get(slug=options["project_slug"])
+
+        if options["data"]:
+            row = json.loads(options["data"])
+        else:
+            row = {var: var for var in find_vars(project.current_files(), project.name_pattern, project.title_pattern)}
+
+        rows = []
+        for mode, cached in [("cold", False), ("cached", True)]:
+            evict_compiled_project(project.id)
+            timings = []
+
+            for _ in range(options["rounds"]):
+                if not cached:
+                    evict_compiled_project(project.id)
+
+                t0 = perf_counter()
+                response = render_obj(project, row)
+                if response.status_code != http.HTTPStatus.OK:
+                    raise RuntimeError(f"Render failed with status {response.status_code}")
+                response.close()
+                timings.append(perf_counter() - t0)
+
+            rows.append(
+                (
+                    mode,
+                    len(timings),
+                    f"{1000 * sum(timings) / len(timings):.1f}",
+                    f"{1000 * min(timings):.1f}",
+                    f"{1000 * max(timings):.1f}",
+                )
+            )
+
+        print(tabulate(rows, headers=["mode", "renders", "mean ms", "min ms", "max ms"]))
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.8 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+import emprinten.models
+
+
+def mark_past_renders_finished(apps, schema_editor):
+    RenderResult = apps.get_model("emprinten", "RenderResult")
+    RenderResult.objects.update(finished=models.F("started"), rows_done=models.F("row_count"))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("emprinten", "0004_renderresult"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="renderresult",
+            name="error",
+            field=models.TextField(blank=True, default=""),
+        ),
+        migrations.AddField(
+            model_name="renderresult",
+            name="finished",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="renderresult",
+            name="result",
+            field=models.FileField(blank=True, null=True, upload_to=emprinten.models.make_result_filename),
+        ),
+        migrations.AddField(
+            model_name="renderresult",
+            name="rows_done",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(mark_past_renders_finished, reverse_code=migrations.RunPython.noop),
+    ]
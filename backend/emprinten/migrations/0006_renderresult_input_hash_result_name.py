@@ -0,0 +1,22 @@
+# Generated by Django 5.0.8 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("emprinten", "0005_renderresult_progress_and_result"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="renderresult",
+            name="input_hash",
+            field=models.CharField(blank=True, db_index=True, default="", max_length=64),
+        ),
+        migrations.AddField(
+            model_name="renderresult",
+            name="result_name",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+    ]
@@ -6,6 +6,7 @@ import typing
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.urls import reverse
 
 from core.models import Event
 
@@ -113,8 +114,65 @@ class FileVersion(models.Model):
         return f"{self.data.name} (v{self.version})"
 
 
+def make_result_filename(instance: RenderResult, filename: str) -> str:
+    return os.path.join(
+        instance._meta.app_label,
+        instance.project.slug,
+        "results",
+        f"{instance.id}-{os.path.basename(filename)}",
+    )
+
+
 class RenderResult(models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE, null=False)
     user = models.ForeignKey(get_user_model(), on_delete=models.SET_NULL, null=True)
     row_count = models.PositiveIntegerField()
     started = models.DateTimeField(auto_now_add=True)
+
+    # Render jobs (see emprinten/jobs.py).
+    rows_done = models.PositiveIntegerField(default=0)
+    finished = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+    result = models.FileField(upload_to=make_result_filename, null=True, blank=True)
+    result_name = models.CharField(max_length=255, blank=True, default="")
+    input_hash = models.CharField(max_length=64, blank=True, default="", db_index=True)
+
+    @property
+    def is_finished(self) -> bool:
+        return self.finished is not None
+
+    @property
+    def status(self) -> str:
+        if self.error:
+            return "failed"
+        if self.finished is None:
+            return "running"
+        if not self.result:
+            return "expired"
+        return "finished"
+
+    @property
+    def content_type(self) -> str:
+        return "application/zip" if self.result_name.endswith(".zip") else "application/pdf"
+
+    @property
+    def progress_percent(self) -> int:
+        return 100 * self.rows_done // self.row_count if self.row_count else 100
+
+    def as_dict(self) -> dict[str, typing.Any]:
+        download_url = None
+        if self.status == "finished" and self.project.event is not None:
+            url = reverse(
+                "emprinten_result",
+                kwargs={"event": self.project.event.slug, "slug": self.project.slug, "result_id": self.id},
+            )
+            download_url = f"{url}?download"
+
+        return dict(
+            id=self.id,
+            status=self.status,
+            rowCount=self.row_count,
+            rowsDone=self.rows_done,
+            error=self.error or None,
+            downloadUrl=download_url,
+        )
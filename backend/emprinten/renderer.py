@@ -1,33 +1,50 @@
 import collections.abc
+import concurrent.futures
 import contextlib
 import functools
+import multiprocessing
 import os
 import shutil
 import tempfile
+import threading
 import typing
 import urllib.request
 import zipfile
 
 import jinja2.nodes
 import weasyprint
+from django.db import connections
 from django.http import FileResponse, HttpResponse, HttpResponseBase
 from jinja2 import FunctionLoader
 from jinja2.sandbox import SandboxedEnvironment
 
+from core.utils.versioned_cache import VersionedCache
+
 from . import filters, functions
 from .files import Lut, NameFactory, make_lut, make_name
 from .models import FileVersion, ProjectFile
 
 DEBUG = False
 
+# number of compiled projects (distinct sets of current file versions) kept per process
+COMPILED_PROJECTS_CACHE_SIZE = 16
+
 FileWithData = tuple[str, dict[str, str | dict[str, typing.Any]] | None]
 DataRow = dict[str, str | dict[str, typing.Any]]
 DataSet = list[DataRow]
 Vfs = dict[str, FileVersion]
+FileReader = collections.abc.Callable[[FileVersion], bytes]
+ProgressCallback = collections.abc.Callable[[int], None]
 
 LOCAL_FILE_URI_PREFIX = "file:///"
 
 
+class RenderError(ValueError):
+    """
+    Rendering failed because of the project or data. The message is meant for the user.
+    """
+
+
 def html_header(title: str, lang: str = "fi") -> str:
     return f"""<!DOCTYPE html>
 <html lang="{lang}">
@@ -67,6 +84,72 @@ def find_lookup_tables(files: typing.Iterable[FileVersion]) -> dict[str, Lut]:
     }
 
 
+def read_file_version(file_version: FileVersion) -> bytes:
+    with file_version.data.open("rb") as f:
+        return f.read()
+
+
+class CompiledProject:
+    """
+    The current files of a project compiled for rendering: the template environment (which keeps
+    templates compiled once loaded), parsed stylesheets, lookup tables and the contents of files
+    fetched from file storage (templates, stylesheets, images). Building these dominates rendering
+    a single row, so compiled projects are cached per set of current file versions
+    (see get_compiled_project). Shared between renders and threads, treat as read-only.
+    """
+
+    def __init__(self, files: typing.Iterable[FileVersion]) -> None:
+        files = list(files)
+        self.main = find_main(files)
+        self.vfs = files_to_vfs(files)
+        self._contents: dict[int, bytes] = {}
+        self._lock = threading.Lock()
+
+        self.templates = _TemplateCompiler(self.vfs, read=self.read)
+        self.html = _HtmlCompiler(self.vfs, read=self.read)
+
+    def read(self, file_version: FileVersion) -> bytes:
+        with self._lock:
+            if (data := self._contents.get(file_version.id)) is not None:
+                return data
+
+        data = read_file_version(file_version)
+
+        with self._lock:
+            self._contents[file_version.id] = data
+
+        return data
+
+    def preload(self) -> None:
+        """
+        Reads all files and parses the stylesheets, eg. before forking worker processes so that they need not.
+        """
+        for file_version in self.vfs.values():
+            self.read(file_version)
+        self.html.parsed_sheets  # noqa: B018
+
+
+# (project id, ((file version id, file name), ...)) -> compiled project
+compiled_projects: VersionedCache[collections.abc.Hashable, CompiledProject] = VersionedCache(
+    max_entries=COMPILED_PROJECTS_CACHE_SIZE
+)
+
+
+def get_compiled_project(files: typing.Iterable[FileVersion]) -> CompiledProject:
+    """
+    Returns the compiled project of the given (current) file versions. A new current file version
+    changes the key, so compiled projects never need to be invalidated across processes.
+    """
+    files = list(files)
+    project_id = files[0].file.project_id if files else None
+    key = (project_id, tuple(sorted((file_version.id, file_version.data.name) for file_version in files)))
+    return compiled_projects.get_or_compute(key, lambda: CompiledProject(files))
+
+
+def evict_compiled_project(project_id: int) -> None:
+    compiled_projects.evict(lambda key: key[0] == project_id)  # type: ignore
+
+
 @contextlib.contextmanager
 def make_temp_dir(*, keep: bool) -> collections.abc.Generator[str, None, None]:
     tmp_dir = tempfile.mkdtemp()
@@ -85,74 +168,136 @@ def render_pdf(
     *,
     return_archive: bool = False,
 ) -> HttpResponseBase:
-    main = find_main(files)
+    compiled = get_compiled_project(files)
+    main = compiled.main
     if main is None:
         return HttpResponse("Main file not found", status=404)
 
-    vfs = files_to_vfs(files)
-    env = _TemplateCompiler(vfs)
+    if return_archive:
+        with make_temp_dir(keep=False) as tmpdir:
+            z_name = os.path.join(tmpdir, "result.zip")
+            render_archive(compiled, filename_pattern, title_pattern, data, z_name, processes=1)
+            # FileResponse closes the open file by itself.
+            return FileResponse(open(z_name, "rb"), content_type="application/zip")  # noqa: SIM115
+
+    with make_temp_dir(keep=False) as tmpdir:
+        pdf_name = os.path.join(tmpdir, "result.pdf")
+        file_name = render_document(compiled, filename_pattern, title_pattern, data, pdf_name)
+        # FileResponse closes the open file by itself.
+        return FileResponse(
+            open(pdf_name, "rb"),  # noqa: SIM115
+            content_type="application/pdf",
+            filename=file_name,
+        )
+
+
+def render_document(
+    compiled: CompiledProject,
+    filename_pattern: str | None,
+    title_pattern: str,
+    data: DataSet,
+    pdf_name: str,
+) -> str:
+    """
+    Renders all rows into the single PDF pdf_name. Returns the file name to offer for download.
+    """
+    main = compiled.main
+    if main is None:
+        raise RenderError("Main file not found")
+
+    env = compiled.templates
     if DEBUG:
-        print(vfs)
+        print(compiled.vfs)
 
     if DEBUG:
         print(data)
 
     with make_temp_dir(keep=False) as tmpdir:
-        # tmpdir contents in the end (S for single file output, A for archive/split output):
+        # tmpdir contents in the end:
+        # - src/
+        #   - master.html
+        # - result/
+        #   - master.pdf
+
+        # result/master.pdf is moved to pdf_name.
+
+        src_dir = os.path.join(tmpdir, "src")
+        result_dir = os.path.join(tmpdir, "result")
+        os.mkdir(src_dir)
+        os.mkdir(result_dir)
+
+        # Compile source templates into html into $tmpdir/src.
+        sources: list[FileWithData] = env.compile(main.file.file_name, src_dir, data, title_pattern, split_output=False)
+
+        wp = compiled.html
+        ((result_name, row),) = wp.compile(sources, result_dir)
+        shutil.move(result_name, pdf_name)
+
+        name_tpl = env.from_string(filename_pattern) if filename_pattern else None
+        return NameFactory(name_tpl).make({"row": row}, fallback="result.pdf")
+
+
+def render_archive(
+    compiled: CompiledProject,
+    filename_pattern: str | None,
+    title_pattern: str,
+    data: DataSet,
+    z_name: str,
+    *,
+    processes: int | None = None,
+    progress: ProgressCallback | None = None,
+) -> None:
+    """
+    Renders each row into its own PDF and writes them into the zip archive z_name.
+
+    PDFs are rendered in a pool of `processes` worker processes (default: number of CPUs) and written
+    into the archive as they complete, so the archive is in completion order. progress is called with
+    the number of rows done after each one.
+    """
+    main = compiled.main
+    if main is None:
+        raise RenderError("Main file not found")
+
+    env = compiled.templates
+
+    with make_temp_dir(keep=False) as tmpdir:
+        # tmpdir contents in the end:
         # - src/
-        #   - master.html (S)
-        #   - 001.html (A)
+        #   - 001.html
         #   - 002.html ...
         # - result/
-        #   - master.pdf (S)
-        #   - 001.pdf (A)
+        #   - 001.pdf
         #   - 002.pdf ...
-        # - result.zip (A)
 
-        # Either result/master.pdf or result.zip is streamed out.
-        # master.pdf (S) is renamed when streamed.
-        # ???.pdf (A) are renamed when written into the zip.
+        # ???.pdf are renamed when written into the zip.
 
         src_dir = os.path.join(tmpdir, "src")
         result_dir = os.path.join(tmpdir, "result")
         os.mkdir(src_dir)
         os.mkdir(result_dir)
 
-        # Compile source templates into one or more html's into $tmpdir/src.
-        sources: list[FileWithData] = env.compile(
-            main.file.file_name, src_dir, data, title_pattern, split_output=return_archive
-        )
+        # Compile source templates into html's into $tmpdir/src.
+        sources: list[FileWithData] = env.compile(main.file.file_name, src_dir, data, title_pattern, split_output=True)
 
-        wp = _HtmlCompiler(vfs)
-        results: list[FileWithData] = wp.compile(sources, result_dir)
+        # Names are made in row order for them not to depend on completion order.
         name_tpl = env.from_string(filename_pattern) if filename_pattern else None
         name_factory = NameFactory(name_tpl)
+        arc_names = {
+            source: name_factory.make({"row": row}, fallback=os.path.splitext(os.path.basename(source))[0] + ".pdf")
+            for source, row in sources
+        }
 
-        if return_archive:
-            z_name = os.path.join(tmpdir, "result.zip")
-            with zipfile.ZipFile(z_name, "w") as z:
-                for pdf_name, row in results:
-                    arc_name = name_factory.make({"row": row}, fallback=os.path.basename(pdf_name))
-                    z.write(pdf_name, arcname=arc_name)
-            if DEBUG:
-                ls_r(tmpdir)
-            # FileResponse closes the open file by itself.
-            return FileResponse(open(z_name, "rb"), content_type="application/zip")  # noqa: SIM115
+        with zipfile.ZipFile(z_name, "w") as z:
+            results = compiled.html.compile_parallel(sources, result_dir, processes=processes)
+            for num_done, (source, pdf_name) in enumerate(results, start=1):
+                z.write(pdf_name, arcname=arc_names[source])
+                os.unlink(pdf_name)
 
-        if len(results) > 1:
-            return HttpResponse(status=401)
+                if progress is not None:
+                    progress(num_done)
 
-        if results:
-            pdf_name, row = results[0]
-            file_name = name_factory.make({"row": row}, fallback="result.pdf")
-            # FileResponse closes the open file by itself.
-            return FileResponse(
-                open(pdf_name, "rb"),  # noqa: SIM115
-                content_type="application/pdf",
-                filename=file_name,
-            )
-
-        return HttpResponse(status=201)
+        if DEBUG:
+            ls_r(tmpdir)
 
 
 T = typing.TypeVar("T", bound=collections.abc.Callable)
@@ -185,8 +330,10 @@ class _TemplateCompiler:
                 return True
             return hasattr(obj, "is_safe_to_call") and obj.is_safe_to_call
 
-    def __init__(self, vfs: Vfs) -> None:
+    def __init__(self, vfs: Vfs, read: FileReader = read_file_version) -> None:
         self.vfs = vfs
+        self.read = read
+        self._string_templates: dict[str, jinja2.Template] = {}
 
         env = self.Environment(
             autoescape=True,
@@ -206,7 +353,13 @@ class _TemplateCompiler:
     def from_string(self, s: str | None) -> jinja2.Template | None:
         if s is None:
             return None
-        return self.env.from_string(s)
+        if (tpl := self._string_templates.get(s)) is None:
+            tpl = self._string_templates[s] = self.env.from_string(s)
+        return tpl
+
+    @functools.cached_property
+    def lookups(self) -> dict[str, Lut]:
+        return find_lookup_tables(self.vfs.values())
 
     def get_source(self, file_name: str) -> str:
         return self.env.loader.get_source(self.env, file_name)[0]  # pyright: ignore reportOptionalMemberAccess
@@ -217,9 +370,9 @@ class _TemplateCompiler:
     def compile(
         self, main_file_name: str, src_dir: str, data: DataSet, title_pattern: str, *, split_output: bool
     ) -> list[FileWithData]:
-        lookups = find_lookup_tables(self.vfs.values())
+        lookups = self.lookups
         tpl = self.env.get_template(main_file_name)
-        _title_pattern = self.env.from_string(title_pattern)
+        _title_pattern = typing.cast(jinja2.Template, self.from_string(title_pattern))
 
         sources: list[FileWithData] = []
         if split_output:
@@ -265,50 +418,87 @@ class _TemplateCompiler:
             ProjectFile.Type.CSS,
         ):
             return None
-        with the_file.data.open("rt") as tpl_file:
-            src = tpl_file.read()
+        src = self.read(the_file).decode("utf-8")
         return src, name, lambda: True
 
 
 class _HtmlCompiler:
-    def __init__(self, vfs: Vfs) -> None:
+    def __init__(self, vfs: Vfs, read: FileReader = read_file_version) -> None:
         self.vfs = vfs
+        self.read = read
         self.stylesheets = self.find_stylesheets(vfs.values())
 
     @staticmethod
     def find_stylesheets(files: typing.Iterable[FileVersion]) -> list[FileVersion]:
         return [file_version for file_version in files if file_version.file.type == ProjectFile.Type.CSS]
 
-    def compile(self, sources: list[FileWithData], result_dir: str) -> list[FileWithData]:
-        parsed_sheets = [
+    @functools.cached_property
+    def parsed_sheets(self) -> list[weasyprint.CSS]:
+        return [
             weasyprint.CSS(
-                string=sheet_file.data.read(),
+                string=self.read(sheet_file),
                 base_url=LOCAL_FILE_URI_PREFIX,
                 url_fetcher=self._do_lookup,
             )
             for sheet_file in self.stylesheets
         ]
-        results: list[FileWithData] = []
-        for source, row in sources:
-            pdf_html = weasyprint.HTML(
-                filename=source,
-                base_url=LOCAL_FILE_URI_PREFIX,
-                url_fetcher=self._do_lookup,
-            )
-            pdf = pdf_html.write_pdf(
-                stylesheets=parsed_sheets,
-            )
-            # We don't give `target` parameter, so the function should return bytes.
-            if pdf is None:
-                raise RuntimeError("Unexpectedly None result")
 
-            dst_base = os.path.splitext(os.path.basename(source))[0]
-            dst_name = os.path.join(result_dir, dst_base + ".pdf")
-            results.append((dst_name, row))
-            with open(dst_name, "wb") as of:
-                of.write(pdf)
+    def compile_one(self, source: str, result_dir: str) -> str:
+        pdf_html = weasyprint.HTML(
+            filename=source,
+            base_url=LOCAL_FILE_URI_PREFIX,
+            url_fetcher=self._do_lookup,
+        )
+        pdf = pdf_html.write_pdf(
+            stylesheets=self.parsed_sheets,
+        )
+        # We don't give `target` parameter, so the function should return bytes.
+        if pdf is None:
+            raise RuntimeError("Unexpectedly None result")
+
+        dst_base = os.path.splitext(os.path.basename(source))[0]
+        dst_name = os.path.join(result_dir, dst_base + ".pdf")
+        with open(dst_name, "wb") as of:
+            of.write(pdf)
+
+        return dst_name
+
+    def compile(self, sources: list[FileWithData], result_dir: str) -> list[FileWithData]:
+        return [(self.compile_one(source, result_dir), row) for source, row in sources]
 
-        return results
+    def compile_parallel(
+        self,
+        sources: list[FileWithData],
+        result_dir: str,
+        *,
+        processes: int | None = None,
+    ) -> collections.abc.Iterator[tuple[str, str]]:
+        """
+        Renders the sources in a pool of forked worker processes.
+        Yields (source, pdf file name) pairs as they complete, in no particular order.
+        """
+        if processes == 1 or len(sources) <= 1 or multiprocessing.current_process().daemon:
+            # daemonic processes (eg. some task queue workers) cannot have children
+            for source, _row in sources:
+                yield source, self.compile_one(source, result_dir)
+            return
+
+        # The workers inherit this compiler (with files read and stylesheets parsed) when forked.
+        # They must not share the database connections of the parent.
+        self.parsed_sheets  # noqa: B018
+        connections.close_all()
+        _worker_state["html_compiler"] = self
+
+        try:
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context("fork"),
+            ) as executor:
+                futures = {executor.submit(_compile_in_worker, source, result_dir): source for source, _row in sources}
+                for future in concurrent.futures.as_completed(futures):
+                    yield futures[future], future.result()
+        finally:
+            _worker_state.pop("html_compiler", None)
 
     # See `weasyprint.urls.default_url_fetcher` for function signature.
     # Note: At least some exceptions are silently ignored by weasyprint.
@@ -336,7 +526,15 @@ class _HtmlCompiler:
         if the_file is None:
             raise KeyError
         return {
-            "file_obj": the_file.data.open("rb"),
+            "string": self.read(the_file),
             # Weasyprint requires this to avoid file not found exc with the original filename.
             "redirected_url": file_url,
         }
+
+
+# state inherited by forked worker processes of _HtmlCompiler.compile_parallel
+_worker_state: dict[str, _HtmlCompiler] = {}
+
+
+def _compile_in_worker(source: str, result_dir: str) -> str:
+    return _worker_state["html_compiler"].compile_one(source, result_dir)
@@ -0,0 +1,24 @@
+from celery import shared_task
+
+
+@shared_task(ignore_result=True)
+def render_result_render(render_result_id: int, data: list[dict], return_archive: bool):
+    from django.conf import settings
+
+    from .jobs import render_to_result
+    from .models import RenderResult
+
+    render_result = RenderResult.objects.select_related("project").get(id=render_result_id)
+    render_to_result(
+        render_result,
+        data,
+        return_archive=return_archive,
+        processes=settings.EMPRINTEN_RENDER_PROCESSES,
+    )
+
+
+@shared_task(ignore_result=True)
+def cleanup_render_results():
+    from .jobs import cleanup_render_results
+
+    cleanup_render_results()
@@ -1,8 +1,16 @@
 import datetime
+import http
+import zipfile
 
 import pytest
+from django.core.cache import cache
+from django.core.files.base import ContentFile
 
 from .functions import fi_bank_barcode
+from .jobs import CLEANUP_CACHE_KEY, cleanup_render_results, get_input_hash, render_to_result, submit_render
+from .models import FileVersion, Project, ProjectFile, RenderResult
+from .renderer import get_compiled_project
+from .utils import render_obj
 
 
 @pytest.mark.parametrize(
@@ -97,3 +105,114 @@ def test_fi_bank_barcode_invalid(iban: str, euro: int, cents: int, viite: str |
 
     result = fi_bank_barcode(iban, euro, cents, viite, _era)
     assert not result.valid
+
+
+@pytest.fixture
+def project_with_main_file(settings, tmp_path) -> Project:
+    """
+    A project with a single main file rendering the name of each row, stored in a temporary MEDIA_ROOT.
+    """
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.STORAGES = {
+        **settings.STORAGES,
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    }
+
+    project = Project.objects.create(
+        name="Test",
+        slug="test",
+        split_output=False,
+        name_pattern="{{ row.name }}",
+        title_pattern="{{ row.name }}",
+    )
+    main = ProjectFile.objects.create(project=project, file_name="main.html", type=ProjectFile.Type.Main)
+    FileVersion.objects.create(file=main, data=ContentFile(b"<p>{{ row.name }}</p>", name="main.html"), current=True)
+
+    return project
+
+
+@pytest.mark.django_db
+def test_compiled_project_cache(project_with_main_file: Project) -> None:
+    project = project_with_main_file
+
+    response = render_obj(project, {"name": "Tester"})
+    assert response.status_code == http.HTTPStatus.OK
+    response.close()
+
+    compiled = get_compiled_project(project.current_files())
+    assert get_compiled_project(project.current_files()) is compiled
+
+    # a new current version misses the cache
+    main = ProjectFile.objects.get(project=project, type=ProjectFile.Type.Main)
+    FileVersion.objects.filter(file=main).update(current=False)
+    FileVersion.objects.create(
+        file=main,
+        data=ContentFile(b"<h1>{{ row.name }}</h1>", name="main.html"),
+        version=2,
+        current=True,
+    )
+    assert get_compiled_project(project.current_files()) is not compiled
+
+
+@pytest.mark.django_db
+def test_render_to_result(project_with_main_file: Project) -> None:
+    project = project_with_main_file
+    project.split_output = True
+    project.save(update_fields=["split_output"])
+
+    data = [{"name": name} for name in ["Foo", "Bar", "Foo"]]
+    render_result = RenderResult.objects.create(project=project, row_count=len(data))
+    render_to_result(render_result, data, return_archive=True, processes=1)
+
+    render_result.refresh_from_db()
+    assert render_result.is_finished
+    assert not render_result.error
+    assert render_result.rows_done == len(data)
+
+    with render_result.result.open("rb") as f, zipfile.ZipFile(f) as z:
+        assert sorted(z.namelist()) == ["Bar.pdf", "Foo (1).pdf", "Foo.pdf"]
+
+
+@pytest.mark.django_db
+def test_submit_render_reuses_stored_result(
+    project_with_main_file: Project, django_capture_on_commit_callbacks
+) -> None:
+    project = project_with_main_file
+
+    csv_bytes = b"name\nFoo\n"
+    data = [{"name": "Foo"}]
+    input_hash = get_input_hash(project, project.current_files(), csv_bytes, False)
+    assert input_hash != get_input_hash(project, project.current_files(), csv_bytes, True)
+
+    # rendering is started on commit
+    with django_capture_on_commit_callbacks(execute=True):
+        first = submit_render(project, None, data, input_hash, return_archive=False)
+    first.refresh_from_db()
+    assert first.status == "finished"
+    assert first.result_name.endswith(".pdf")
+
+    second = submit_render(project, None, data, input_hash, return_archive=False)
+    assert second.id != first.id
+    assert second.status == "finished"
+    assert second.result.name == first.result.name
+
+    # expiring the first one must not delete the file still referred to by the second one
+    RenderResult.objects.filter(id=first.id).update(started=first.started - datetime.timedelta(days=30))
+    assert cleanup_render_results() == 0
+    first.refresh_from_db()
+    assert first.status == "expired"
+    assert second.result.storage.exists(second.result.name)
+
+    RenderResult.objects.filter(id=second.id).update(started=second.started - datetime.timedelta(days=30))
+    assert cleanup_render_results() == 1
+    assert not second.result.storage.exists(second.result.name)
+
+    # submitting runs the cleanup every now and then
+    with django_capture_on_commit_callbacks(execute=True):
+        third = submit_render(project, None, data, input_hash, return_archive=False)
+    third.refresh_from_db()
+    RenderResult.objects.filter(id=third.id).update(started=third.started - datetime.timedelta(days=30))
+    cache.delete(CLEANUP_CACHE_KEY)
+    with django_capture_on_commit_callbacks(execute=True):
+        submit_render(project, None, data, input_hash, return_archive=False)
+    assert not third.result.storage.exists(third.result.name)
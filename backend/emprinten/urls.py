@@ -6,6 +6,16 @@ from . import views
 urlpatterns = [
     path("events/<slug:event>/emp/<slug:slug>/", views.project_index, name="emprinten_index"),
     path("events/<slug:event>/emp/<slug:slug>/upload/", views.handle_csv_upload, name="emprinten_upload"),
+    path(
+        "events/<slug:event>/emp/<slug:slug>/results/<int:result_id>/",
+        views.render_result_view,
+        name="emprinten_result",
+    ),
+    path(
+        "events/<slug:event>/emp/<slug:slug>/results/<int:result_id>/status/",
+        views.render_result_status_view,
+        name="emprinten_result_status",
+    ),
 ]
 
 if settings.DEBUG:
@@ -3,7 +3,7 @@ import typing
 import jinja2.compiler
 
 from .models import FileVersion
-from .renderer import _TemplateCompiler, files_to_vfs, find_main
+from .renderer import _TemplateCompiler, find_main, get_compiled_project
 
 
 def _parse_node(node: jinja2.compiler.nodes.Node, out: set[str]):
@@ -41,7 +41,7 @@ def _parse_vars(env: _TemplateCompiler, source: str | None, **kwargs) -> set[str
 
 
 def find_vars(files: typing.Iterable[FileVersion], file_name_template: str, title_template: str) -> set[str]:
-    env = _TemplateCompiler(files_to_vfs(files))
+    env = get_compiled_project(files).templates
     main = find_main(files)
     if main is None:
         return set()
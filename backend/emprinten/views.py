@@ -1,21 +1,24 @@
 import http
 import io
-import typing
 
 from django.contrib.auth.decorators import login_required
 from django.core.files import File
 from django.http import (
+    FileResponse,
     HttpResponse,
     HttpResponseBase,
     HttpResponseForbidden,
+    JsonResponse,
 )
-from django.shortcuts import get_object_or_404, render
-from django.utils.timezone import now
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
 from django.views.decorators.http import require_POST
 from jinja2 import exceptions
 
+from .files import read_csv
+from .jobs import get_input_hash, submit_render
 from .models import FileVersion, Project, RenderResult
-from .utils import render_csv, render_obj
+from .utils import render_obj
 from .var_help import find_vars
 
 
@@ -79,23 +82,78 @@ def handle_csv_upload(request, event: str, slug: str) -> HttpResponseBase:
         return HttpResponseForbidden()
 
     csv_upload: File = request.FILES["file"]
+    csv_bytes = csv_upload.read()
 
     return_archive = project.split_output or request.POST.get("zip") is not None
     try:
-        # csv_upload isn't strictly a buffer, but it is a binary file-like and needs to be interpreted as text.
-        wrapped = io.TextIOWrapper(typing.cast(typing.BinaryIO, csv_upload), encoding="utf-8")
-        start = now()
-        result = render_csv(project, wrapped, return_archive=return_archive)
+        data = read_csv(io.StringIO(csv_bytes.decode("utf-8")))
     except UnicodeDecodeError:
         return HttpResponse("Invalid text file supplied", status=http.HTTPStatus.BAD_REQUEST)
 
-    RenderResult.objects.create(
+    # Rendering may take minutes, so it is done in the background (or not at all if an identical result is stored).
+    input_hash = get_input_hash(project, project.current_files(), csv_bytes, return_archive)
+    render_result = submit_render(project, request.user, data, input_hash, return_archive=return_archive)
+
+    if request.accepts("application/json") and not request.accepts("text/html"):
+        response = JsonResponse(render_result.as_dict(), status=http.HTTPStatus.ACCEPTED)
+        response["Location"] = reverse("emprinten_result_status", args=(event, slug, render_result.id))
+        return response
+
+    return redirect("emprinten_result", event=event, slug=slug, result_id=render_result.id)
+
+
+def _get_render_result(request, event: str, slug: str, result_id: int) -> RenderResult | None:
+    project = get_object_or_404(Project, event__slug=event, slug=slug)
+
+    if not project.is_allowed_to_supply_data(request.user):
+        return None
+
+    return get_object_or_404(
+        RenderResult.objects.select_related("project__event"),
+        id=result_id,
         project=project,
         user=request.user,
-        row_count=result[1],
-        started=start,
     )
-    return result[0]
+
+
+@login_required
+def render_result_view(request, event: str, slug: str, result_id: int) -> HttpResponseBase:
+    render_result = _get_render_result(request, event, slug, result_id)
+    if render_result is None:
+        return HttpResponseForbidden()
+
+    if "download" in request.GET:
+        if render_result.status != "finished":
+            return HttpResponse("Result not available", status=http.HTTPStatus.NOT_FOUND)
+
+        # FileResponse closes the open file by itself.
+        return FileResponse(
+            render_result.result.open("rb"),
+            content_type=render_result.content_type,
+            filename=render_result.result_name,
+        )
+
+    return render(
+        request,
+        "emprinten/render_result_view.html",
+        {
+            "event_slug": event,
+            "slug": slug,
+            "title": render_result.project.name,
+            "render_result": render_result,
+        },
+    )
+
+
+@login_required
+def render_result_status_view(request, event: str, slug: str, result_id: int) -> HttpResponseBase:
+    render_result = _get_render_result(request, event, slug, result_id)
+    if render_result is None:
+        return JsonResponse({"error": "Forbidden"}, status=http.HTTPStatus.FORBIDDEN)
+
+    response = JsonResponse(render_result.as_dict())
+    response["Cache-Control"] = "no-store"
+    return response
 
 
 @login_required
@@ -7,4 +7,4 @@ class EventLogAppConfig(AppConfig):
     verbose_name = _("event log v2")
 
     def ready(self):
-        from . import event_log_entry_types  # noqa: F401
+        from . import event_log_entry_types, handlers  # noqa: F401
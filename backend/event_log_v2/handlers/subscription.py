@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from ..models import Subscription
+from ..utils.subscription_cache import invalidate_subscription_cache
+
+
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def subscription_post_save_or_delete(sender, instance, **kwargs):
+    invalidate_subscription_cache()
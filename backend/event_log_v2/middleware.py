@@ -0,0 +1,15 @@
+from .utils.emit import buffered_emit
+
+
+class EventLogMiddleware:
+    """
+    Collects the event log entries emitted during a request and writes them in one go
+    when the response is ready.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with buffered_emit():
+            return self.get_response(request)
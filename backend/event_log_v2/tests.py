@@ -0,0 +1,64 @@
+from unittest import mock
+
+import pytest
+from django.db import transaction
+
+from .models import Entry
+from .utils.emit import buffered_emit, emit
+
+
+@pytest.mark.django_db(transaction=True)
+def test_buffered_emit():
+    # TODO find out how to hook this up to pytest.mark.django_db
+    Entry.ensure_partitions()
+
+    with mock.patch("event_log_v2.utils.emit.flush_entries") as flush_entries:
+        # inside a transaction, entries are written on commit in one batch
+        with transaction.atomic():
+            first = emit("directory.viewed")
+            second = emit("directory.viewed")
+            flush_entries.assert_not_called()
+
+        flush_entries.assert_called_once_with([first, second])
+        flush_entries.reset_mock()
+
+        # outside transactions, entries emitted during a request are written at the end of it
+        with buffered_emit():
+            third = emit("directory.viewed")
+            flush_entries.assert_not_called()
+
+        flush_entries.assert_called_once_with([third])
+        flush_entries.reset_mock()
+
+        # rolled back entries are discarded
+        with transaction.atomic():
+            with pytest.raises(RuntimeError), transaction.atomic():
+                emit("directory.viewed")
+                raise RuntimeError("rollback")
+
+            fourth = emit("directory.viewed")
+
+        flush_entries.assert_called_once_with([fourth])
+        flush_entries.reset_mock()
+
+        # including those emitted within a savepoint after entries emitted outside it
+        with transaction.atomic():
+            fifth = emit("directory.viewed")
+            with pytest.raises(RuntimeError), transaction.atomic():
+                emit("directory.viewed")
+                raise RuntimeError("rollback")
+
+            sixth = emit("directory.viewed")
+
+        flush_entries.assert_called_once_with([fifth, sixth])
+        flush_entries.reset_mock()
+
+        # a transaction after one that was rolled back gets a buffer of its own
+        with pytest.raises(RuntimeError), transaction.atomic():
+            emit("directory.viewed")
+            raise RuntimeError("rollback")
+
+        with transaction.atomic():
+            seventh = emit("directory.viewed")
+
+        flush_entries.assert_called_once_with([seventh])
@@ -1,13 +1,42 @@
 import logging
-
+from collections.abc import Sequence
+from contextlib import contextmanager
+from threading import local
+from time import perf_counter
+from typing import TYPE_CHECKING
+from weakref import WeakValueDictionary
+
+from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.http import HttpRequest
 
 from core.utils import get_ip
+from metrics.registry import counter, histogram
+
+from .subscription_cache import get_subscription_ids
+
+if TYPE_CHECKING:
+    from ..models import Entry
 
 logger = logging.getLogger("kompassi")
 
+flush_size = histogram(
+    "kompassi_event_log_flush_entries",
+    "Number of event log entries written per flush",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250),
+)
+flush_latency = histogram(
+    "kompassi_event_log_flush_seconds",
+    "Time taken to write a batch of event log entries and enqueue subscription updates",
+)
+entries_emitted = counter(
+    "kompassi_event_log_entries_total",
+    "Number of event log entries written",
+)
+
+_request_buffers = local()
+
 
 def log_creations(model, **extra_kwargs_for_emit):
     """
@@ -53,6 +82,88 @@ def attrs_from_request(request: HttpRequest):
     )
 
 
+class EntryBuffer:
+    """
+    Collects event log entries so that they can be written with a single bulk_create.
+    """
+
+    def __init__(self):
+        self.entries: list[Entry] = []
+        self.flushed = False
+
+    def append(self, entry: "Entry"):
+        self.entries.append(entry)
+
+    def flush(self):
+        self.flushed = True
+        entries, self.entries = self.entries, []
+        flush_entries(entries)
+
+
+def flush_entries(entries: Sequence["Entry"]):
+    """
+    Writes the entries into the database and notifies subscribers.
+    """
+    from ..models import Entry
+    from ..tasks import subscription_send_update_for_entry
+
+    if not entries:
+        return
+
+    t0 = perf_counter()
+
+    Entry.objects.bulk_create(entries)
+
+    for entry in entries:
+        for subscription_id in get_subscription_ids(entry.entry_type):
+            subscription_send_update_for_entry.delay(subscription_id, entry.id)  # type: ignore
+
+    flush_size.observe(len(entries))
+    flush_latency.observe(perf_counter() - t0)
+    entries_emitted.inc(len(entries))
+
+
+def _get_transaction_buffer(connection) -> EntryBuffer:
+    """
+    Returns the buffer of the current atomic block, registering it to be flushed on commit when it is created.
+
+    Buffers are kept per savepoint, so that if a savepoint (or the whole transaction) is rolled back,
+    Django discards the flush callback registered within it along with the entries collected so far.
+    The callback holds the only strong reference to the buffer, so the buffer also disappears from
+    the registry then, and the next atomic block at the same depth gets a new one.
+    """
+    buffers: WeakValueDictionary[tuple[str | None, ...], EntryBuffer] = connection.__dict__.setdefault(
+        "_event_log_v2_buffers", WeakValueDictionary()
+    )
+    key = tuple(connection.savepoint_ids)
+    buffer = buffers.get(key)
+
+    if buffer is None or buffer.flushed:
+        buffer = EntryBuffer()
+        buffers[key] = buffer
+        transaction.on_commit(buffer.flush)
+
+    return buffer
+
+
+@contextmanager
+def buffered_emit():
+    """
+    Entries emitted outside transactions within this context are written when the context exits.
+    Used by EventLogMiddleware to write the entries of a request in one go.
+    Entries emitted inside a transaction are written when it is committed.
+    """
+    buffers: list[EntryBuffer] = _request_buffers.__dict__.setdefault("stack", [])
+    buffer = EntryBuffer()
+    buffers.append(buffer)
+
+    try:
+        yield buffer
+    finally:
+        buffers.pop()
+        buffer.flush()
+
+
 def emit(entry_type: str, **kwargs):
     """
     Records a log entry into the event log.
@@ -60,8 +171,12 @@ def emit(entry_type: str, **kwargs):
     `kwargs` are passed to the Entry constructor with the exception of the following special kwargs:
 
     * `request`: If present, sets fields that can be deduced from the request.
+
+    The entry is not written immediately if inside a transaction (written on commit, and discarded
+    on rollback) or within `buffered_emit` (written at the end of the request). Otherwise it is
+    written immediately.
     """
-    from ..models import Entry, Subscription
+    from ..models import Entry
 
     if request := kwargs.pop("request", None):
         kwargs = dict(attrs_from_request(request), **kwargs)
@@ -71,7 +186,13 @@ def emit(entry_type: str, **kwargs):
     kwargs, other_fields = Entry.hoist(kwargs)
 
     entry = Entry(entry_type=entry_type, other_fields=other_fields, **kwargs)
-    entry.save()
 
-    for subscription in Subscription.objects.filter(entry_type=entry_type):
-        subscription.send_update_for_entry(entry)
+    connection = transaction.get_connection()
+    if connection.in_atomic_block:
+        _get_transaction_buffer(connection).append(entry)
+    elif buffers := getattr(_request_buffers, "stack", None):
+        buffers[-1].append(entry)
+    else:
+        flush_entries([entry])
+
+    return entry
@@ -0,0 +1,45 @@
+"""
+Process-local cache of entry type -> subscription ids.
+
+Subscriptions change rarely but are looked up for every emitted entry. The cache is
+invalidated in this process on Subscription save/delete (see event_log_v2/handlers)
+and expires after SUBSCRIPTION_CACHE_TTL_SECONDS so that changes made in other
+processes are picked up eventually.
+"""
+
+from threading import Lock
+from time import monotonic
+
+SUBSCRIPTION_CACHE_TTL_SECONDS = 60
+
+
+class SubscriptionCache:
+    def __init__(self, ttl_seconds: float = SUBSCRIPTION_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = Lock()
+        self._subscription_ids_by_entry_type: dict[str, list[int]] | None = None
+        self._loaded_at = 0.0
+
+    def get_subscription_ids(self, entry_type: str) -> list[int]:
+        from ..models import Subscription
+
+        with self._lock:
+            cache = self._subscription_ids_by_entry_type
+            if cache is None or monotonic() - self._loaded_at > self.ttl_seconds:
+                cache = {}
+                for subscription_id, subscription_entry_type in Subscription.objects.values_list("id", "entry_type"):
+                    cache.setdefault(subscription_entry_type, []).append(subscription_id)
+
+                self._subscription_ids_by_entry_type = cache
+                self._loaded_at = monotonic()
+
+        return cache.get(entry_type, [])
+
+    def invalidate(self):
+        with self._lock:
+            self._subscription_ids_by_entry_type = None
+
+
+subscription_cache = SubscriptionCache()
+get_subscription_ids = subscription_cache.get_subscription_ids
+invalidate_subscription_cache = subscription_cache.invalidate
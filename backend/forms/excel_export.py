@@ -1,13 +1,22 @@
-from collections.abc import Collection, Sequence
+import csv
+import json
+from collections.abc import Collection, Iterator, Sequence
 from typing import Any, BinaryIO
 
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from django.utils.timezone import localtime
 
+from core.csv_export import Echo
+
 from .models.dimension import Dimension
 from .models.field import Field, FieldType
 from .models.response import Response
+from .utils.process_form_data import process_form_data
+
+# responses are fetched from the database this many at a time
+EXPORT_CHUNK_SIZE = 500
 
 
 def get_header_cells(field: Field) -> list[str]:
@@ -52,33 +61,145 @@ def get_response_cells(field: Field, values: dict[str, Any]) -> list[Any]:
     return cells
 
 
-def write_responses_as_excel(
+def iter_response_values(
+    fields: Sequence[Field],
+    responses: models.QuerySet[Response],
+) -> Iterator[tuple[Any, str, dict[str, list[str]], dict[str, Any]]]:
+    """
+    Yields (created_at, language, cached_dimensions, values) for each response.
+    Only the columns needed for exporting are fetched, and not all at once.
+    """
+    rows = responses.values_list(
+        "created_at",
+        "form__language",
+        "cached_dimensions",
+        "form_data",
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    for created_at, language, cached_dimensions, form_data in rows:
+        values, _warnings = process_form_data(fields, form_data)
+        yield created_at, language, cached_dimensions, values
+
+
+def iter_response_rows(
     dimensions: Collection[Dimension],
     fields: Sequence[Field],
     responses: models.QuerySet[Response],
-    output_stream: BinaryIO | HttpResponse,
-):
-    from core.excel_export import XlsxWriter
-
+) -> Iterator[list[Any]]:
+    """
+    Yields the header row followed by a row for each response.
+    """
     # No meaningful way to include FileUpload fields for now.
     fields = [field for field in fields if field.type != FieldType.FILE_UPLOAD]
 
-    output = XlsxWriter(output_stream)
-
     header_row = ["created_at", "language"]
     header_row.extend(f"dimensions.{dimension.slug}" for dimension in dimensions)
     header_row.extend(cell for field in fields for cell in get_header_cells(field))
-    output.writerow(header_row)
-
-    for response in responses:
-        values, _warnings = response.get_processed_form_data(fields)
+    yield header_row
 
+    for created_at, language, cached_dimensions, values in iter_response_values(fields, responses):
         response_row = [
-            localtime(response.created_at).replace(tzinfo=None),
-            response.form.language,
+            localtime(created_at).replace(tzinfo=None),
+            language,
         ]
-        response_row.extend(", ".join(response.cached_dimensions.get(dimension.slug, [])) for dimension in dimensions)
+        response_row.extend(", ".join(cached_dimensions.get(dimension.slug, [])) for dimension in dimensions)
         response_row.extend(cell for field in fields for cell in get_response_cells(field, values))
-        output.writerow(response_row)
+        yield response_row
+
+
+def write_responses_as_excel(
+    dimensions: Collection[Dimension],
+    fields: Sequence[Field],
+    responses: models.QuerySet[Response],
+    output_stream: BinaryIO | HttpResponse,
+):
+    """
+    Buffers the whole workbook in memory. For HTTP responses, prefer get_excel_response.
+    """
+    from core.excel_export import XlsxWriter
+
+    output = XlsxWriter(output_stream)
+
+    for row in iter_response_rows(dimensions, fields, responses):
+        output.writerow(row)
 
     output.close()
+
+
+def get_excel_response(
+    dimensions: Collection[Dimension],
+    fields: Sequence[Field],
+    responses: models.QuerySet[Response],
+    filename: str,
+) -> FileResponse:
+    """
+    Writes the workbook into a temporary file in constant_memory mode and streams it from there.
+    """
+    from core.excel_export import TemporaryFileXlsxWriter
+
+    output = TemporaryFileXlsxWriter()
+
+    for row in iter_response_rows(dimensions, fields, responses):
+        output.writerow(row)
+
+    return output.as_response(filename)
+
+
+def get_csv_response(
+    dimensions: Collection[Dimension],
+    fields: Sequence[Field],
+    responses: models.QuerySet[Response],
+    filename: str,
+) -> StreamingHttpResponse:
+    """
+    Streams the responses as UTF-8 CSV as they are fetched from the database.
+    """
+    writer = csv.writer(Echo())
+
+    response = StreamingHttpResponse(
+        (writer.writerow(row) for row in iter_response_rows(dimensions, fields, responses)),
+        content_type="text/csv; charset=utf-8",
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+    return response
+
+
+def iter_ndjson(
+    fields: Sequence[Field],
+    responses: models.QuerySet[Response],
+) -> Iterator[str]:
+    for created_at, language, cached_dimensions, values in iter_response_values(fields, responses):
+        yield (
+            json.dumps(
+                dict(
+                    createdAt=created_at,
+                    language=language,
+                    dimensions=cached_dimensions,
+                    values=values,
+                ),
+                cls=DjangoJSONEncoder,
+            )
+            + "\n"
+        )
+
+
+def get_ndjson_response(
+    fields: Sequence[Field],
+    responses: models.QuerySet[Response],
+    filename: str,
+) -> StreamingHttpResponse:
+    """
+    Streams the responses as newline delimited JSON, one response per line.
+    Unlike the tabular formats, values are not flattened into columns.
+    """
+    # No meaningful way to include FileUpload fields for now.
+    fields = [field for field in fields if field.type != FieldType.FILE_UPLOAD]
+
+    response = StreamingHttpResponse(
+        iter_ndjson(fields, responses),
+        content_type="application/x-ndjson",
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+    return response
@@ -1,11 +1,9 @@
 import graphene
-from django.db import transaction
 from graphene.types.generic import GenericScalar
 
 from core.utils import get_ip
 
-from ...models.response import Response
-from ...models.survey import Survey
+from ...models.survey import ResponseDTO, Survey
 from ..response import ProfileResponseType
 
 
@@ -33,13 +31,6 @@ class CreateSurveyResponse(graphene.Mutation):
         if not survey.is_active:
             raise Exception("Survey is not active")
 
-        form = survey.get_form(input.locale)  # type: ignore
-        if not form:
-            raise Exception("Form not found")
-
-        if not form.fields:
-            raise Exception("Form has no fields")
-
         # TODO(https://github.com/con2/kompassi/issues/365): shows the ip of v2 backend, not the client
         ip_address = get_ip(info.context)
         created_by = user if (user := info.context.user) and user.is_authenticated else None
@@ -47,25 +38,16 @@ class CreateSurveyResponse(graphene.Mutation):
         if survey.login_required and not created_by:
             raise Exception("Login required")
 
-        if survey.max_responses_per_user:  # noqa: SIM102
-            if survey.responses.filter(created_by=created_by).count() >= survey.max_responses_per_user:
-                raise Exception("Maximum number of responses reached")
-
-        if survey.anonymity == "hard":
-            created_by = None
-            ip_address = ""
-
-        with transaction.atomic():
-            response = Response.objects.create(
-                form=form,
-                form_data=input.form_data,
-                created_by=created_by,
-                ip_address=ip_address,
-                sequence_number=survey.get_next_sequence_number(),
-            )
-
-            response.lift_dimension_values()
-
-        response.notify_subscribers()
+        # form fallback, max_responses_per_user and anonymity are handled by create_responses
+        (response,) = survey.create_responses(
+            [
+                ResponseDTO(
+                    form_data=input.form_data,  # type: ignore
+                    language=input.locale or "",  # type: ignore
+                    created_by=created_by,
+                    ip_address=ip_address,
+                )
+            ]
+        )
 
         return CreateSurveyResponse(response=response)  # type: ignore
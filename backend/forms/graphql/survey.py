@@ -7,8 +7,8 @@ from core.graphql.common import DimensionFilterInput
 from core.utils import normalize_whitespace
 
 from ..models.form import Form
+from ..models.summary import SurveySummary
 from ..models.survey import Survey
-from ..utils.summarize_responses import summarize_responses
 from .dimension import SurveyDimensionType
 from .form import FormType
 from .limited_survey import LimitedSurveyType
@@ -80,7 +80,8 @@ class SurveyType(LimitedSurveyType):
         Returns the responses to this survey regardless of language version used.
         Authorization required.
         """
-        return DimensionFilterInput.filter(survey.responses.all(), filters)
+        responses = DimensionFilterInput.filter(survey.responses.all(), filters)
+        return LimitedResponseType.prefetch_related_for_selection(responses, info, survey)
 
     responses = graphene.List(
         graphene.NonNull(LimitedResponseType),
@@ -149,10 +150,8 @@ class SurveyType(LimitedSurveyType):
         that language is used as the base for the combined fields. Order of fields
         not present in the base language is not guaranteed. Authorization required.
         """
-        responses = DimensionFilterInput.filter(survey.responses.all(), filters)
         fields = survey.get_combined_fields(lang)
-        valuesies = [response.get_processed_form_data(fields)[0] for response in responses.only("form_data")]
-        summary = summarize_responses(fields, valuesies)
+        summary = SurveySummary.get_or_build(survey, filters).summarize(fields)
 
         return {slug: summary.model_dump(by_alias=True) for slug, summary in summary.items()}
 
@@ -9,6 +9,7 @@ from core.utils.model_utils import slugify
 from ..models.dimension import Dimension, DimensionValue, ResponseDimensionValue
 from ..models.form import Form
 from ..models.response import Response
+from ..models.summary import SurveySummary
 
 
 @receiver(pre_save, sender=ResponseDimensionValue)
@@ -24,13 +25,18 @@ def program_dimension_value_pre_save(sender, instance: ResponseDimensionValue, *
 def dimension_post_save(sender, instance: Dimension | DimensionValue, **kwargs):
     Response.refresh_cached_dimensions_qs(instance.survey.responses.all())
     Form.refresh_enriched_fields_qs(instance.survey.languages.all())
+    SurveySummary.invalidate(instance.survey)
 
 
 @receiver([post_save, post_delete], sender=ResponseDimensionValue)
 def response_dimension_value_post_save(sender, instance: ResponseDimensionValue, **kwargs):
     response = instance.response
+    old_cached_dimensions = response.cached_dimensions
     response.refresh_cached_dimensions()
 
+    if survey := response.survey:
+        SurveySummary.move_response(survey, response, old_cached_dimensions)
+
 
 @receiver(pre_save, sender=(Dimension, DimensionValue))
 def dimension_pre_save(sender, instance: Dimension | DimensionValue, **kwargs):
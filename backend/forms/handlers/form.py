@@ -4,6 +4,8 @@ from django.dispatch import receiver
 from core.utils.model_utils import slugify
 
 from ..models.form import Form
+from ..models.summary import SurveySummary
+from ..utils.field_cache import evict_form
 
 
 @receiver(pre_save, sender=Form)
@@ -27,8 +29,14 @@ def form_post_save(sender, instance: Form, *, created: bool, update_fields: list
         # see Form.enriched_fields
         return
 
+    # other processes will miss their caches due to updated_at changing
+    evict_form(instance.id)
+
     if update_fields is not None and "cached_enriched_fields" in update_fields:
         return
 
     instance.cached_enriched_fields = instance._build_enriched_fields()
-    instance.save(update_fields=["cached_enriched_fields"])
+    instance.save(update_fields=["cached_enriched_fields", "updated_at"])
+
+    # field definitions may have changed
+    SurveySummary.objects.filter(survey__languages=instance).delete()
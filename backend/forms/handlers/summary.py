@@ -0,0 +1,28 @@
+from django.db.models.signals import m2m_changed, post_delete
+from django.dispatch import receiver
+
+from ..models.response import Response
+from ..models.summary import SurveySummary
+from ..models.survey import Survey
+
+
+@receiver(post_delete, sender=Response)
+def response_post_delete(sender, instance: Response, **kwargs):
+    """
+    Responses are seldom deleted (only via admin), so just rebuild the summaries.
+    """
+    SurveySummary.objects.filter(survey__languages=instance.form_id).delete()
+
+
+@receiver(m2m_changed, sender=Survey.languages.through)
+def survey_languages_changed(sender, instance, action: str, reverse: bool, pk_set: set[int] | None, **kwargs):
+    """
+    Adding or removing a language version changes the combined fields of the survey.
+    """
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        SurveySummary.invalidate(instance)
+    elif pk_set:
+        SurveySummary.objects.filter(survey_id__in=pk_set).delete()
@@ -0,0 +1,133 @@
+import random
+from time import perf_counter
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+from tabulate import tabulate
+
+from ...models.field import Field, FieldType
+from ...models.response import Response
+from ...models.summary import SurveySummary
+from ...models.survey import ResponseDTO, Survey
+
+
+class NotReally(RuntimeError):
+    pass
+
+
+def make_form_data(fields: list[Field]) -> dict[str, Any]:
+    form_data: dict[str, Any] = {}
+
+    for field in fields:
+        match field.type:
+            case FieldType.SINGLE_SELECT if field.choices:
+                form_data[field.slug] = random.choice(field.choices).slug
+            case FieldType.MULTI_SELECT if field.choices:
+                for choice in random.sample(field.choices, k=random.randint(0, len(field.choices))):
+                    form_data[f"{field.slug}.{choice.slug}"] = "on"
+            case FieldType.RADIO_MATRIX if field.choices:
+                for question in field.questions or []:
+                    form_data[f"{field.slug}.{question.slug}"] = random.choice(field.choices).slug
+            case FieldType.SINGLE_CHECKBOX:
+                form_data[field.slug] = random.choice(["on", ""])
+            case FieldType.SINGLE_LINE_TEXT | FieldType.MULTI_LINE_TEXT:
+                form_data[field.slug] = "Lorem ipsum dolor sit amet"
+
+    return form_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure throughput of creating survey responses one by one (as CreateSurveyResponse used to) "
+        "versus in batches with Survey.create_responses. Synthetic responses are generated from the "
+        "fields of the survey. Everything is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--event-slug",
+            metavar="EVENT_SLUG",
+            required=True,
+        )
+        parser.add_argument(
+            "--survey-slug",
+            metavar="SURVEY_SLUG",
+            required=True,
+        )
+        parser.add_argument(
+            "--num-responses",
+            type=int,
+            default=1000,
+        )
+        parser.add_argument(
+            "--batch-size",
+            dest="batch_sizes",
+            type=int,
+            action="append",
+            default=[],
+            help="May be given multiple times (default: 1, 100 and 500)",
+        )
+
+    def handle(self, *args, **options):
+        survey = Survey.objects.get(event__slug=options["event_slug"], slug=options["survey_slug"])
+        num_responses = options["num_responses"]
+        batch_sizes = options["batch_sizes"] or [1, 100, 500]
+
+        fields = survey.get_combined_fields()
+        form_datas = [make_form_data(fields) for _ in range(num_responses)]
+
+        rows = []
+
+        elapsed = self.run(lambda: self.create_one_by_one(survey, form_datas))
+        rows.append(("one by one (legacy)", f"{elapsed:.2f}", f"{num_responses / elapsed:.0f}"))
+
+        for batch_size in batch_sizes:
+            elapsed = self.run(lambda batch_size=batch_size: self.create_in_batches(survey, form_datas, batch_size))
+            rows.append((f"batches of {batch_size}", f"{elapsed:.2f}", f"{num_responses / elapsed:.0f}"))
+
+        print(tabulate(rows, headers=["method", "seconds", "responses/s"]))
+
+    def run(self, func) -> float:
+        t0 = perf_counter()
+
+        try:
+            with transaction.atomic():
+                func()
+                elapsed = perf_counter() - t0
+                raise NotReally("rollback")
+        except NotReally:
+            pass
+
+        return elapsed
+
+    def create_one_by_one(self, survey: Survey, form_datas: list[dict[str, Any]]):
+        # make sure a summary exists so that its maintenance is included in the measurement
+        SurveySummary.get_or_build(survey)
+
+        for form_data in form_datas:
+            with transaction.atomic():
+                survey = Survey.objects.get(id=survey.id)
+                form = survey.get_form("")
+                if form is None:
+                    raise RuntimeError("Survey has no forms")
+
+                response = Response.objects.create(
+                    form=form,
+                    form_data=form_data,
+                    sequence_number=(
+                        survey.responses.all().aggregate(models.Max("sequence_number"))["sequence_number__max"] or 0
+                    )
+                    + 1,
+                )
+                response.lift_dimension_values()
+                SurveySummary.add_responses(survey, [response])
+
+    def create_in_batches(self, survey: Survey, form_datas: list[dict[str, Any]], batch_size: int):
+        SurveySummary.get_or_build(survey)
+
+        for i in range(0, len(form_datas), batch_size):
+            survey.create_responses(
+                [ResponseDTO(form_data=form_data, language="") for form_data in form_datas[i : i + batch_size]],
+                notify_subscribers=False,
+            )
@@ -0,0 +1,77 @@
+import csv
+import json
+import logging
+from itertools import batched
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...models.survey import ResponseDTO, Survey
+
+logger = logging.getLogger("kompassi")
+
+
+class Command(BaseCommand):
+    help = (
+        "Import responses to a survey from a CSV or JSON file. "
+        "CSV: header row contains form data keys (as in Object.fromEntries(formData.entries())). "
+        "JSON: a list of form data objects."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("filename", type=Path)
+        parser.add_argument(
+            "--event-slug",
+            metavar="EVENT_SLUG",
+            required=True,
+        )
+        parser.add_argument(
+            "--survey-slug",
+            metavar="SURVEY_SLUG",
+            required=True,
+        )
+        parser.add_argument(
+            "--language",
+            default="",
+            help="Language version of the survey to use (default: fall back to the first available)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of responses created per transaction",
+        )
+        parser.add_argument(
+            "--notify-subscribers",
+            action="store_true",
+            default=False,
+        )
+
+    def handle(self, *args, **options):
+        survey = Survey.objects.get(event__slug=options["event_slug"], slug=options["survey_slug"])
+        filename: Path = options["filename"]
+
+        match filename.suffix.lower():
+            case ".csv":
+                with filename.open(encoding="utf-8", newline="") as input_file:
+                    form_datas = [
+                        {key: value for key, value in row.items() if value} for row in csv.DictReader(input_file)
+                    ]
+            case ".json":
+                with filename.open(encoding="utf-8") as input_file:
+                    form_datas = json.load(input_file)
+                if not isinstance(form_datas, list):
+                    raise CommandError("Expected a JSON list of form data objects")
+            case _:
+                raise CommandError(f"Unsupported file type: {filename.suffix}")
+
+        num_created = 0
+        for batch in batched(form_datas, options["batch_size"]):
+            responses = survey.create_responses(
+                [ResponseDTO(form_data=form_data, language=options["language"]) for form_data in batch],
+                notify_subscribers=options["notify_subscribers"],
+            )
+            num_created += len(responses)
+            logger.info("Imported %d/%d responses to %s", num_created, len(form_datas), survey)
+
+        self.stdout.write(f"Imported {num_created} responses to {survey}")
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ...models.summary import SurveySummary
+
+
+class Command(BaseCommand):
+    help = "Checks materialized survey summaries against responses and rebuilds inconsistent ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--event", help="Only process surveys of this event (slug)")
+        parser.add_argument("--survey", help="Only process surveys with this slug")
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            default=False,
+            help="Only report inconsistent summaries, do not rebuild them",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            default=False,
+            help="Rebuild all summaries, not only inconsistent ones",
+        )
+
+    def handle(self, *args, **options):
+        summaries = SurveySummary.objects.all().select_related("survey__event").order_by("survey", "filter_key")
+
+        if options["event"]:
+            summaries = summaries.filter(survey__event__slug=options["event"])
+
+        if options["survey"]:
+            summaries = summaries.filter(survey__slug=options["survey"])
+
+        num_inconsistent = 0
+        for summary in summaries:
+            fields = SurveySummary.get_counted_fields(summary.survey)
+
+            if not options["all"]:
+                if summary.is_consistent(fields):
+                    continue
+
+                num_inconsistent += 1
+                self.stdout.write(f"Inconsistent: {summary}")
+
+            if not options["check"]:
+                with transaction.atomic():
+                    # lock against concurrent incremental updates
+                    summary = SurveySummary.objects.select_for_update().get(id=summary.id)
+                    summary.rebuild(fields)
+
+        self.stdout.write(f"{num_inconsistent} inconsistent summaries found")
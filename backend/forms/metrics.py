@@ -0,0 +1,7 @@
+from metrics.registry import shared_counter
+
+responses_created = shared_counter(
+    "kompassi_forms_responses_total",
+    "Number of survey responses created",
+    ["event", "survey"],
+)
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.8 on 2026-10-18 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("forms", "0026_survey_subscribers"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SurveySummary",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "filter_key",
+                    models.TextField(
+                        blank=True,
+                        default="",
+                        help_text="Canonical JSON representation of dimension filters. Empty means no filters.",
+                    ),
+                ),
+                ("count_responses", models.PositiveIntegerField(default=0)),
+                (
+                    "counters",
+                    models.JSONField(
+                        default=dict, help_text="field slug -> counters, see forms/utils/summarize_responses.py"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "survey",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="summaries", to="forms.survey"
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("survey", "filter_key")},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.8 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+def initialize_sequence_counters(apps, schema_editor):
+    Response = apps.get_model("forms", "Response")
+    Survey = apps.get_model("forms", "Survey")
+
+    for survey in Survey.objects.all():
+        last = Response.objects.filter(form__in=survey.languages.all()).aggregate(models.Max("sequence_number"))
+        survey.last_response_sequence_number = last["sequence_number__max"] or 0
+        survey.save(update_fields=["last_response_sequence_number"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("forms", "0028_response_forms_response_cached_dims_gin"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="survey",
+            name="last_response_sequence_number",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(initialize_sequence_counters, reverse_code=migrations.RunPython.noop),
+    ]
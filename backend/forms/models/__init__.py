@@ -2,4 +2,5 @@ from .dimension import Dimension, DimensionValue, ResponseDimensionValue
 from .field import Field, FieldType
 from .form import Form
 from .response import Response
+from .summary import SurveySummary
 from .survey import Survey
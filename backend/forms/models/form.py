@@ -7,6 +7,7 @@ from typing import TYPE_CHECKING, Any, Self
 
 from django.conf import settings
 from django.db import models, transaction
+from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
 
 from core.models.event import Event
@@ -14,6 +15,7 @@ from core.utils import NONUNIQUE_SLUG_FIELD_PARAMS
 from core.utils.locale_utils import get_message_in_language
 from graphql_api.language import DEFAULT_LANGUAGE, LANGUAGE_CHOICES
 
+from ..utils.field_cache import validated_fields_cache
 from .field import Field
 
 if TYPE_CHECKING:
@@ -87,10 +89,13 @@ class Form(models.Model):
         Refresh cached_enriched_fields for all forms in the queryset.
         """
         forms_to_update = []
+        t = now()
         for form in qs.select_for_update(of=("self",)):
             form.cached_enriched_fields = form._build_enriched_fields()
+            # bulk_update does not honor auto_now; updated_at versions the field caches
+            form.updated_at = t
             forms_to_update.append(form)
-        cls.objects.bulk_update(forms_to_update, ["cached_enriched_fields"])
+        cls.objects.bulk_update(forms_to_update, ["cached_enriched_fields", "updated_at"])
 
     def refresh_enriched_fields(self):
         """
@@ -98,7 +103,8 @@ class Form(models.Model):
         NOTE: Use refresh_enriched_fields_qs for bulk updates.
         """
         self.cached_enriched_fields = self._build_enriched_fields()
-        self.save(update_fields=["cached_enriched_fields"])
+        # updated_at versions the field caches (see ../utils/field_cache.py)
+        self.save(update_fields=["cached_enriched_fields", "updated_at"])
 
     def _build_enriched_fields(self) -> list[dict[str, Any]]:
         return [self._enrich_field(field) for field in self.fields]
@@ -156,13 +162,26 @@ class Form(models.Model):
         return field
 
     @cached_property
-    def validated_fields(self):
+    def validated_fields(self) -> list[Field]:
+        """
+        Shared between Form instances of the same version, so treat as read-only.
+        """
+        if self.pk is None or self.updated_at is None:
+            return self._validate_fields()
+
+        return validated_fields_cache.get_or_compute((self.pk, self.updated_at), self._validate_fields)
+
+    def _validate_fields(self) -> list[Field]:
         return [Field.model_validate(field_dict) for field_dict in self.enriched_fields]
 
     @property
     def survey(self) -> Survey | None:
         from .survey import Survey
 
+        # set when the survey is already known, eg. when listing its responses (to avoid a query per response)
+        if (survey := getattr(self, "_known_survey", None)) is not None:
+            return survey
+
         # there can only be one
         try:
             return self.event.surveys.get(languages=self)
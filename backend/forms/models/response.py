@@ -6,6 +6,7 @@ from collections.abc import Sequence
 from typing import TYPE_CHECKING, Any
 
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
 from django.core.mail import send_mass_mail
 from django.db import models, transaction
 from django.db.models import JSONField
@@ -59,6 +60,16 @@ class Response(models.Model):
     # related fields
     dimensions: models.QuerySet[ResponseDimensionValue]
 
+    class Meta:
+        indexes = [
+            # see core/utils/dimension_utils.py
+            GinIndex(
+                fields=["cached_dimensions"],
+                opclasses=["jsonb_path_ops"],
+                name="forms_response_cached_dims_gin",
+            ),
+        ]
+
     @property
     def survey(self) -> Survey | None:
         return self.form.survey
@@ -114,6 +125,27 @@ class Response(models.Model):
             raise ValueError("Cannot lift dimension values for a response that is not related to a survey")
 
         dimensions_by_slug, values_by_dimension_by_slug = survey.preload_dimensions()
+        bulk_create = self._build_lifted_dimension_values(dimensions_by_slug, values_by_dimension_by_slug)
+
+        # NOTE: if we allow dimensions having initial values to be presented as fields on the form,
+        # need to add ignore_conflicts=True here or rethink this somehow
+        ResponseDimensionValue.objects.bulk_create(bulk_create)
+
+        # mass delete and bulk create don't trigger signals (which is good)
+        self.save(update_fields=["cached_dimensions"])
+
+    def _build_lifted_dimension_values(
+        self,
+        dimensions_by_slug: dict[str, Dimension],
+        values_by_dimension_by_slug: dict[str, dict[str, DimensionValue]],
+    ) -> list[ResponseDimensionValue]:
+        """
+        Implementation of lift_dimension_values that does not touch the database, so that it
+        can also be used for responses that have not yet been saved (see Survey.create_responses).
+        Sets cached_dimensions and returns the dimension values to be created.
+        """
+        from .dimension import ResponseDimensionValue
+
         bulk_create: list[ResponseDimensionValue] = []
 
         # only these fields have the potential of being dimension fields
@@ -191,13 +223,8 @@ class Response(models.Model):
 
                 set_dimension_value(dimension, value)
 
-        # NOTE: if we allow dimensions having initial values to be presented as fields on the form,
-        # need to add ignore_conflicts=True here or rethink this somehow
-        ResponseDimensionValue.objects.bulk_create(bulk_create)
-
-        # mass delete and bulk create don't trigger signals (which is good)
         self.cached_dimensions = cached_dimensions
-        self.save(update_fields=["cached_dimensions"])
+        return bulk_create
 
     @transaction.atomic
     def set_dimension_values(self, values_to_set: dict[str, list[str]]):
@@ -205,6 +232,7 @@ class Response(models.Model):
         Changes only those dimension values that are present in dimension_values.
         """
         from .dimension import ResponseDimensionValue
+        from .summary import SurveySummary
 
         survey = self.survey
         if survey is None:
@@ -237,9 +265,11 @@ class Response(models.Model):
         ResponseDimensionValue.objects.bulk_create(bulk_create)
 
         # mass delete and bulk create don't trigger signals (which is good)
-        self.cached_dimensions = dict(self.cached_dimensions, **values_to_set)
+        self.cached_dimensions = dict(cached_dimensions, **values_to_set)
         self.save(update_fields=["cached_dimensions"])
 
+        SurveySummary.move_response(survey, self, cached_dimensions)
+
     def get_processed_form_data(
         self,
         fields: Sequence[Field] | None = None,
@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import json
+import logging
+from collections.abc import Collection, Iterable, Sequence
+from functools import cached_property
+from typing import Any, Protocol, Self
+
+from django.db import IntegrityError, models, transaction
+from django.db.models.fields.json import KeyTransform
+from django.utils.timezone import now
+
+from core.utils.dimension_utils import filter_by_dimensions
+
+from ..utils.process_form_data import process_form_data
+from ..utils.summarize_responses import (
+    Counters,
+    Summary,
+    add_counters,
+    build_summary,
+    count_response,
+    is_counted_field,
+    is_lazy_field,
+)
+from .field import Field
+from .response import Response
+from .survey import Survey
+
+logger = logging.getLogger("kompassi")
+
+# (dimension slug, value slugs)
+ParsedFilters = list[tuple[str, list[str]]]
+
+
+class HasDimensionAndValues(Protocol):
+    dimension: str
+    values: list[str]
+
+
+class SurveySummary(models.Model):
+    """
+    Materialized counters for the summary of responses to a survey, optionally restricted
+    by dimension filters. One row exists per (survey, filter combination) that has been asked for.
+
+    Rows are built lazily on first request and then kept up to date incrementally when
+    responses are created or their dimensions change. Changes to field definitions or
+    dimensions invalidate (delete) the rows of the survey and they are rebuilt on next request.
+
+    Only counted fields (select, checkbox, matrix) are stored in counters. Text and file upload
+    fields are summarized lazily with a query that only fetches the values of those fields.
+
+    See `rebuild_survey_summaries` management command for consistency checks.
+    """
+
+    survey = models.ForeignKey(Survey, on_delete=models.CASCADE, related_name="summaries")
+    filter_key = models.TextField(
+        blank=True,
+        default="",
+        help_text="Canonical JSON representation of dimension filters. Empty means no filters.",
+    )
+    count_responses = models.PositiveIntegerField(default=0)
+    counters = models.JSONField(
+        default=dict,
+        help_text="field slug -> counters, see forms/utils/summarize_responses.py",
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = [("survey", "filter_key")]
+
+    def __str__(self):
+        return f"{self.survey}{' ' if self.filter_key else ''}{self.filter_key}"
+
+    @staticmethod
+    def get_filter_key(filters: Iterable[HasDimensionAndValues] | None) -> str:
+        if not filters:
+            return ""
+
+        parsed_filters = sorted([filter.dimension, sorted(filter.values or [])] for filter in filters)
+        return json.dumps(parsed_filters, separators=(",", ":"))
+
+    @cached_property
+    def parsed_filters(self) -> ParsedFilters:
+        if not self.filter_key:
+            return []
+
+        return [(filter[0], filter[1]) for filter in json.loads(self.filter_key)]
+
+    def matches(self, cached_dimensions: dict[str, list[str]]) -> bool:
+        """
+        Whether a response with these cached dimensions is included in this summary.
+        Keep in sync with the semantics of core/utils/dimension_utils.py.
+        """
+        for dimension_slug, value_slugs in self.parsed_filters:
+            response_value_slugs = cached_dimensions.get(dimension_slug, [])
+            if not any(value_slug in response_value_slugs for value_slug in value_slugs):
+                return False
+
+        return True
+
+    @property
+    def responses(self) -> models.QuerySet[Response]:
+        return filter_by_dimensions(self.survey.responses.all(), self.parsed_filters)
+
+    @staticmethod
+    def get_counted_fields(survey: Survey) -> list[Field]:
+        """
+        Counters are language independent: they only depend on field slugs and types.
+        """
+        return [field for field in survey.get_combined_fields() if is_counted_field(field)]
+
+    def _build_counters(self, fields: Sequence[Field] | None = None) -> tuple[int, Counters]:
+        if fields is None:
+            fields = self.get_counted_fields(self.survey)
+
+        count_responses = 0
+        counters: Counters = {}
+
+        for form_data in self.responses.values_list("form_data", flat=True).iterator(chunk_size=2000):
+            values, _warnings = process_form_data(fields, form_data)
+            add_counters(counters, count_response(fields, values))
+            count_responses += 1
+
+        return count_responses, counters
+
+    def rebuild(self, fields: Sequence[Field] | None = None):
+        self.count_responses, self.counters = self._build_counters(fields)
+        self.save()
+
+    def is_consistent(self, fields: Sequence[Field] | None = None) -> bool:
+        return self._build_counters(fields) == (self.count_responses, self.counters)
+
+    @classmethod
+    def get_or_build(cls, survey: Survey, filters: Iterable[HasDimensionAndValues] | None = None) -> Self:
+        filter_key = cls.get_filter_key(filters)
+
+        try:
+            return cls.objects.get(survey=survey, filter_key=filter_key)
+        except cls.DoesNotExist:
+            pass
+
+        summary = cls(survey=survey, filter_key=filter_key)
+
+        try:
+            with transaction.atomic():
+                cls._lock_survey(survey)
+
+                # someone else may have built it while we waited for the lock
+                if existing := cls.objects.filter(survey=survey, filter_key=filter_key).first():
+                    return existing
+
+                summary.rebuild()
+        except IntegrityError:
+            # someone else built it at the same time
+            return cls.objects.get(survey=survey, filter_key=filter_key)
+
+        return summary
+
+    def summarize(self, fields: Sequence[Field]) -> Summary:
+        """
+        Builds the summary using the (language specific) fields given.
+        Counted fields are served from counters, lazy fields are fetched from responses.
+        """
+        lazy_fields = [field for field in fields if is_lazy_field(field)]
+        return build_summary(fields, self.counters, self.count_responses, self._get_lazy_valuesies(lazy_fields))
+
+    def _get_lazy_valuesies(self, lazy_fields: Sequence[Field]) -> Iterable[dict[str, Any]]:
+        if not lazy_fields:
+            return
+
+        # only fetch the values of the lazy fields, not the whole form data
+        rows = self.responses.values_list(*(KeyTransform(field.slug, "form_data") for field in lazy_fields))
+
+        for row in rows.iterator(chunk_size=2000):
+            form_data = {field.slug: value for field, value in zip(lazy_fields, row, strict=True) if value is not None}
+            values, _warnings = process_form_data(lazy_fields, form_data)
+            yield values
+
+    @classmethod
+    @transaction.atomic
+    def add_responses(cls, survey: Survey, responses: Collection[Response]):
+        """
+        Called when responses are created, after their dimension values have been set.
+        """
+        cls._update(survey, [(None, response.cached_dimensions, response) for response in responses])
+
+    @classmethod
+    @transaction.atomic
+    def move_response(cls, survey: Survey, response: Response, old_cached_dimensions: dict[str, list[str]]):
+        """
+        Called when the dimension values of a response change. The response may enter or
+        leave summaries with dimension filters.
+        """
+        cls._update(survey, [(old_cached_dimensions, response.cached_dimensions, response)])
+
+    @classmethod
+    def _update(
+        cls,
+        survey: Survey,
+        changes: Sequence[tuple[dict[str, list[str]] | None, dict[str, list[str]] | None, Response]],
+    ):
+        cls._lock_survey(survey)
+        summaries = list(cls.objects.filter(survey=survey).select_for_update())
+        if not summaries:
+            return
+
+        fields = cls.get_counted_fields(survey)
+        contributions: dict[Any, Counters] = {}
+        bulk_update = []
+
+        for summary in summaries:
+            changed = False
+
+            for old_cached_dimensions, new_cached_dimensions, response in changes:
+                was_included = old_cached_dimensions is not None and summary.matches(old_cached_dimensions)
+                is_included = new_cached_dimensions is not None and summary.matches(new_cached_dimensions)
+
+                if was_included == is_included:
+                    continue
+
+                if (contribution := contributions.get(response.pk)) is None:
+                    values, _warnings = process_form_data(fields, response.form_data)
+                    contribution = contributions[response.pk] = count_response(fields, values)
+
+                sign = 1 if is_included else -1
+                summary.count_responses += sign
+                add_counters(summary.counters, contribution, sign)
+                changed = True
+
+            if changed:
+                summary.updated_at = now()
+                bulk_update.append(summary)
+
+        cls.objects.bulk_update(bulk_update, ["count_responses", "counters", "updated_at"])
+
+    @staticmethod
+    def _lock_survey(survey: Survey):
+        """
+        Serializes building summaries of the survey with updating them. Otherwise a response created
+        while a summary is being built could be missed by both: not yet visible to the build, and
+        its update not finding the summary that is not yet committed. Must be called in a transaction.
+        Creating responses already holds this lock (see Survey.reserve_sequence_numbers).
+        """
+        list(Survey.objects.filter(id=survey.id).select_for_update().values_list("id", flat=True))
+
+    @classmethod
+    def invalidate(cls, survey: Survey):
+        """
+        Called when field definitions or dimensions of the survey change.
+        Summaries will be rebuilt on next request.
+        """
+        cls.objects.filter(survey=survey).delete()
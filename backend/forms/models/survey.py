@@ -1,15 +1,16 @@
 from __future__ import annotations
 
 import logging
-from collections.abc import Collection, Mapping
+from collections.abc import Collection, Mapping, Sequence
 from dataclasses import asdict, dataclass, field
 from datetime import datetime
-from typing import TYPE_CHECKING
+from functools import cached_property
+from typing import TYPE_CHECKING, Any
 
 import yaml
 from django.conf import settings
 from django.contrib.postgres.fields import ArrayField
-from django.db import models
+from django.db import models, transaction
 from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
 from pkg_resources import resource_stream
@@ -18,11 +19,17 @@ from core.models import Event
 from core.utils import NONUNIQUE_SLUG_FIELD_PARAMS, is_within_period, log_get_or_create
 from graphql_api.language import DEFAULT_LANGUAGE, SUPPORTED_LANGUAGES
 
+from ..metrics import responses_created
+from ..utils.field_cache import combined_fields_cache
 from ..utils.merge_form_fields import merge_fields
+from .field import Field
 from .form import Form
 
 if TYPE_CHECKING:
+    from django.contrib.auth.models import AbstractBaseUser
+
     from .dimension import Dimension, DimensionValue
+    from .response import Response
 
 logger = logging.getLogger("kompassi")
 ANONYMITY_CHOICES = [
@@ -112,6 +119,9 @@ class Survey(models.Model):
         blank=True,
     )
 
+    # counter for Response.sequence_number, see reserve_sequence_numbers
+    last_response_sequence_number = models.PositiveIntegerField(default=0, editable=False)
+
     # related fields
     dimensions: models.QuerySet[Dimension]
 
@@ -125,26 +135,33 @@ class Survey(models.Model):
     admin_is_active.short_description = _("active")
     admin_is_active.boolean = True
 
+    @cached_property
+    def key_dimension_slugs(self) -> frozenset[str]:
+        return frozenset(self.dimensions.filter(is_key_dimension=True).values_list("slug", flat=True))
+
     @property
     def combined_fields(self):
         return self.get_combined_fields()
 
-    def get_combined_fields(self, base_language: str = DEFAULT_LANGUAGE):
+    def get_combined_fields(self, base_language: str = DEFAULT_LANGUAGE) -> list[Field]:
         """
         See ../graphql.py:SurveyType.resolve_combined_fields
         for documentation.
+
+        Cached per survey version (see ../utils/field_cache.py). Treat the fields as read-only.
         """
-        # TODO as an optimization, store boolean field in survey model that indicates
-        # whether the fields are the same across languages. If so, return the fields
-        # from the base language directly.
-
-        # if a specific language is requested, put it first
-        languages = sorted(
-            self.languages.all().only("language", "fields"),
-            key=lambda form: form.language != base_language,
-        )
+        versions = tuple(sorted(self.languages.values_list("id", "updated_at")))
 
-        return merge_fields(languages)
+        def compute() -> list[Field]:
+            # if a specific language is requested, put it first
+            languages = sorted(
+                self.languages.all().only("language", "fields", "cached_enriched_fields", "updated_at"),
+                key=lambda form: form.language != base_language,
+            )
+
+            return merge_fields(languages)
+
+        return list(combined_fields_cache.get_or_compute((self.id, base_language, versions), compute))
 
     def get_form(self, requested_language: str) -> Form | None:
         try:
@@ -176,7 +193,112 @@ class Survey(models.Model):
         return not self.languages.exists()
 
     def get_next_sequence_number(self):
-        return (self.responses.all().aggregate(models.Max("sequence_number"))["sequence_number__max"] or 0) + 1
+        return self.reserve_sequence_numbers(1)[0]
+
+    @transaction.atomic
+    def reserve_sequence_numbers(self, count: int) -> range:
+        """
+        Atomically reserves `count` consecutive sequence numbers for new responses.
+        The survey row is locked by the update until the end of the enclosing transaction,
+        so concurrent responses to the same survey are numbered without gaps or duplicates.
+        """
+        Survey.objects.filter(id=self.id).update(
+            last_response_sequence_number=models.F("last_response_sequence_number") + count,
+        )
+        last = Survey.objects.filter(id=self.id).values_list("last_response_sequence_number", flat=True).get()
+        self.last_response_sequence_number = last
+        return range(last - count + 1, last + 1)
+
+    @transaction.atomic
+    def create_responses(
+        self,
+        dtos: Sequence[ResponseDTO],
+        notify_subscribers: bool = True,
+    ) -> list[Response]:
+        """
+        Creates many responses to this survey in one transaction. Forms and dimensions are
+        loaded once for the whole batch and dimension values are created in bulk.
+        Used by both CreateSurveyResponse (batch of one) and bulk imports.
+
+        NOTE: bulk_create does not send signals. Nothing currently listens to Response post_save.
+        """
+        from .dimension import ResponseDimensionValue
+        from .response import Response
+        from .summary import SurveySummary
+
+        if not dtos:
+            return []
+
+        forms_by_language = {form.language: form for form in self.languages.all()}
+        dimensions_by_slug, values_by_dimension_by_slug = self.preload_dimensions()
+
+        if self.max_responses_per_user and self.anonymity != "hard":
+            # NOTE: only takes effect for logged in users
+            user_ids = {dto.created_by.pk for dto in dtos if dto.created_by}
+            counts_by_user_id = dict(
+                self.responses.filter(created_by__in=user_ids)
+                .order_by()
+                .values("created_by")
+                .annotate(count=models.Count("id"))
+                .values_list("created_by", "count")
+            )
+            for dto in dtos:
+                if dto.created_by:
+                    count = counts_by_user_id.get(dto.created_by.pk, 0) + 1
+                    if count > self.max_responses_per_user:
+                        raise Exception("Maximum number of responses reached")
+                    counts_by_user_id[dto.created_by.pk] = count
+
+        hard_anonymous = self.anonymity == "hard"
+        responses: list[Response] = []
+        response_dimension_values: list[ResponseDimensionValue] = []
+
+        for dto, sequence_number in zip(dtos, self.reserve_sequence_numbers(len(dtos)), strict=True):
+            form = self._pick_form(forms_by_language, dto.language)
+            if not form:
+                raise Exception("Form not found")
+
+            if not form.fields:
+                raise Exception("Form has no fields")
+
+            response = Response(
+                form=form,
+                form_data=dto.form_data,
+                created_by=None if hard_anonymous else dto.created_by,
+                ip_address="" if hard_anonymous else dto.ip_address,
+                sequence_number=sequence_number,
+            )
+            response_dimension_values.extend(
+                response._build_lifted_dimension_values(dimensions_by_slug, values_by_dimension_by_slug)
+            )
+            responses.append(response)
+
+        Response.objects.bulk_create(responses)
+        ResponseDimensionValue.objects.bulk_create(response_dimension_values)
+        SurveySummary.add_responses(self, responses)
+
+        if notify_subscribers:
+            for response in responses:
+                transaction.on_commit(response.notify_subscribers)
+
+        event_slug = self.event.slug
+        transaction.on_commit(lambda: responses_created.inc(len(responses), event=event_slug, survey=self.slug))
+
+        return responses
+
+    @staticmethod
+    def _pick_form(forms_by_language: Mapping[str, Form], requested_language: str) -> Form | None:
+        """
+        Same fallback logic as get_form, but for preloaded forms.
+        """
+        if form := forms_by_language.get(requested_language):
+            return form
+
+        for language in SUPPORTED_LANGUAGES:
+            if form := forms_by_language.get(language.code):
+                return form
+
+        return None
 
     def preload_dimensions(self, dimension_values: Mapping[str, Collection[str]] | None = None):
         dimensions = self.dimensions.all().prefetch_related("values")
@@ -267,3 +389,15 @@ class SurveyDTO:
             survey.languages.add(form)
 
         return survey
+
+
+@dataclass
+class ResponseDTO:
+    """
+    Input for Survey.create_responses.
+    """
+
+    form_data: dict[str, Any]
+    language: str = DEFAULT_LANGUAGE
+    created_by: AbstractBaseUser | None = None
+    ip_address: str = ""
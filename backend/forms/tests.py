@@ -1,3 +1,4 @@
+import json
 from types import SimpleNamespace
 from unittest import mock
 
@@ -5,15 +6,18 @@ import pytest
 import yaml
 
 from core.models import Event
+from core.utils.dimension_utils import filter_by_dimensions, filter_by_dimensions_join
 from graphql_api.schema import schema
 
-from .excel_export import get_header_cells, get_response_cells
+from .excel_export import get_header_cells, get_response_cells, iter_ndjson, iter_response_rows
 from .graphql.mutations.put_survey_dimension import PutSurveyDimension
 from .graphql.mutations.update_response_dimensions import UpdateResponseDimensions
 from .models.dimension import Dimension, DimensionValue
 from .models.field import Choice, Field, FieldType
+from .models.form import Form
 from .models.response import Response
-from .models.survey import Survey
+from .models.summary import SurveySummary
+from .models.survey import ResponseDTO, Survey
 from .utils.merge_form_fields import _merge_choices, _merge_fields
 from .utils.process_form_data import FieldWarning, process_form_data
 from .utils.s3_presign import BUCKET_NAME, S3_ENDPOINT_URL
@@ -697,6 +701,246 @@ def test_lift_and_set_dimensions(_patched_graphql_check_instance):
     }
 
 
+@pytest.mark.django_db
+@mock.patch("forms.graphql.mutations.update_response_dimensions.graphql_check_instance", autospec=True)
+def test_incremental_survey_summary(_patched_graphql_check_instance):
+    event, _created = Event.get_or_create_dummy()
+
+    survey = Survey.objects.create(
+        event=event,
+        slug="test-survey",
+    )
+
+    dimension = Dimension.objects.create(
+        survey=survey,
+        slug="status",
+        title=dict(en="Status"),
+    )
+    DimensionValue.objects.bulk_create(
+        [
+            DimensionValue(dimension=dimension, slug="new", title=dict(en="New"), is_initial=True),
+            DimensionValue(dimension=dimension, slug="accepted", title=dict(en="Accepted")),
+        ]
+    )
+
+    form = survey.languages.create(
+        event=event,
+        slug="test-survey-en",
+        language="en",
+        fields=[
+            dict(
+                slug="color",
+                type="SingleSelect",
+                choices=[dict(slug="red", title="Red"), dict(slug="blue", title="Blue")],
+            ),
+            dict(
+                slug="comments",
+                type="MultiLineText",
+            ),
+        ],
+    )
+
+    def create_response(form_data):
+        response = Response.objects.create(form=form, form_data=form_data)
+        response.lift_dimension_values()
+        SurveySummary.add_responses(survey, [response])
+        return response
+
+    accepted_filter = [SimpleNamespace(dimension="status", values=["accepted"])]
+
+    create_response({"color": "red", "comments": "Hello"})
+    summary = SurveySummary.get_or_build(survey)
+    accepted_summary = SurveySummary.get_or_build(survey, accepted_filter)
+
+    blue_response = create_response({"color": "blue"})
+
+    summary.refresh_from_db()
+    assert summary.count_responses == 2
+    assert summary.summarize(survey.get_combined_fields()) == {
+        "color": SelectFieldSummary(
+            countResponses=2,
+            countMissingResponses=0,
+            summary={"red": 1, "blue": 1},
+        ),
+        "comments": TextFieldSummary(
+            countResponses=1,
+            countMissingResponses=1,
+            summary=["Hello"],
+        ),
+    }
+
+    accepted_summary.refresh_from_db()
+    assert accepted_summary.count_responses == 0
+
+    UpdateResponseDimensions.mutate(
+        None,
+        MOCK_INFO,
+        SimpleNamespace(
+            event_slug=event.slug,
+            survey_slug=survey.slug,
+            response_id=blue_response.id,
+            form_data={"status": "accepted"},
+        ),  # type: ignore
+    )
+
+    accepted_summary.refresh_from_db()
+    assert accepted_summary.count_responses == 1
+    assert accepted_summary.counters == {"color": {"count": 1, "values": {"blue": 1}}}
+    assert accepted_summary.is_consistent()
+
+    # changing field definitions invalidates summaries
+    form.fields = [dict(slug="color", type="SingleSelect", choices=[])]
+    form.save()
+    assert not SurveySummary.objects.filter(survey=survey).exists()
+
+    assert SurveySummary.get_or_build(survey).count_responses == 2
+
+
+@pytest.mark.django_db
+def test_create_responses():
+    event, _created = Event.get_or_create_dummy()
+    survey = Survey.objects.create(event=event, slug="test-survey")
+
+    dimension = Dimension.objects.create(survey=survey, slug="color", title=dict(en="Color"))
+    DimensionValue.objects.bulk_create(
+        [DimensionValue(dimension=dimension, slug=slug, title=dict(en=slug)) for slug in ["red", "blue"]]
+    )
+
+    form = survey.languages.create(
+        event=event,
+        slug="test-survey-en",
+        language="en",
+        fields=[dict(slug="color", type="SingleSelect", choicesFrom=dict(dimension="color"))],
+    )
+
+    responses = survey.create_responses(
+        [
+            ResponseDTO(form_data={"color": "red"}, language="en"),
+            # falls back to the only available language
+            ResponseDTO(form_data={"color": "blue"}, language="fi"),
+            ResponseDTO(form_data={}, language="en"),
+        ],
+        notify_subscribers=False,
+    )
+
+    assert [response.sequence_number for response in responses] == [1, 2, 3]
+    assert all(response.form == form for response in responses)
+    assert [response.cached_dimensions for response in survey.responses.order_by("sequence_number")] == [
+        {"color": ["red"]},
+        {"color": ["blue"]},
+        {},
+    ]
+    assert set(survey.responses.values_list("dimensions__value__slug", flat=True)) == {"red", "blue", None}
+
+    (response,) = survey.create_responses([ResponseDTO(form_data={})], notify_subscribers=False)
+    assert response.sequence_number == 4
+
+
+@pytest.mark.django_db
+def test_export_rows():
+    event, _created = Event.get_or_create_dummy()
+    survey = Survey.objects.create(event=event, slug="test-survey")
+    survey.languages.create(
+        event=event,
+        slug="test-survey-en",
+        language="en",
+        fields=[
+            dict(slug="name", type="SingleLineText"),
+            dict(slug="tags", type="MultiSelect", choices=[dict(slug="a", title="A"), dict(slug="b", title="B")]),
+        ],
+    )
+    survey.create_responses(
+        [
+            ResponseDTO(form_data={"name": "Alice", "tags.a": "on"}, language="en"),
+            ResponseDTO(form_data={"name": "Bob"}, language="en"),
+        ],
+        notify_subscribers=False,
+    )
+
+    responses = survey.responses.order_by("created_at", "sequence_number")
+    header_row, *rows = iter_response_rows([], survey.combined_fields, responses)
+
+    assert header_row == ["created_at", "language", "name", "tags.a", "tags.b"]
+    assert [row[1:] for row in rows] == [
+        ["en", "Alice", True, False],
+        ["en", "Bob", False, False],
+    ]
+
+    lines = [json.loads(line) for line in iter_ndjson(survey.combined_fields, responses)]
+    assert [line["values"] for line in lines] == [{"name": "Alice", "tags": ["a"]}, {"name": "Bob", "tags": []}]
+
+
+@pytest.mark.django_db
+def test_field_caches():
+    event, _created = Event.get_or_create_dummy()
+    survey = Survey.objects.create(event=event, slug="test-survey")
+    form = survey.languages.create(
+        event=event,
+        slug="test-survey-en",
+        language="en",
+        fields=[dict(slug="color", type="SingleSelect", choices=[dict(slug="red", title="Red")])],
+    )
+    survey.languages.create(
+        event=event,
+        slug="test-survey-fi",
+        language="fi",
+        fields=[dict(slug="color", type="SingleSelect", choices=[dict(slug="red", title="Punainen")])],
+    )
+
+    Form.refresh_enriched_fields_qs(survey.languages.all())
+
+    # same version of the form -> same (shared) validated fields
+    form = Form.objects.get(id=form.id)
+    assert form.validated_fields is Form.objects.get(id=form.id).validated_fields
+
+    combined_fields = survey.get_combined_fields("en")
+    assert combined_fields == survey.get_combined_fields("en")
+    assert combined_fields[0].choices[0].title == "Red"  # type: ignore
+    assert survey.get_combined_fields("fi")[0].choices[0].title == "Punainen"  # type: ignore
+
+    form.fields = [dict(slug="color", type="SingleSelect", choices=[dict(slug="blue", title="Blue")])]
+    form.save()
+
+    form = Form.objects.get(id=form.id)
+    assert [choice.slug for choice in form.validated_fields[0].choices] == ["blue"]  # type: ignore
+    assert survey.get_combined_fields("en")[0].choices[0].slug == "blue"  # type: ignore
+
+
+@pytest.mark.django_db
+def test_filter_by_dimensions():
+    """
+    Filtering via cached_dimensions must agree with joining through dimension values.
+    """
+    event, _created = Event.get_or_create_dummy()
+    survey = Survey.objects.create(event=event, slug="test-survey")
+    form = survey.languages.create(event=event, slug="test-survey-en", language="en", fields=[])
+
+    for dimension_slug in ["color", "size"]:
+        dimension = Dimension.objects.create(survey=survey, slug=dimension_slug, title=dict(en=dimension_slug))
+        DimensionValue.objects.bulk_create(
+            [DimensionValue(dimension=dimension, slug=slug, title=dict(en=slug)) for slug in ["a", "b", "c"]]
+        )
+
+    for color, size in [(["a"], ["a"]), (["a", "b"], ["b"]), (["c"], ["a", "c"]), ([], ["b"])]:
+        response = Response.objects.create(form=form, form_data={})
+        response.set_dimension_values(dict(color=color, size=size))
+
+    examples = [
+        [],
+        [("color", ["a"])],
+        [("color", ["a", "b"])],
+        [("color", ["a", "b"]), ("size", ["b"])],
+        [("color", ["c"]), ("size", ["a", "b"])],
+        [("color", [])],
+    ]
+
+    responses = survey.responses.all()
+    for filters in examples:
+        expected = set(filter_by_dimensions_join(responses, filters).values_list("id", flat=True))
+        actual = set(filter_by_dimensions(responses, filters).values_list("id", flat=True))
+        assert actual == expected, filters
+
+
 @pytest.mark.django_db
 @mock.patch("forms.graphql.mutations.put_survey_dimension.graphql_check_instance", autospec=True)
 def test_put_survey_dimension(_patched_graphql_check_instance):
@@ -9,4 +9,16 @@ urlpatterns = [
         forms_survey_excel_export_view,
         name="forms_survey_excel_export_view",
     ),
+    path(
+        "events/<slug:event_slug>/surveys/<slug:survey_slug>/responses.csv",
+        forms_survey_excel_export_view,
+        {"format": "csv"},
+        name="forms_survey_csv_export_view",
+    ),
+    path(
+        "events/<slug:event_slug>/surveys/<slug:survey_slug>/responses.ndjson",
+        forms_survey_excel_export_view,
+        {"format": "ndjson"},
+        name="forms_survey_ndjson_export_view",
+    ),
 ]
@@ -0,0 +1,30 @@
+"""
+Process-local caches for validated and combined (merged) form fields.
+
+Validating field schemas with pydantic and merging language versions is relatively
+expensive and happens on hot GraphQL paths (fields, summary, responses) as well as
+in exports. Entries are keyed by the (id, updated_at) versions of the forms involved,
+so a changed form simply misses the cache in every process and no cross-process
+invalidation is needed. `Form.updated_at` is bumped whenever enriched fields change
+(see Form.refresh_enriched_fields), and forms/handlers/form.py evicts stale entries
+of the changed form from the local process.
+
+NOTE: Cached fields are shared. Treat them as read-only (use model_copy to change them).
+"""
+
+from collections.abc import Hashable
+
+from core.utils.versioned_cache import VersionedCache
+
+from ..models.field import Field
+
+# (form id, form updated_at) -> validated fields
+validated_fields_cache: VersionedCache[Hashable, list[Field]] = VersionedCache(max_entries=1000)
+
+# (survey id, base language, ((form id, form updated_at), ...)) -> combined fields
+combined_fields_cache: VersionedCache[Hashable, list[Field]] = VersionedCache(max_entries=500)
+
+
+def evict_form(form_id: int):
+    validated_fields_cache.evict(lambda key: key[0] == form_id)  # type: ignore
+    combined_fields_cache.evict(lambda key: any(version[0] == form_id for version in key[2]))  # type: ignore
@@ -40,11 +40,16 @@ def _merge_fields(fields: Sequence[Field], other_fields: Sequence[Field]) -> lis
     result = {field.slug: field for field in fields}
     result.update((field.slug, field) for field in other_fields if field.slug not in result)
 
+    # NOTE: fields may be shared with field caches (see field_cache.py), so do not mutate them
     for field in fields:
         if field.choices:
-            result[field.slug].choices = _merge_choices(field.choices, result[field.slug].choices or [])
+            result[field.slug] = result[field.slug].model_copy(
+                update=dict(choices=_merge_choices(field.choices, result[field.slug].choices or [])),
+            )
         if field.questions:
-            result[field.slug].questions = _merge_choices(field.questions, result[field.slug].questions or [])
+            result[field.slug] = result[field.slug].model_copy(
+                update=dict(questions=_merge_choices(field.questions, result[field.slug].questions or [])),
+            )
 
     return list(result.values())
 
@@ -3,7 +3,7 @@ Builds a summary of responses to a survey.
 See ../tests.py:test_summarize_responses for examples.
 """
 
-from collections import Counter
+from collections.abc import Iterable, Sequence
 from enum import Enum
 from typing import Any, Literal
 
@@ -62,177 +62,251 @@ FieldSummary = TextFieldSummary | SingleCheckboxSummary | SelectFieldSummary | M
 Summary = dict[str, FieldSummary]
 
 
-def summarize_responses(fields: list[Field], valuesies: list[dict[str, Any]]) -> Summary:
-    summary: Summary = {}
+# Fields whose summaries can be maintained as additive counters (see SurveySummary).
+# Other fields (text and file uploads) need the actual values and are summarized lazily.
+COUNTED_FIELD_TYPES = (
+    FieldType.SINGLE_CHECKBOX,
+    FieldType.SINGLE_SELECT,
+    FieldType.MULTI_SELECT,
+    FieldType.RADIO_MATRIX,
+)
+LAZY_FIELD_TYPES = (
+    FieldType.SINGLE_LINE_TEXT,
+    FieldType.MULTI_LINE_TEXT,
+    FieldType.DATE_FIELD,
+    FieldType.TIME_FIELD,
+    FieldType.DATE_TIME_FIELD,
+    FieldType.FILE_UPLOAD,
+)
+
+# slug -> {"count": int, "values": {...}}
+# values is choice -> count for select fields and question -> choice -> count for matrix fields
+Counters = dict[str, dict[str, Any]]
+
+
+def is_counted_field(field: Field) -> bool:
+    if field.type == FieldType.SINGLE_LINE_TEXT:
+        return field.html_type == "number"
+
+    return field.type in COUNTED_FIELD_TYPES
+
 
-    total_responses = len(valuesies)
+def is_lazy_field(field: Field) -> bool:
+    return field.type in LAZY_FIELD_TYPES and not is_counted_field(field)
+
+
+def count_response(fields: Sequence[Field], values: dict[str, Any]) -> Counters:
+    """
+    Returns the contribution of a single response to the counters of a summary.
+    Only counted fields are considered, others are ignored.
+    """
+    counters: Counters = {}
 
     for field in fields:
+        if not is_counted_field(field):
+            continue
+
         match field.type:
-            case FieldType.STATIC_TEXT | FieldType.SPACER | FieldType.DIVIDER:
-                pass
+            case FieldType.SINGLE_LINE_TEXT:
+                value = values.get(field.slug)
+                if value is not None:
+                    # javascript object keys are always strings
+                    counters[field.slug] = {"count": 1, "values": {str(value): 1}}
 
-            # TODO: handle htmlType="number" for high cardinality fields
-            case FieldType.SINGLE_LINE_TEXT if field.html_type == "number":
-                field_summary = Counter()
+            case FieldType.SINGLE_CHECKBOX:
+                if values.get(field.slug):
+                    counters[field.slug] = {"count": 1}
 
-                for value in valuesies:
-                    value = value.get(field.slug)
-                    if value is None:
-                        continue
+            case FieldType.SINGLE_SELECT:
+                if value := values.get(field.slug):
+                    counters[field.slug] = {"count": 1, "values": {str(value): 1}}
 
-                    # javascript object keys are always strings
-                    value = str(value)
+            case FieldType.MULTI_SELECT:
+                if value_slugs := values.get(field.slug, []):
+                    counters[field.slug] = {"count": 1, "values": {value: 1 for value in value_slugs}}
 
-                    field_summary[value] += 1
+            case FieldType.RADIO_MATRIX:
+                answers: dict[str, Any] = values.get(field.slug, {})
+                question_values = {question: {value: 1} for question, value in answers.items() if value is not None}
+                count = 1 if any(answer for answer in answers.values()) else 0
 
-                count_responses = sum(field_summary.values())
-                count_missing_responses = total_responses - count_responses
+                if count or question_values:
+                    counters[field.slug] = {"count": count, "values": question_values}
 
-                summary[field.slug] = SelectFieldSummary(
-                    countResponses=count_responses,
-                    countMissingResponses=count_missing_responses,
-                    summary=dict(field_summary),
-                )
+    return counters
 
-            # TODO(#436) Time zone handling
-            case (
-                FieldType.SINGLE_LINE_TEXT
-                | FieldType.MULTI_LINE_TEXT
-                | FieldType.DATE_FIELD
-                | FieldType.TIME_FIELD
-                | FieldType.DATE_TIME_FIELD
-            ):
-                field_summary = []
-
-                for values in valuesies:
-                    value = values.get(field.slug)
-                    if value is None:
-                        continue
 
-                    value = str(value).strip()
-                    if not value:
-                        continue
+def _add_values(target: dict[str, Any], source: dict[str, Any], sign: int):
+    for key, value in source.items():
+        if isinstance(value, dict):
+            nested = target.setdefault(key, {})
+            _add_values(nested, value, sign)
+            if not nested:
+                del target[key]
+        else:
+            target[key] = target.get(key, 0) + sign * value
+            if not target[key]:
+                del target[key]
 
-                    field_summary.append(value)
 
-                count_responses = len(field_summary)
-                count_missing_responses = total_responses - count_responses
+def add_counters(counters: Counters, other: Counters, sign: int = 1):
+    """
+    Adds (or with sign=-1, subtracts) other to counters in place.
+    Entries that drop to zero are removed so that counters stay comparable.
+    """
+    for slug, other_field_counters in other.items():
+        field_counters = counters.setdefault(slug, {"count": 0})
+        field_counters["count"] += sign * other_field_counters["count"]
 
-                summary[field.slug] = TextFieldSummary(
-                    countResponses=count_responses,
-                    countMissingResponses=count_missing_responses,
-                    summary=field_summary,
-                )
+        if "values" in other_field_counters:
+            _add_values(field_counters.setdefault("values", {}), other_field_counters["values"], sign)
 
-            case FieldType.FILE_UPLOAD:
-                field_summary = []
-                count_responses = 0
+        if not field_counters["count"] and not field_counters.get("values"):
+            del counters[slug]
 
-                for values in valuesies:
-                    value = values.get(field.slug, [])
 
-                    if not value:
-                        continue
+def build_summary(
+    fields: Sequence[Field],
+    counters: Counters,
+    total_responses: int,
+    lazy_valuesies: Iterable[dict[str, Any]] = (),
+) -> Summary:
+    """
+    Builds a summary out of counters for counted fields and out of actual values for lazy fields.
+    lazy_valuesies need only contain the values of lazy fields, but must contain one item per response.
+    """
+    summary: Summary = {}
+    lazy_fields = [field for field in fields if is_lazy_field(field)]
+    lazy_summaries = summarize_lazy_fields(lazy_fields, lazy_valuesies, total_responses) if lazy_fields else {}
 
-                    count_responses += 1
+    for field in fields:
+        if field.slug in lazy_summaries:
+            summary[field.slug] = lazy_summaries[field.slug]
+            continue
 
-                    field_summary.extend(value)
+        if not is_counted_field(field):
+            continue
 
-                count_missing_responses = total_responses - count_responses
+        field_counters = counters.get(field.slug, {})
+        count_responses = field_counters.get("count", 0)
+        count_missing_responses = total_responses - count_responses
+        counted_values: dict[str, Any] = field_counters.get("values", {})
 
-                summary[field.slug] = FileUploadSummary(
+        match field.type:
+            # TODO: handle htmlType="number" for high cardinality fields
+            case FieldType.SINGLE_LINE_TEXT:
+                summary[field.slug] = SelectFieldSummary(
                     countResponses=count_responses,
                     countMissingResponses=count_missing_responses,
-                    summary=field_summary,
+                    summary=dict(counted_values),
                 )
 
             case FieldType.SINGLE_CHECKBOX:
-                count_responses = sum(1 for values in valuesies if values.get(field.slug))
-                count_missing_responses = total_responses - count_responses
-
                 summary[field.slug] = SingleCheckboxSummary(
                     countResponses=count_responses,
                     countMissingResponses=count_missing_responses,
                 )
 
-            case FieldType.SINGLE_SELECT:
+            case FieldType.SINGLE_SELECT | FieldType.MULTI_SELECT:
                 field_summary = {choice.slug: 0 for choice in field.choices or []}
 
-                for values in valuesies:
-                    value = values.get(field.slug)
-                    if value:
-                        if field.type == FieldType.SINGLE_CHECKBOX:
-                            value = "true"
-                        else:
-                            value = str(value)
-
-                        # account for the possibility of a choice being removed
-                        field_summary.setdefault(value, 0)
-                        field_summary[value] += 1
-
-                count_responses = sum(field_summary.values())
-                count_missing_responses = total_responses - count_responses
+                # account for the possibility of a choice being removed
+                for value, count in counted_values.items():
+                    field_summary[value] = field_summary.get(value, 0) + count
 
                 summary[field.slug] = SelectFieldSummary(
-                    summary=dict(field_summary),
                     countResponses=count_responses,
                     countMissingResponses=count_missing_responses,
+                    summary=field_summary,
                 )
 
-            case FieldType.MULTI_SELECT:
-                field_summary = {choice.slug: 0 for choice in field.choices or []}
-                count_responses = 0
-
-                for values in valuesies:
-                    values = values.get(field.slug, [])
-
-                    if not values:
-                        continue
+            case FieldType.RADIO_MATRIX:
+                matrix_summary = {}
+                choices = field.choices or []
 
-                    count_responses += 1
+                # note: removed questions will not be included in the summary
+                for question in field.questions or []:
+                    question_summary = {choice.slug: 0 for choice in choices}
 
-                    for value in values:
-                        # account for the possibility of a choice being removed
-                        field_summary.setdefault(value, 0)
-                        field_summary[value] += 1
+                    # account for the possibility of a choice being removed
+                    for value, count in counted_values.get(question.slug, {}).items():
+                        question_summary[value] = question_summary.get(value, 0) + count
 
-                count_missing_responses = total_responses - count_responses
+                    matrix_summary[question.slug] = question_summary
 
-                summary[field.slug] = SelectFieldSummary(
+                # these are more meaningful on a per-question basis but provided for completeness
+                summary[field.slug] = MatrixFieldSummary(
                     countResponses=count_responses,
                     countMissingResponses=count_missing_responses,
-                    summary=dict(field_summary),
+                    summary=matrix_summary,
                 )
 
-            case FieldType.RADIO_MATRIX:
-                field_summary = {}
-                questions = field.questions or []
-                choices = field.choices or []
+    return summary
 
-                for question in questions:
-                    # note: removed questions will not be included in the summary
-                    question_summary = {choice.slug: 0 for choice in choices}
 
-                    for values in valuesies:
-                        value = values.get(field.slug, {}).get(question.slug)
-                        if value is not None:
-                            # account for the possibility of a choice being removed
-                            question_summary.setdefault(value, 0)
-                            question_summary[value] += 1
+def summarize_lazy_fields(
+    fields: Sequence[Field],
+    valuesies: Iterable[dict[str, Any]],
+    total_responses: int,
+) -> Summary:
+    text_summaries: dict[str, list[str]] = {field.slug: [] for field in fields}
+    file_upload_counts: dict[str, int] = {field.slug: 0 for field in fields}
+
+    for values in valuesies:
+        for field in fields:
+            match field.type:
+                # TODO(#436) Time zone handling
+                case (
+                    FieldType.SINGLE_LINE_TEXT
+                    | FieldType.MULTI_LINE_TEXT
+                    | FieldType.DATE_FIELD
+                    | FieldType.TIME_FIELD
+                    | FieldType.DATE_TIME_FIELD
+                ):
+                    value = values.get(field.slug)
+                    if value is None:
+                        continue
+
+                    value = str(value).strip()
+                    if not value:
+                        continue
 
-                    field_summary[question.slug] = dict(question_summary)
+                    text_summaries[field.slug].append(value)
 
-                # these are more meaningful on a per-question basis but provided for completeness
-                count_responses = sum(
-                    1 for values in valuesies if any(answer for answer in values.get(field.slug, {}).values())
-                )
-                count_missing_responses = total_responses - count_responses
+                case FieldType.FILE_UPLOAD:
+                    value = values.get(field.slug, [])
+                    if not value:
+                        continue
 
-                summary[field.slug] = MatrixFieldSummary(
-                    countResponses=count_responses,
-                    countMissingResponses=count_missing_responses,
-                    summary=field_summary,
-                )
+                    file_upload_counts[field.slug] += 1
+                    text_summaries[field.slug].extend(value)
+
+    summary: Summary = {}
+    for field in fields:
+        field_summary = text_summaries[field.slug]
+
+        if field.type == FieldType.FILE_UPLOAD:
+            count_responses = file_upload_counts[field.slug]
+            summary[field.slug] = FileUploadSummary(
+                countResponses=count_responses,
+                countMissingResponses=total_responses - count_responses,
+                summary=field_summary,
+            )
+        else:
+            count_responses = len(field_summary)
+            summary[field.slug] = TextFieldSummary(
+                countResponses=count_responses,
+                countMissingResponses=total_responses - count_responses,
+                summary=field_summary,
+            )
 
     return summary
+
+
+def summarize_responses(fields: Sequence[Field], valuesies: Sequence[dict[str, Any]]) -> Summary:
+    counters: Counters = {}
+
+    for values in valuesies:
+        add_counters(counters, count_response(fields, values))
+
+    return build_summary(fields, counters, len(valuesies), valuesies)
@@ -1,40 +1,46 @@
-from django.http import HttpRequest, HttpResponse
+from typing import Literal
+
+from django.http import HttpRequest
 from django.shortcuts import get_object_or_404
 from django.utils.timezone import now
 
 from access.cbac import graphql_check_instance
 from core.models import Event
 
-from ..excel_export import write_responses_as_excel
+from ..excel_export import get_csv_response, get_excel_response, get_ndjson_response
 from ..models.survey import Survey
 
+ExportFormat = Literal["xlsx", "csv", "ndjson"]
+
 
 def forms_survey_excel_export_view(
     request: HttpRequest,
     event_slug: str | None,
     survey_slug: str,
+    format: ExportFormat = "xlsx",
 ):
     timestamp = now().strftime("%Y%m%d%H%M%S")
 
     if event_slug:
         event = get_object_or_404(Event, slug=event_slug)
         survey = get_object_or_404(Survey, event=event, slug=survey_slug)
-        filename = f"{event.slug}_{survey.slug}_responses_{timestamp}.xlsx"
+        filename = f"{event.slug}_{survey.slug}_responses_{timestamp}.{format}"
     else:
         survey = get_object_or_404(Survey, event__isnull=True, slug=survey_slug)
-        filename = f"{survey.slug}_responses_{timestamp}.xlsx"
+        filename = f"{survey.slug}_responses_{timestamp}.{format}"
 
     # TODO(#324): Failed check causes 500 now, turn it to 403 (middleware?)
     graphql_check_instance(survey, request, "responses", "query")
 
-    response = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-
-    write_responses_as_excel(
-        survey.dimensions.order_by("order"),
-        survey.combined_fields,
-        survey.responses.order_by("created_at").only("form_data"),
-        response,
-    )
-
-    return response
+    fields = survey.combined_fields
+    responses = survey.responses.order_by("created_at")
+
+    match format:
+        case "xlsx":
+            return get_excel_response(survey.dimensions.order_by("order"), fields, responses, filename)
+        case "csv":
+            return get_csv_response(survey.dimensions.order_by("order"), fields, responses, filename)
+        case "ndjson":
+            return get_ndjson_response(fields, responses, filename)
+        case _:
+            raise NotImplementedError(format)
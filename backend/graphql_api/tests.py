@@ -1,2 +1,185 @@
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.contrib.auth.models import AnonymousUser, Group
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+
+from core.models import Event, Person
+from forms.models.dimension import Dimension as SurveyDimension
+from forms.models.survey import ResponseDTO, Survey
+from program_v2.models import Dimension, DimensionValue, Program, ProgramDimensionValue, ProgramV2EventMeta
+from program_v2.models.schedule import ScheduleItem
+
+from .schema import schema
+
+
 def test_graphql_api_is_at_wellknown_url(client):
     assert client.get("/graphql").status_code != 404
+
+
+def execute_counting_queries(query: str, user=None, **variables) -> int:
+    request = RequestFactory().post("/graphql")
+    request.user = user or AnonymousUser()
+
+    with CaptureQueriesContext(connection) as queries:
+        result = schema.execute(query, variable_values=variables, context_value=request)
+
+    assert not result.errors, result.errors
+    return len(queries)
+
+
+# NOTE: Keep these in sync with the queries in frontend/src/app/[locale]/events/[eventSlug]
+PROGRAM_LIST_QUERY = """
+fragment ScheduleItem on ScheduleItemType {
+  location
+  subtitle
+  startTime
+  endTime
+  title
+}
+
+fragment ProgramList on ProgramType {
+  slug
+  title
+  cachedDimensions
+  color
+  scheduleItems {
+    ...ScheduleItem
+  }
+  dimensions(isListFilter: true) {
+    dimension { slug }
+    value { slug }
+  }
+  links(types: [CALENDAR, SIGNUP]) {
+    href
+  }
+}
+
+query ProgramListQuery($eventSlug: String!) {
+  event(slug: $eventSlug) {
+    program {
+      programs {
+        ...ProgramList
+      }
+    }
+  }
+}
+"""
+
+SURVEY_RESPONSES_QUERY = """
+fragment SurveyResponse on LimitedResponseType {
+  id
+  sequenceNumber
+  createdAt
+  createdBy {
+    displayName
+  }
+  language
+  values(keyFieldsOnly: true)
+  cachedDimensions(keyDimensionsOnly: true)
+}
+
+query FormResponses($eventSlug: String!, $surveySlug: String!) {
+  event(slug: $eventSlug) {
+    forms {
+      survey(slug: $surveySlug) {
+        countResponses
+        responses {
+          ...SurveyResponse
+        }
+      }
+    }
+  }
+}
+"""
+
+
+@pytest.mark.django_db
+def test_program_list_query_count():
+    """
+    The number of queries needed to list programs must not depend on the number of programs.
+    """
+    event, _created = Event.get_or_create_dummy()
+    ProgramV2EventMeta.objects.create(event=event, admin_group=Group.objects.create(name="test-program-admins"))
+
+    dimension = Dimension.objects.create(event=event, slug="room", is_list_filter=True)
+    value = DimensionValue.objects.create(dimension=dimension, slug="main-hall")
+
+    def create_programs(num_programs: int):
+        for i in range(num_programs):
+            program = Program.objects.create(event=event, title="Test program", slug=f"test-program-{i}")
+            ScheduleItem.objects.create(
+                program=program,
+                start_time=now(),
+                length=timedelta(hours=1),
+                cached_end_time=now() + timedelta(hours=1),
+            )
+            ProgramDimensionValue.objects.create(program=program, dimension=dimension, value=value)
+
+    # program snapshots are invalidated on commit, which does not happen in tests
+    cache.clear()
+    create_programs(2)
+    num_queries = execute_counting_queries(PROGRAM_LIST_QUERY, eventSlug=event.slug)
+
+    # once the snapshot has been built, the program listing does not need the database
+    assert execute_counting_queries(PROGRAM_LIST_QUERY, eventSlug=event.slug) < num_queries
+
+    cache.clear()
+    Program.objects.all().delete()
+    create_programs(6)
+    assert execute_counting_queries(PROGRAM_LIST_QUERY, eventSlug=event.slug) == num_queries
+
+
+@pytest.mark.django_db
+@mock.patch("access.cbac.graphql_check_instance", autospec=True)
+def test_survey_responses_query_count(_patched_graphql_check_instance):
+    """
+    The number of queries needed to list survey responses must not depend on the number of responses.
+    """
+    event, _created = Event.get_or_create_dummy()
+    person, _created = Person.get_or_create_dummy()
+
+    survey = Survey.objects.create(event=event, slug="test-survey", active_from=now(), key_fields=["color"])
+    survey.languages.create(
+        event=event,
+        slug="test-survey-en",
+        language="en",
+        fields=[dict(slug="color", type="SingleSelect", choicesFrom=dict(dimension="color"))],
+    )
+    dimension = SurveyDimension.objects.create(
+        survey=survey, slug="color", title=dict(en="Color"), is_key_dimension=True
+    )
+    dimension.values.create(slug="red", title=dict(en="Red"))
+
+    def create_responses(num_responses: int):
+        survey.create_responses(
+            [
+                ResponseDTO(form_data={"color": "red"}, language="en", created_by=person.user)
+                for _ in range(num_responses)
+            ],
+            notify_subscribers=False,
+        )
+
+    create_responses(2)
+    num_queries = execute_counting_queries(
+        SURVEY_RESPONSES_QUERY,
+        user=person.user,
+        eventSlug=event.slug,
+        surveySlug=survey.slug,
+    )
+
+    create_responses(4)
+    assert (
+        execute_counting_queries(
+            SURVEY_RESPONSES_QUERY,
+            user=person.user,
+            eventSlug=event.slug,
+            surveySlug=survey.slug,
+        )
+        == num_queries
+    )
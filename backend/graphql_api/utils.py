@@ -1,3 +1,6 @@
+from graphene import ResolveInfo
+from graphql import FieldNode, FragmentSpreadNode, InlineFragmentNode, SelectionSetNode
+
 from core.utils.locale_utils import get_message_in_language
 
 from .language import DEFAULT_LANGUAGE
@@ -17,3 +20,29 @@ def resolve_localized_field(field_name: str):
         return get_message_in_language(messages, lang) or ""
 
     return _resolve
+
+
+def get_selected_field_names(info: ResolveInfo) -> set[str]:
+    """
+    Returns the names (in camelCase) of the fields selected on the objects returned by the field
+    being resolved, following fragments. List resolvers use this to prefetch only the related
+    objects that will actually be needed, avoiding a query per object (N+1).
+    """
+    field_names: set[str] = set()
+
+    def visit(selection_set: SelectionSetNode | None):
+        if selection_set is None:
+            return
+
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                field_names.add(selection.name.value)
+            elif isinstance(selection, FragmentSpreadNode):
+                visit(info.fragments[selection.name.value].selection_set)
+            elif isinstance(selection, InlineFragmentNode):
+                visit(selection.selection_set)
+
+    for field_node in info.field_nodes:
+        visit(field_node.selection_set)
+
+    return field_names
@@ -56,6 +56,20 @@ CACHES = {
     "default": env.cache(default="locmemcache://"),
 }
 
+# Share users' CBAC entries between requests via the cache for this many seconds (0 = disabled).
+# Only enable if the cache is shared between processes (see access/cbac_cache.py).
+CBAC_SHARED_CACHE_SECONDS = env.int("CBAC_SHARED_CACHE_SECONDS", default=0)
+
+# Prometheus must send this as "Authorization: Bearer <token>" to scrape /metrics (see metrics/views.py).
+# If not set, metrics are only served when DEBUG is on.
+METRICS_BEARER_TOKEN = env("METRICS_BEARER_TOKEN", default="")
+
+# Number of worker processes used to render split output (zip) PDFs of emprinten in the background.
+EMPRINTEN_RENDER_PROCESSES = env.int("EMPRINTEN_RENDER_PROCESSES", default=4)
+
+# Rendered emprinten results are kept for download (and reused for identical uploads) for this many days.
+EMPRINTEN_RESULT_TTL_DAYS = env.int("EMPRINTEN_RESULT_TTL_DAYS", default=7)
+
 ALLOWED_HOSTS = env("ALLOWED_HOSTS", default="localhost").split()
 
 TIME_ZONE = "Europe/Helsinki"
@@ -101,6 +115,7 @@ STATICFILES_FINDERS = (
 SECRET_KEY = env.str("SECRET_KEY", default=("" if not DEBUG else "xxx"))
 
 MIDDLEWARE = (
+    "metrics.middleware.MetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "csp.middleware.CSPMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
@@ -113,6 +128,7 @@ MIDDLEWARE = (
     "django.contrib.messages.middleware.MessageMiddleware",
     "core.middleware.PageWizardMiddleware",
     "core.middleware.EventOrganizationMiddleware",
+    "event_log_v2.middleware.EventLogMiddleware",
     "django.middleware.locale.LocaleMiddleware",
 )
 
@@ -424,6 +440,22 @@ CELERY_RESULT_SERIALIZER = "json"
 
 CELERY_REDIS_SOCKET_KEEPALIVE = True
 
+# requires celery beat to be running
+CELERY_BEAT_SCHEDULE = {
+    "tickets-release-expired-reservations": {
+        "task": "tickets.tasks.release_expired_reservations",
+        "schedule": 60.0,
+    },
+    "tickets-refresh-recent-arrivals": {
+        "task": "tickets.tasks.refresh_recent_arrivals",
+        "schedule": 60.0,
+    },
+    "emprinten-cleanup-render-results": {
+        "task": "emprinten.tasks.cleanup_render_results",
+        "schedule": 3600.0,
+    },
+}
+
 
 if "api" in INSTALLED_APPS:
     KOMPASSI_APPLICATION_USER_GROUP = f"{KOMPASSI_INSTALLATION_SLUG}-apps"
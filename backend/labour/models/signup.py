@@ -529,17 +529,10 @@ class Signup(CsvExportMixin, SignupMixin, models.Model):
 
     @classmethod
     def _mass_state_change(cls, old_state, new_state, signups, filter_func=None):
-        if filter_func is None:
-            signups = signups.filter(**Signup.get_state_query_params(old_state))
-        else:
-            signups = filter_func(signups)
-
-        for signup in signups:
-            signup.state = new_state
-            signup.save()
-            signup.apply_state()
+        from ..state_transitions import mass_state_change
 
-        return signups
+        signup_ids = mass_state_change(signups, old_state, new_state, filter_func)
+        return cls.objects.filter(id__in=signup_ids)
 
     def apply_state(self):
         self.apply_state_sync()
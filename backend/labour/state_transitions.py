@@ -0,0 +1,217 @@
+"""
+Mass state transitions of signups (mass reject, request confirmation, send shifts).
+
+These used to save and apply the state of signups one by one, checking the membership of every
+state, job category and personnel class group with a query of its own and queueing a task per
+signup. Here the state is changed with one UPDATE, and applying the new state is done in chunks
+by the signups_apply_state task:
+
+- the per-signup synchronous parts of Signup.apply_state (accepted job categories, personnel
+  classes, signup extra, badges) are run as before,
+- group memberships of all users of the chunk are computed with a few queries and applied with
+  bulk inserts to and deletes from the user-group table, and
+- labour messages are sent with one send per message instead of one per person and message.
+
+Note that bulk group membership changes do not emit m2m_changed.
+"""
+
+import logging
+from collections import defaultdict
+from collections.abc import Callable, Collection, Sequence
+from itertools import batched
+
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
+from django.utils.timezone import now
+
+from core.models import Event
+
+from .models import JobCategory, LabourEventMeta, PersonnelClass, Signup
+from .models.constants import SIGNUP_STATE_GROUPS, STATE_FLAGS_BY_NAME, STATE_TIME_FIELDS
+
+logger = logging.getLogger("kompassi")
+
+CHUNK_SIZE = 100
+
+SignupFilter = Callable[[models.QuerySet[Signup]], models.QuerySet[Signup]]
+
+
+def get_state_update(new_state: str) -> dict[str, object]:
+    """
+    Returns the field values that put signups in the given state, like setting Signup.state does.
+    Times of flags that stay set are kept.
+    """
+    t = now()
+    is_active, *time_flags = STATE_FLAGS_BY_NAME[new_state]
+
+    # the first state time field (created_at) stands for is_active
+    update: dict[str, object] = dict(is_active=is_active, updated_at=t)
+    for field_name, flag in zip(STATE_TIME_FIELDS[1:], time_flags, strict=True):
+        update[field_name] = (
+            Coalesce(models.F(field_name), models.Value(t, output_field=models.DateTimeField())) if flag else None
+        )
+
+    return update
+
+
+def mass_state_change(
+    signups: models.QuerySet[Signup],
+    old_state: str,
+    new_state: str,
+    filter_func: SignupFilter | None = None,
+) -> list[int]:
+    """
+    Moves the signups that are in old_state (and pass filter_func if given) to new_state and applies the new state.
+    Returns the ids of the signups changed.
+    """
+    if filter_func is not None:
+        signups = filter_func(signups)
+
+    old_state_params = Signup.get_state_query_params(old_state)
+
+    with transaction.atomic():
+        signup_ids = list(
+            Signup.objects.filter(
+                id__in=signups.order_by().values("id"),
+                **old_state_params,
+            )
+            .select_for_update()
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        Signup.objects.filter(id__in=signup_ids).update(**get_state_update(new_state))
+
+    logger.info("Moved %d signups from %s to %s", len(signup_ids), old_state, new_state)
+
+    for chunk in batched(signup_ids, CHUNK_SIZE):
+        if "background_tasks" in settings.INSTALLED_APPS:
+            from .tasks import signups_apply_state
+
+            signups_apply_state.delay(list(chunk))  # type: ignore
+        else:
+            apply_state_for_signups(chunk)
+
+    return signup_ids
+
+
+def apply_state_for_signups(signup_ids: Collection[int]):
+    """
+    Like Signup.apply_state for many signups.
+    """
+    signups = list(
+        Signup.objects.filter(id__in=signup_ids)
+        .select_related("event__labour_event_meta", "person__user")
+        .order_by("id")
+    )
+
+    signups_by_event: dict[int, list[Signup]] = defaultdict(list)
+    for signup in signups:
+        signup.apply_state_sync()
+        signups_by_event[signup.event_id].append(signup)  # type: ignore
+
+    for event_signups in signups_by_event.values():
+        event = event_signups[0].event
+        apply_group_memberships(event, event_signups)
+
+        persons = [signup.person for signup in event_signups]
+        if "access" in settings.INSTALLED_APPS:
+            from access.models import GroupEmailAliasGrant
+
+            for person in persons:
+                GroupEmailAliasGrant.ensure_aliases(person)
+
+        from mailings.models import Message
+
+        Message.send_messages_many(event, "labour", persons)
+
+
+def apply_group_memberships(event: Event, signups: Sequence[Signup]):
+    """
+    Like Signup.apply_state_group_membership for many signups of the same event.
+    """
+    signups = [signup for signup in signups if signup.person.user_id is not None]
+    if not signups:
+        return
+
+    signup_ids = [signup.id for signup in signups]
+
+    # the groups managed by Signup.apply_state_group_membership
+    state_group_names = {suffix: LabourEventMeta.make_group_name(event, suffix) for suffix in SIGNUP_STATE_GROUPS}
+    job_category_group_names = {
+        job_category_id: LabourEventMeta.make_group_name(event, slug)
+        for job_category_id, slug in JobCategory.objects.filter(event=event).values_list("id", "slug")
+    }
+    personnel_class_group_names = {
+        personnel_class_id: LabourEventMeta.make_group_name(event, slug)
+        for personnel_class_id, slug in PersonnelClass.objects.filter(event=event, app_label="labour").values_list(
+            "id", "slug"
+        )
+    }
+
+    group_ids_by_name = dict(
+        Group.objects.filter(
+            name__in=[
+                *state_group_names.values(),
+                *job_category_group_names.values(),
+                *personnel_class_group_names.values(),
+            ]
+        ).values_list("name", "id")
+    )
+    managed_group_ids = set(group_ids_by_name.values())
+
+    job_category_ids_by_signup: dict[int, set[int]] = defaultdict(set)
+    for signup_id, job_category_id in Signup.job_categories_accepted.through.objects.filter(
+        signup_id__in=signup_ids
+    ).values_list("signup_id", "jobcategory_id"):
+        job_category_ids_by_signup[signup_id].add(job_category_id)
+
+    personnel_class_ids_by_signup: dict[int, set[int]] = defaultdict(set)
+    for signup_id, personnel_class_id in Signup.personnel_classes.through.objects.filter(
+        signup_id__in=signup_ids
+    ).values_list("signup_id", "personnelclass_id"):
+        personnel_class_ids_by_signup[signup_id].add(personnel_class_id)
+
+    expected: dict[int, set[int]] = {}
+    for signup in signups:
+        group_names = [
+            *(group_name for suffix, group_name in state_group_names.items() if getattr(signup, f"is_{suffix}")),
+            *(
+                job_category_group_names[jc_id]
+                for jc_id in job_category_ids_by_signup[signup.id]
+                if jc_id in job_category_group_names
+            ),
+            *(
+                personnel_class_group_names[pc_id]
+                for pc_id in personnel_class_ids_by_signup[signup.id]
+                if pc_id in personnel_class_group_names
+            ),
+        ]
+        expected[signup.person.user_id] = {  # type: ignore
+            group_ids_by_name[group_name] for group_name in group_names if group_name in group_ids_by_name
+        }
+
+    UserGroup = User.groups.through
+    current: dict[int, set[int]] = defaultdict(set)
+    for user_id, group_id in UserGroup.objects.filter(
+        user_id__in=expected,
+        group_id__in=managed_group_ids,
+    ).values_list("user_id", "group_id"):
+        current[user_id].add(group_id)
+
+    to_add = [
+        UserGroup(user_id=user_id, group_id=group_id)
+        for user_id, group_ids in expected.items()
+        for group_id in group_ids - current[user_id]
+    ]
+
+    user_ids_to_remove_by_group: dict[int, list[int]] = defaultdict(list)
+    for user_id, group_ids in current.items():
+        for group_id in group_ids - expected[user_id]:
+            user_ids_to_remove_by_group[group_id].append(user_id)
+
+    with transaction.atomic():
+        UserGroup.objects.bulk_create(to_add, ignore_conflicts=True)
+        for group_id, user_ids in user_ids_to_remove_by_group.items():
+            UserGroup.objects.filter(group_id=group_id, user_id__in=user_ids).delete()
@@ -9,6 +9,13 @@ def signup_apply_state(signup_pk):
     signup._apply_state()
 
 
+@shared_task(ignore_result=True)
+def signups_apply_state(signup_ids: list[int]):
+    from .state_transitions import apply_state_for_signups
+
+    apply_state_for_signups(signup_ids)
+
+
 @shared_task(ignore_result=True)
 def labour_event_meta_create_groups(meta_pk):
     from .models import LabourEventMeta
@@ -104,3 +104,25 @@ def test_labour_excel_export():
             m2m_mode="separate_columns",
             dialect="xlsx",
         )
+
+
+@pytest.mark.django_db
+def test_mass_reject():
+    signup, _ = Signup.get_or_create_dummy()
+    assert signup.state == "new"
+    meta = signup.event.labour_event_meta
+    user = signup.person.user
+
+    Signup.mass_reject(Signup.objects.filter(id=signup.id))
+
+    signup.refresh_from_db()
+    assert signup.state == "rejected"
+    assert signup.time_rejected is not None
+    assert meta.get_group("rejected").user_set.filter(id=user.id).exists()
+    assert not meta.get_group("new").user_set.filter(id=user.id).exists()
+
+    # already rejected signups are left alone
+    time_rejected = signup.time_rejected
+    assert not Signup.mass_reject(Signup.objects.filter(id=signup.id)).exists()
+    signup.refresh_from_db()
+    assert signup.time_rejected == time_rejected
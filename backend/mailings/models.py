@@ -1,4 +1,5 @@
 import logging
+from collections import defaultdict
 from datetime import datetime
 from hashlib import sha1
 
@@ -151,23 +152,9 @@ class Message(models.Model):
         message_send.delay(self.pk, [person.pk for person in recipients] if recipients is not None else None, resend)
 
     def _send(self, recipients, resend):
-        if recipients is None:
-            recipients = [user.person for user in self.recipient.group.user_set.all()]
-
-        for person in recipients:
-            try:
-                person_message, created = PersonMessage.objects.get_or_create(
-                    person=person,
-                    message=self,
-                )
-            except PersonMessage.MultipleObjectsReturned:
-                # This actually happens sometimes.
-                logger.warning("A Person doth multiple PersonMessages for a single Message have!")
-                person_message = PersonMessage.objects.filter(person=person, message=self).first()
-                created = False
-
-            if created or resend:
-                person_message.actually_send()
+        from .sending import send_message
+
+        send_message(self, recipients, resend)
 
     def expire(self):
         if self.expired_at is not None:
@@ -204,6 +191,38 @@ class Message(models.Model):
                 resend=False,
             )
 
+    @classmethod
+    def send_messages_many(cls, event, app_label, persons):
+        """
+        Like send_messages for many persons at once: each message is sent to those of the persons
+        who are in its recipient group.
+        """
+        from django.contrib.auth.models import User
+
+        persons_by_user_id = {person.user_id: person for person in persons if person.user_id is not None}
+        if not persons_by_user_id:
+            return
+
+        user_ids_by_group_id = defaultdict(set)
+        for user_id, group_id in User.groups.through.objects.filter(user_id__in=persons_by_user_id).values_list(
+            "user_id", "group_id"
+        ):
+            user_ids_by_group_id[group_id].add(user_id)
+
+        for message in Message.objects.filter(
+            recipient__app_label=app_label,
+            recipient__event=event,
+            recipient__group__in=list(user_ids_by_group_id),
+            sent_at__isnull=False,
+            expired_at__isnull=True,
+        ).select_related("recipient"):
+            message.send(
+                recipients=[
+                    persons_by_user_id[user_id] for user_id in sorted(user_ids_by_group_id[message.recipient.group_id])
+                ],
+                resend=False,
+            )
+
     @property
     def event(self):
         return self.recipient.event
@@ -240,6 +259,25 @@ class DedupMixin:
             logger.warning("Multiple %s returned for hash %s", cls.__name__, the_hash)
             return cls.objects.filter(digest=the_hash, text=text).first(), False
 
+    @classmethod
+    def get_or_create_many(cls, texts):
+        """
+        Like get_or_create for many texts at once. Returns text -> instance.
+        """
+        texts_by_digest = {sha1(text.encode("UTF-8")).hexdigest(): text for text in set(texts)}
+        if not texts_by_digest:
+            return {}
+
+        instances = {}
+        for instance in cls.objects.filter(digest__in=texts_by_digest).order_by("id"):
+            if instance.text == texts_by_digest[instance.digest]:
+                instances.setdefault(instance.text, instance)
+
+        missing = [cls(digest=digest, text=text) for digest, text in texts_by_digest.items() if text not in instances]
+        instances.update((instance.text, instance) for instance in cls.objects.bulk_create(missing))
+
+        return instances
+
 
 class PersonMessageSubject(models.Model, DedupMixin):
     digest = models.CharField(max_length=63, db_index=True)
@@ -291,11 +329,12 @@ class PersonMessage(models.Model):
     def render_message(self, template):
         return Template(template).render(Context(self.message_vars))
 
-    def actually_send(self):
+    def make_email_message(self, meta=None, connection=None):
         from django.core.mail import EmailMessage
 
         msgbcc = []
-        meta = self.message.app_event_meta
+        if meta is None:
+            meta = self.message.app_event_meta
 
         if meta.monitor_email:
             msgbcc.append(meta.monitor_email)
@@ -305,11 +344,15 @@ class PersonMessage(models.Model):
 
         reply_to_tup = (reply_to_str,) if (reply_to_str := self.message.reply_to) else None
 
-        EmailMessage(
+        return EmailMessage(
             subject=self.subject.text,
             body=self.body.text,
             from_email=meta.cloaked_contact_email,
             to=(self.person.name_and_email,),
             bcc=msgbcc,
             reply_to=reply_to_tup,
-        ).send(fail_silently=True)
+            connection=connection,
+        )
+
+    def actually_send(self):
+        self.make_email_message().send(fail_silently=True)
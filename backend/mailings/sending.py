@@ -0,0 +1,189 @@
+"""
+Sending a Message to many recipients.
+
+Sending used to render and save a PersonMessage recipient by recipient, parsing the templates,
+looking up the signup and deduplicating the subject and body with several queries per recipient,
+and then open a new SMTP connection per email.
+
+Here the templates are compiled once per message, the signups of the recipients are loaded once
+per chunk, and the PersonMessages with their deduplicated subjects and bodies are created with
+bulk_create. The emails are then sent in chunks by the person_messages_send task, each chunk over
+a single connection. If the connection fails, the task is retried with the emails of the chunk
+that were not sent yet.
+"""
+
+import logging
+import smtplib
+from collections.abc import Iterable, Sequence
+from itertools import batched
+from time import perf_counter
+from typing import Any
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from django.template import Context, Template
+
+from core.models import Person
+from metrics.registry import counter, histogram
+
+from .models import Message, PersonMessage, PersonMessageBody, PersonMessageSubject
+
+logger = logging.getLogger("kompassi")
+
+# recipients rendered and emails sent per chunk (and per send task)
+CHUNK_SIZE = 100
+
+# the server is closing the connection, so the rest of the chunk cannot be sent over it
+SMTP_SERVICE_NOT_AVAILABLE = 421
+
+emails_sent = counter(
+    "kompassi_mailings_emails_sent_total",
+    "Number of mailing emails handed to the mail server",
+)
+emails_failed = counter(
+    "kompassi_mailings_emails_failed_total",
+    "Number of mailing emails the mail server refused",
+)
+chunk_seconds = histogram(
+    "kompassi_mailings_send_chunk_seconds",
+    "Time taken to send a chunk of mailing emails",
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0),
+)
+
+
+class SendError(Exception):
+    """
+    Sending a chunk failed because of the connection. unsent_ids are the PersonMessages not sent yet.
+    """
+
+    def __init__(self, unsent_ids: list[int]):
+        super().__init__(f"{len(unsent_ids)} emails not sent")
+        self.unsent_ids = unsent_ids
+
+
+def get_signups(message: Message, persons: Sequence[Person]) -> dict[int, Any]:
+    from labour.models import Signup
+
+    signups = {}
+    for signup in Signup.objects.filter(event=message.event, person__in=persons).order_by("id"):
+        signups.setdefault(signup.person_id, signup)
+
+    return signups
+
+
+def prepare_person_messages(
+    message: Message,
+    persons: Sequence[Person],
+    templates: tuple[Template, Template],
+    resend: bool,
+) -> list[int]:
+    """
+    Creates the missing PersonMessages of the given recipients. Returns the ids of the PersonMessages to send:
+    the created ones and, if resend is set, the existing ones.
+    """
+    subject_template, body_template = templates
+
+    existing: dict[int, int] = {}
+    for person_message_id, person_id in (
+        PersonMessage.objects.filter(message=message, person__in=persons).order_by("id").values_list("id", "person_id")
+    ):
+        # A Person may have multiple PersonMessages for a single Message.
+        existing.setdefault(person_id, person_message_id)
+
+    new_persons = list({person.id: person for person in persons if person.id not in existing}.values())
+
+    rendered = []
+    if new_persons:
+        event = message.event
+        signups = get_signups(message, new_persons) if "labour" in settings.INSTALLED_APPS else None
+
+        for person in new_persons:
+            # see PersonMessage.message_vars
+            message_vars: dict[str, Any] = dict(event=event, person=person)
+            if signups is not None:
+                message_vars.update(signup=signups.get(person.id))
+
+            context = Context(message_vars)
+            rendered.append((person, subject_template.render(context), body_template.render(context)))
+
+    with transaction.atomic():
+        subjects = PersonMessageSubject.get_or_create_many(subject for _, subject, _ in rendered)
+        bodies = PersonMessageBody.get_or_create_many(body for _, _, body in rendered)
+        created = PersonMessage.objects.bulk_create(
+            [
+                PersonMessage(message=message, person=person, subject=subjects[subject], body=bodies[body])
+                for person, subject, body in rendered
+            ]
+        )
+
+    person_message_ids = [person_message.id for person_message in created]
+    if resend:
+        person_message_ids.extend(existing.values())
+
+    return person_message_ids
+
+
+def send_message(message: Message, recipients: Iterable[Person] | None, resend: bool):
+    """
+    Sends the message to the given recipients (default: everyone in the recipient group) who have not received it yet,
+    or if resend is set, to all of them.
+    """
+    from .tasks import person_messages_send
+
+    if recipients is None:
+        recipients = Person.objects.filter(user__groups=message.recipient.group).distinct()
+
+    templates = (Template(message.subject_template), Template(message.body_template))
+
+    person_message_ids = []
+    for persons in batched(recipients, CHUNK_SIZE):
+        person_message_ids.extend(prepare_person_messages(message, persons, templates, resend))
+
+    for chunk in batched(person_message_ids, CHUNK_SIZE):
+        person_messages_send.delay(list(chunk))  # type: ignore
+
+    logger.info("Message %s: sending %d emails", message.id, len(person_message_ids))
+
+
+def send_person_messages(person_message_ids: Sequence[int]):
+    """
+    Sends the given PersonMessages over a single connection. Emails refused by the mail server are logged
+    and skipped. Raises SendError if the connection fails (or the server closes it).
+    """
+    person_messages = list(
+        PersonMessage.objects.filter(id__in=person_message_ids)
+        .select_related("person", "subject", "body", "message__recipient__event")
+        .order_by("id")
+    )
+    metas = {}
+    num_done = 0
+
+    t0 = perf_counter()
+    try:
+        with get_connection() as connection:
+            for person_message in person_messages:
+                message = person_message.message
+                if message.id not in metas:
+                    metas[message.id] = message.app_event_meta
+
+                try:
+                    person_message.make_email_message(metas[message.id], connection=connection).send()
+                except smtplib.SMTPRecipientsRefused:
+                    logger.warning("PersonMessage %s: recipient refused", person_message.id)
+                    emails_failed.inc()
+                except smtplib.SMTPResponseException as e:
+                    if e.smtp_code == SMTP_SERVICE_NOT_AVAILABLE:
+                        raise
+
+                    # the server refused this message (eg. sender refused, data error) but the connection is usable
+                    logger.warning("PersonMessage %s: refused with %s %r", person_message.id, e.smtp_code, e.smtp_error)
+                    emails_failed.inc()
+                else:
+                    emails_sent.inc()
+
+                num_done += 1
+    except (smtplib.SMTPException, OSError) as e:
+        raise SendError([person_message.id for person_message in person_messages[num_done:]]) from e
+    finally:
+        chunk_seconds.observe(perf_counter() - t0)
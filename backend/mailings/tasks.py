@@ -1,5 +1,9 @@
 from celery import shared_task
 
+# retries of a chunk of emails whose connection to the mail server failed
+SEND_MAX_RETRIES = 3
+SEND_RETRY_DELAY_SECONDS = 60
+
 
 @shared_task(ignore_result=True)
 def message_send(message_id, recipient_ids=None, resend=False):
@@ -14,3 +18,18 @@ def message_send(message_id, recipient_ids=None, resend=False):
         recipients = Person.objects.filter(pk__in=recipient_ids)
 
     message._send(recipients, resend)
+
+
+@shared_task(bind=True, ignore_result=True, max_retries=SEND_MAX_RETRIES)
+def person_messages_send(self, person_message_ids: list[int]):
+    from .sending import SendError, send_person_messages
+
+    try:
+        send_person_messages(person_message_ids)
+    except SendError as e:
+        # only the emails not sent yet are retried
+        raise self.retry(
+            args=(e.unsent_ids,),
+            exc=e,
+            countdown=SEND_RETRY_DELAY_SECONDS * (self.request.retries + 1),
+        ) from e
@@ -0,0 +1,72 @@
+import smtplib
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import override_settings
+
+from core.models import Person
+from labour.models import LabourEventMeta
+
+from .models import Message, PersonMessage, PersonMessageBody, RecipientGroup
+from .sending import send_message, send_person_messages
+
+
+@pytest.mark.django_db
+def test_send_message():
+    meta, _ = LabourEventMeta.get_or_create_dummy()
+    event = meta.event
+    person, _ = Person.get_or_create_dummy()
+
+    recipient = RecipientGroup.objects.create(event=event, app_label="labour", group=meta.admin_group)
+    message = Message.objects.create(
+        recipient=recipient,
+        subject_template="Hello {{ person.first_name }}",
+        body_template="Welcome to {{ event.name }}",
+    )
+
+    send_message(message, [person], resend=False)
+    assert len(mail.outbox) == 1
+    assert mail.outbox[0].subject == f"Hello {person.first_name}"
+    assert mail.outbox[0].body == f"Welcome to {event.name}"
+
+    # already received
+    send_message(message, [person], resend=False)
+    assert len(mail.outbox) == 1
+
+    send_message(message, [person], resend=True)
+    assert len(mail.outbox) == 2
+    assert PersonMessage.objects.filter(message=message, person=person).count() == 1
+
+    assert set(PersonMessageBody.get_or_create_many([f"Welcome to {event.name}"])) == {f"Welcome to {event.name}"}
+    assert PersonMessageBody.objects.filter(text=f"Welcome to {event.name}").count() == 1
+
+
+class RefuseFirstEmailBackend(EmailBackend):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.refused = False
+
+    def send_messages(self, messages):
+        if not self.refused:
+            self.refused = True
+            raise smtplib.SMTPDataError(550, b"Message rejected")
+        return super().send_messages(messages)
+
+
+@pytest.mark.django_db
+def test_send_person_messages_skips_refused():
+    meta, _ = LabourEventMeta.get_or_create_dummy()
+    person, _ = Person.get_or_create_dummy()
+
+    recipient = RecipientGroup.objects.create(event=meta.event, app_label="labour", group=meta.admin_group)
+    message = Message.objects.create(recipient=recipient, subject_template="Hello", body_template="Hi")
+    send_message(message, [person], resend=False)
+    first = PersonMessage.objects.get(message=message, person=person)
+    second = PersonMessage.objects.create(message=message, person=person, subject=first.subject, body=first.body)
+    mail.outbox.clear()
+
+    with override_settings(EMAIL_BACKEND="mailings.tests.RefuseFirstEmailBackend"):
+        send_person_messages([first.id, second.id])
+
+    assert len(mail.outbox) == 1
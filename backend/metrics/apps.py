@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class MetricsAppConfig(AppConfig):
+    name = "metrics"
+    verbose_name = "Metrics"
+
+    def ready(self):
+        from . import background_tasks  # noqa: F401
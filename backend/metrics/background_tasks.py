@@ -0,0 +1,88 @@
+"""
+Metrics of background tasks. Task durations are recorded by the workers into shared metrics.
+Queue lengths are asked from the broker at scrape time and cached for QUEUE_LENGTHS_CACHE_SECONDS,
+failed lookups included, so that a slow or unavailable broker is not asked on every scrape.
+"""
+
+import logging
+from threading import Lock
+from time import perf_counter
+
+from celery.signals import task_postrun, task_prerun
+from django.conf import settings
+from django.core.cache import cache
+from kombu.exceptions import ChannelError
+
+from .registry import Gauge, collector, shared_histogram
+
+logger = logging.getLogger("kompassi")
+
+QUEUE_LENGTHS_CACHE_KEY = "metrics:celery_queue_lengths"
+QUEUE_LENGTHS_CACHE_SECONDS = 15
+
+task_seconds = shared_histogram(
+    "kompassi_celery_task_duration_seconds",
+    "Time taken to run background tasks by task and final state",
+    ["task", "state"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0),
+)
+
+# task id -> start time of tasks running in this process
+_started: dict[str, float] = {}
+_started_lock = Lock()
+
+
+@task_prerun.connect
+def task_prerun_handler(task_id=None, **kwargs):
+    with _started_lock:
+        _started[task_id] = perf_counter()  # type: ignore
+
+
+@task_postrun.connect
+def task_postrun_handler(task_id=None, task=None, state=None, **kwargs):
+    with _started_lock:
+        t0 = _started.pop(task_id, None)  # type: ignore
+
+    if t0 is not None and task is not None:
+        task_seconds.observe(perf_counter() - t0, task=task.name, state=state or "UNKNOWN")
+
+
+def get_queue_lengths() -> dict[str, int]:
+    from kompassi.celery_app import app
+
+    queue_lengths = {}
+    with app.connection_for_read() as connection:
+        channel = connection.default_channel
+        for queue_name in app.amqp.queues:
+            try:
+                queue_lengths[queue_name] = channel.queue_declare(queue=queue_name, passive=True).message_count
+            except ChannelError:
+                # Redis removes empty lists, so an empty queue does not exist as far as the broker is concerned
+                queue_lengths[queue_name] = 0
+
+    return queue_lengths
+
+
+@collector
+def collect_queue_lengths():
+    if "background_tasks" not in settings.INSTALLED_APPS or getattr(settings, "CELERY_TASK_ALWAYS_EAGER", False):
+        return []
+
+    queue_lengths = cache.get(QUEUE_LENGTHS_CACHE_KEY)
+    if queue_lengths is None:
+        try:
+            queue_lengths = get_queue_lengths()
+        except Exception:
+            logger.warning("Failed to get background task queue lengths from the broker", exc_info=True)
+            queue_lengths = {}
+        cache.set(QUEUE_LENGTHS_CACHE_KEY, queue_lengths, QUEUE_LENGTHS_CACHE_SECONDS)
+
+    queue_length = Gauge(
+        "kompassi_celery_queue_length",
+        "Number of background tasks waiting in the queue",
+        ["queue"],
+    )
+    for queue_name, length in queue_lengths.items():
+        queue_length.set(length, queue=queue_name)
+
+    return [queue_length]
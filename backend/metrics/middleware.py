@@ -0,0 +1,158 @@
+import json
+from time import perf_counter
+
+from django.db import connection
+from django.http.request import RawPostDataException
+
+from .registry import histogram
+
+KNOWN_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+GRAPHQL_VIEW_NAME = "graphql"
+
+# Operation names are chosen by clients, so only these get a label of their own to keep the number of series bounded.
+# These are the operations of the frontend (query, mutation and subscription names in frontend/src); add new ones here.
+KNOWN_GRAPHQL_OPERATIONS = frozenset(
+    [
+        "CreateSurvey",
+        "CreateSurveyLanguage",
+        "CreateSurveyResponse",
+        "DeleteSurveyDimension",
+        "DeleteSurveyDimensionValue",
+        "DeleteSurveyLanguage",
+        "DeleteSurveyMutation",
+        "DimensionsList",
+        "EditSurveyFieldsPageQuery",
+        "EditSurveyLanguagePageQuery",
+        "EditSurveyPageQuery",
+        "FormResponses",
+        "GetUser",
+        "InitFileUploadMutation",
+        "MarkProgramAsFavorite",
+        "NewProgramFormSelectionQuery",
+        "NewProgramQuery",
+        "OwnFormResponses",
+        "ProfileSurveyResponsePage",
+        "ProgramDetailQuery",
+        "ProgramListQuery",
+        "PutSurveyDimension",
+        "PutSurveyDimensionValue",
+        "SubscribeToSurveyResponses",
+        "SurveyPageQuery",
+        "SurveyResponseDetail",
+        "SurveySummary",
+        "SurveyThankYouPageQuery",
+        "Surveys",
+        "UnmarkProgramAsFavorite",
+        "UnsubscribeFromSurveyResponses",
+        "UpdateResponseDimensions",
+        "UpdateSurveyFieldsLanguageMutation",
+        "UpdateSurveyLanguageMutation",
+        "UpdateSurveyMutation",
+    ]
+)
+
+request_seconds = histogram(
+    "kompassi_http_request_duration_seconds",
+    "Time taken to handle requests by view",
+    ["view", "method", "status"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+request_db_queries = histogram(
+    "kompassi_http_request_db_queries",
+    "Number of database queries per request by view",
+    ["view"],
+    buckets=(0, 1, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+request_db_seconds = histogram(
+    "kompassi_http_request_db_seconds",
+    "Time spent in database queries per request by view",
+    ["view"],
+)
+graphql_seconds = histogram(
+    "kompassi_graphql_operation_duration_seconds",
+    "Time taken to handle GraphQL requests by operation name",
+    ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+
+class QueryStats:
+    """
+    Database execute wrapper that counts queries and the time spent in them.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        t0 = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += perf_counter() - t0
+
+
+def get_view_name(request) -> str:
+    # unresolved requests (404s) are lumped together to keep the number of label values bounded
+    resolver_match = getattr(request, "resolver_match", None)
+    return resolver_match.view_name if resolver_match else "<unresolved>"
+
+
+def get_graphql_operation_name(request) -> str:
+    """
+    Operations not in KNOWN_GRAPHQL_OPERATIONS are lumped together.
+    """
+    if request.method == "GET":
+        operation_name = request.GET.get("operationName")
+    else:
+        try:
+            body = json.loads(request.body) if request.content_type == "application/json" else {}
+        except (RawPostDataException, ValueError):
+            body = {}
+        if isinstance(body, list):
+            return "<batch>"
+        operation_name = body.get("operationName") if isinstance(body, dict) else None
+
+    if not operation_name:
+        return "<anonymous>"
+    if isinstance(operation_name, str) and operation_name in KNOWN_GRAPHQL_OPERATIONS:
+        return operation_name
+    return "<other>"
+
+
+class MetricsMiddleware:
+    """
+    MIDDLEWARE = (
+        'metrics.middleware.MetricsMiddleware',
+        # ...
+    )
+
+    Records the time taken and the database queries made by requests per view.
+    Put first to include the time taken by the other middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryStats()
+
+        t0 = perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        elapsed = perf_counter() - t0
+
+        view = get_view_name(request)
+        method = request.method if request.method in KNOWN_METHODS else "<other>"
+        status = f"{response.status_code // 100}xx"
+
+        request_seconds.observe(elapsed, view=view, method=method, status=status)
+        request_db_queries.observe(queries.count, view=view)
+        request_db_seconds.observe(queries.seconds, view=view)
+
+        if view == GRAPHQL_VIEW_NAME:
+            graphql_seconds.observe(elapsed, operation=get_graphql_operation_name(request))
+
+        return response
@@ -0,0 +1,346 @@
+"""
+Minimal metrics in the Prometheus text exposition format.
+
+Metrics are module-level singletons created with `counter(...)`, `gauge(...)` and `histogram(...)`
+and rendered by the metrics view. Values are per process (worker), so Prometheus
+should scrape (or sum over) each worker separately.
+
+Things that happen outside web workers (such as in background tasks) are counted with
+`shared_counter(...)` and `shared_histogram(...)` instead. Their values are kept in the Django cache,
+so any process can render them; this requires a cache backend shared between processes.
+
+Values that are cheaper to look up at scrape time than to maintain are provided by collectors
+registered with `collector(...)`. They are called on every scrape, so they should cache their results.
+"""
+
+import hashlib
+import json
+import logging
+import math
+from collections.abc import Callable, Iterable
+from threading import Lock
+from time import monotonic
+from typing import TypeVar
+
+from django.core.cache import cache
+
+logger = logging.getLogger("kompassi")
+
+LabelValues = tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metric:
+    type: str
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = Lock()
+
+    def _label_values(self, labels: dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[labelname]) for labelname in self.labelnames)
+
+    def _format_labels(self, label_values: LabelValues, **extra: str) -> str:
+        pairs = [*zip(self.labelnames, label_values, strict=True), *extra.items()]
+        if not pairs:
+            return ""
+        escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+        return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped, strict=True)) + "}"
+
+    def render_samples(self) -> Iterable[str]:
+        raise NotImplementedError()
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} {self.type}",
+            *self.render_samples(),
+        ]
+        return "\n".join(lines) + "\n"
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(self._label_values(labels), 0)
+
+    def render_samples(self):
+        with self._lock:
+            values = list(self._values.items())
+
+        for label_values, value in values:
+            yield f"{self.name}{self._format_labels(label_values)} {value}"
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value: float, **labels: str):
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = (*sorted(buckets), math.inf)
+
+        # label values -> (bucket counts, sum)
+        self._values: dict[LabelValues, tuple[list[int], float]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._label_values(labels)
+        with self._lock:
+            bucket_counts, total = self._values.get(key) or ([0] * len(self.buckets), 0.0)
+            for i, upper_bound in enumerate(self.buckets):
+                if value <= upper_bound:
+                    bucket_counts[i] += 1
+            self._values[key] = (bucket_counts, total + value)
+
+    def get_count(self, **labels: str) -> int:
+        bucket_counts, _total = self._values.get(self._label_values(labels)) or ([0], 0.0)
+        return bucket_counts[-1]
+
+    def get_sum(self, **labels: str) -> float:
+        _bucket_counts, total = self._values.get(self._label_values(labels)) or ([0], 0.0)
+        return total
+
+    def render_samples(self):
+        with self._lock:
+            values = [(key, (list(bucket_counts), total)) for key, (bucket_counts, total) in self._values.items()]
+
+        for label_values, (bucket_counts, total) in values:
+            for upper_bound, count in zip(self.buckets, bucket_counts, strict=True):
+                le = "+Inf" if upper_bound == math.inf else str(upper_bound)
+                yield f"{self.name}_bucket{self._format_labels(label_values, le=le)} {count}"
+            yield f"{self.name}_sum{self._format_labels(label_values)} {total}"
+            yield f"{self.name}_count{self._format_labels(label_values)} {bucket_counts[-1]}"
+
+
+class SharedMetric(Metric):
+    """
+    Base class of metrics whose values are kept in the Django cache. Only integers can be added to cache entries,
+    so shared metrics count in integers. Errors of the cache are logged and ignored.
+    """
+
+    # label values this process has put in the label index are put there again after this long
+    # in case a concurrent update of the index lost them
+    INDEX_RECHECK_SECONDS = 60
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._index_key = f"metrics:{self.name}:index"
+        self._indexed: set[LabelValues] = set()
+        self._indexed_at = monotonic()
+
+    def _key(self, label_values: LabelValues, suffix: str) -> str:
+        digest = hashlib.sha256(json.dumps(label_values).encode("UTF-8")).hexdigest()[:16]
+        return f"metrics:{self.name}:{digest}:{suffix}"
+
+    def _index(self, label_values: LabelValues):
+        with self._lock:
+            if monotonic() - self._indexed_at > self.INDEX_RECHECK_SECONDS:
+                self._indexed.clear()
+                self._indexed_at = monotonic()
+            if label_values in self._indexed:
+                return
+
+        index = cache.get(self._index_key) or []
+        if list(label_values) not in index:
+            cache.set(self._index_key, [*index, list(label_values)], None)
+
+        with self._lock:
+            self._indexed.add(label_values)
+
+    def _add(self, labels: dict[str, str], amounts: dict[str, int]):
+        label_values = self._label_values(labels)
+
+        try:
+            self._index(label_values)
+
+            for suffix, amount in amounts.items():
+                key = self._key(label_values, suffix)
+                if not cache.add(key, amount, None):
+                    try:
+                        cache.incr(key, amount)
+                    except ValueError:
+                        # evicted between add and incr
+                        cache.set(key, amount, None)
+        except Exception:
+            logger.warning("Failed to update shared metric %s", self.name, exc_info=True)
+
+    def _get_values(self, suffixes: Iterable[str]) -> list[tuple[LabelValues, list[int]]]:
+        """
+        Returns the values of the given suffixes for all label values seen so far.
+        """
+        suffixes = list(suffixes)
+        all_label_values = [tuple(label_values) for label_values in cache.get(self._index_key) or []]
+        values = cache.get_many(
+            [self._key(label_values, suffix) for label_values in all_label_values for suffix in suffixes]
+        )
+
+        return [
+            (label_values, [values.get(self._key(label_values, suffix), 0) for suffix in suffixes])
+            for label_values in all_label_values
+        ]
+
+
+class SharedCounter(SharedMetric):
+    type = "counter"
+
+    def inc(self, amount: int = 1, **labels: str):
+        self._add(labels, {"value": amount})
+
+    def get(self, **labels: str) -> int:
+        return cache.get(self._key(self._label_values(labels), "value"), 0)
+
+    def render_samples(self):
+        for label_values, (value,) in self._get_values(["value"]):
+            yield f"{self.name}{self._format_labels(label_values)} {value}"
+
+
+class SharedHistogram(SharedMetric):
+    type = "histogram"
+
+    # the sum is kept in millionths
+    SUM_SCALE = 1_000_000
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = (*sorted(buckets), math.inf)
+
+    def observe(self, value: float, **labels: str):
+        # Only the bucket the value falls in is counted; buckets are made cumulative when rendered.
+        bucket_index = next(i for i, upper_bound in enumerate(self.buckets) if value <= upper_bound)
+        self._add(labels, {f"bucket{bucket_index}": 1, "sum": round(value * self.SUM_SCALE)})
+
+    def render_samples(self):
+        suffixes = [f"bucket{i}" for i in range(len(self.buckets))]
+
+        for label_values, values in self._get_values([*suffixes, "sum"]):
+            *bucket_counts, total = values
+            count = 0
+            for upper_bound, bucket_count in zip(self.buckets, bucket_counts, strict=True):
+                count += bucket_count
+                le = "+Inf" if upper_bound == math.inf else str(upper_bound)
+                yield f"{self.name}_bucket{self._format_labels(label_values, le=le)} {count}"
+            yield f"{self.name}_sum{self._format_labels(label_values)} {total / self.SUM_SCALE}"
+            yield f"{self.name}_count{self._format_labels(label_values)} {count}"
+
+
+M = TypeVar("M", bound=Metric)
+Collector = Callable[[], Iterable[Metric]]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+        self._collectors: list[Collector] = []
+        self._lock = Lock()
+
+    def register(self, metric: M) -> M:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Conflicting definitions for metric {metric.name}")
+                return existing  # type: ignore
+
+            self._metrics[metric.name] = metric
+            return metric
+
+    def register_collector(self, collect: Collector) -> Collector:
+        with self._lock:
+            if collect not in self._collectors:
+                self._collectors.append(collect)
+        return collect
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        for collect in collectors:
+            try:
+                metrics.extend(collect())
+            except Exception:
+                logger.exception("Metrics collector %s failed", collect.__qualname__)
+
+        parts = []
+        for metric in metrics:
+            try:
+                parts.append(metric.render())
+            except Exception:
+                logger.exception("Failed to render metric %s", metric.name)
+
+        return "".join(parts)
+
+
+registry = Registry()
+
+
+def counter(name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+    return registry.register(Counter(name, help, labelnames))
+
+
+def gauge(name: str, help: str, labelnames: Iterable[str] = ()) -> Gauge:
+    return registry.register(Gauge(name, help, labelnames))
+
+
+def histogram(
+    name: str,
+    help: str,
+    labelnames: Iterable[str] = (),
+    buckets: Iterable[float] = DEFAULT_BUCKETS,
+) -> Histogram:
+    return registry.register(Histogram(name, help, labelnames, buckets))
+
+
+def shared_counter(name: str, help: str, labelnames: Iterable[str] = ()) -> SharedCounter:
+    return registry.register(SharedCounter(name, help, labelnames))
+
+
+def shared_histogram(
+    name: str,
+    help: str,
+    labelnames: Iterable[str] = (),
+    buckets: Iterable[float] = DEFAULT_BUCKETS,
+) -> SharedHistogram:
+    return registry.register(SharedHistogram(name, help, labelnames, buckets))
+
+
+def collector(collect: Collector) -> Collector:
+    """
+    Registers a function that returns metrics to render on every scrape. Usable as a decorator.
+    """
+    return registry.register_collector(collect)
@@ -0,0 +1,70 @@
+import pytest
+from django.core.cache import cache
+from django.test import RequestFactory, override_settings
+
+from .background_tasks import QUEUE_LENGTHS_CACHE_KEY, collect_queue_lengths
+from .middleware import get_graphql_operation_name
+from .registry import shared_counter, shared_histogram
+
+
+def test_shared_metrics():
+    cache.clear()
+
+    counter = shared_counter("kompassi_test_things_total", "Things", ["event"])
+    counter.inc(event="foo")
+    counter.inc(2, event="foo")
+    counter.inc(event="bar")
+    assert counter.get(event="foo") == 3
+    assert 'kompassi_test_things_total{event="bar"} 1' in counter.render()
+
+    histogram = shared_histogram("kompassi_test_thing_seconds", "Things", ["task"], buckets=(0.1, 1.0))
+    histogram.observe(0.05, task="foo")
+    histogram.observe(0.5, task="foo")
+    histogram.observe(5.0, task="foo")
+    rendered = histogram.render()
+    assert 'kompassi_test_thing_seconds_bucket{task="foo",le="1.0"} 2' in rendered
+    assert 'kompassi_test_thing_seconds_bucket{task="foo",le="+Inf"} 3' in rendered
+    assert 'kompassi_test_thing_seconds_sum{task="foo"} 5.55' in rendered
+
+
+@pytest.mark.django_db
+@override_settings(METRICS_BEARER_TOKEN="secret")
+def test_metrics_view(client):
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+
+    response = client.get("/metrics", headers={"Authorization": "Bearer secret"})
+    assert response.status_code == 200
+    assert (
+        'kompassi_http_request_duration_seconds_count{view="metrics.views.metrics_view",method="GET",status="4xx"}'
+        in (response.content.decode())
+    )
+
+
+def test_graphql_operation_name():
+    factory = RequestFactory()
+
+    def get_name(body):
+        return get_graphql_operation_name(factory.post("/graphql", body, content_type="application/json"))
+
+    assert (
+        get_graphql_operation_name(factory.get("/graphql", {"operationName": "ProgramListQuery"})) == "ProgramListQuery"
+    )
+    assert get_name({"operationName": "SurveyPageQuery", "query": "..."}) == "SurveyPageQuery"
+    assert get_name({"operationName": "Spam123", "query": "..."}) == "<other>"
+    assert get_name({"operationName": ["SurveyPageQuery"], "query": "..."}) == "<other>"
+    assert get_name({"query": "..."}) == "<anonymous>"
+    assert get_name([{"operationName": "SurveyPageQuery"}]) == "<batch>"
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=False)
+def test_collect_queue_lengths(monkeypatch):
+    from kompassi.celery_app import app
+
+    # like Redis, the in-memory transport does not have queues that have not been sent anything (or are empty)
+    monkeypatch.setattr(app.conf, "broker_url", "memory://")
+    cache.delete(QUEUE_LENGTHS_CACHE_KEY)
+
+    [queue_length] = collect_queue_lengths()
+    assert queue_length.get(queue=app.conf.task_default_queue) == 0
+    assert cache.get(QUEUE_LENGTHS_CACHE_KEY) == {app.conf.task_default_queue: 0}
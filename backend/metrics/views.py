@@ -1,4 +1,8 @@
+from django.conf import settings
 from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+
+from .registry import registry
 
 METRICS_RESPONSE = """
 # HELP kompassi_up Dummy metric to tell Prometheus we're up
@@ -7,5 +11,23 @@ kompassi_up{} 1
 """.lstrip()
 
 
-def dummy_metrics_view(request):
-    return HttpResponse(METRICS_RESPONSE, content_type="text/plain")
+def is_authorized(request) -> bool:
+    """
+    Metrics include business data such as ticket sales, so scrapers must present METRICS_BEARER_TOKEN.
+    Without one configured, metrics are only served in development (DEBUG).
+    """
+    token = settings.METRICS_BEARER_TOKEN
+    if not token:
+        return settings.DEBUG
+
+    authmeth, _, auth = request.headers.get("authorization", "").partition(" ")
+    return authmeth.lower() == "bearer" and constant_time_compare(auth, token)
+
+
+def metrics_view(request):
+    if not is_authorized(request):
+        response = HttpResponse("Unauthorized", status=401, content_type="text/plain")
+        response["WWW-Authenticate"] = "Bearer"
+        return response
+
+    return HttpResponse(METRICS_RESPONSE + registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -8,6 +8,7 @@ from django.http import QueryDict
 from django.utils.timezone import now
 
 from core.graphql.common import DimensionFilterInput
+from core.utils.dimension_utils import filter_by_dimensions, matches_dimension_filters
 from forms.utils.process_form_data import FALSY_VALUES
 
 from .models.program import Program
@@ -60,6 +61,12 @@ class ProgramFilters:
             hide_past=hide_past,
         )
 
+    def get_dimension_filters(self) -> list[tuple[str, list[str]]]:
+        return [
+            (dimension_slug, [slug for slugs in value_slugs for slug in slugs.split(",")])
+            for dimension_slug, value_slugs in self.dimensions.items()
+        ]
+
     def filter_program(
         self,
         programs: models.QuerySet[Program],
@@ -75,16 +82,48 @@ class ProgramFilters:
             else:
                 programs = programs.none()
 
-        for dimension_slug, value_slugs in self.dimensions.items():
-            value_slugs = [slug for slugs in value_slugs for slug in slugs.split(",")]
-            programs = programs.filter(
-                dimensions__dimension__slug=dimension_slug,
-                dimensions__value__slug__in=value_slugs,
-            )
+        if self.dimensions:
+            programs = filter_by_dimensions(programs, self.get_dimension_filters())
 
         if self.hide_past:
             if t is None:
                 t = now()
             programs = programs.filter(cached_latest_end_time__gte=t)
 
-        return programs.distinct().order_by("cached_earliest_start_time")
+        # NOTE: no joins that could duplicate rows, so no need for distinct()
+        return programs.order_by("cached_earliest_start_time")
+
+    def filter_program_list(
+        self,
+        programs: list[Program],
+        t: datetime | None = None,
+    ) -> list[Program]:
+        """
+        In-memory equivalent of filter_program for programs already ordered by
+        cached_earliest_start_time (eg. from ProgramSnapshot). Favorites need the database.
+        """
+        if self.favorites_only:
+            raise ValueError("Cannot filter favorites in memory")
+
+        if self.slugs:
+            slugs = set(self.slugs)
+            programs = [program for program in programs if program.slug in slugs]
+
+        if self.dimensions:
+            dimension_filters = self.get_dimension_filters()
+            programs = [
+                program
+                for program in programs
+                if matches_dimension_filters(program.cached_dimensions, dimension_filters)
+            ]
+
+        if self.hide_past:
+            if t is None:
+                t = now()
+            programs = [
+                program
+                for program in programs
+                if program.cached_latest_end_time is not None and program.cached_latest_end_time >= t
+            ]
+
+        return programs
@@ -19,6 +19,7 @@ from ..models import (
 )
 from ..models.annotations import ANNOTATIONS
 from ..models.meta import ProgramV2ProfileMeta
+from ..snapshot import ProgramSnapshot
 from .annotations import AnnotationSchemoidType
 from .dimension import DimensionType
 from .offer_form import OfferFormType
@@ -39,12 +40,20 @@ class ProgramV2EventMetaType(DjangoObjectType):
         hide_past: bool = False,
     ):
         request: HttpRequest = info.context
-        programs = Program.objects.filter(event=meta.event)
-        return ProgramFilters.from_graphql(
+        program_filters = ProgramFilters.from_graphql(
             filters,
             favorites_only=favorites_only,
             hide_past=hide_past,
-        ).filter_program(programs, user=request.user)
+        )
+
+        if not favorites_only:
+            # public program listing is the same for everyone, serve it from the snapshot
+            return program_filters.filter_program_list(ProgramSnapshot.get(meta.event).programs)
+
+        programs = Program.objects.filter(event=meta.event)
+        programs = program_filters.filter_program(programs, user=request.user)
+
+        return ProgramType.prefetch_related_for_selection(programs, info)
 
     programs = graphene.NonNull(
         graphene.List(graphene.NonNull(ProgramType)),
@@ -165,12 +174,14 @@ class ProgramV2ProfileMetaType(graphene.ObjectType):
         else:
             programs = Program.objects.all()
 
-        return ProgramFilters.from_graphql(
+        programs = ProgramFilters.from_graphql(
             filters,
             favorites_only=True,
             hide_past=hide_past,
         ).filter_program(programs, user=request.user)
 
+        return ProgramType.prefetch_related_for_selection(programs, info)
+
     programs = graphene.List(
         graphene.NonNull(ProgramType),
         event_slug=graphene.String(),
@@ -1,4 +1,5 @@
 import graphene
+from django.db import models
 from django.http import HttpRequest
 from django.utils.timezone import now
 from graphene.types.generic import GenericScalar
@@ -7,9 +8,9 @@ from graphene_django import DjangoObjectType
 from core.utils.locale_utils import get_message_in_language
 from core.utils.text_utils import normalize_whitespace
 from graphql_api.language import DEFAULT_LANGUAGE
-from graphql_api.utils import resolve_localized_field
+from graphql_api.utils import get_selected_field_names, resolve_localized_field
 
-from ..models import Program
+from ..models import Program, ProgramDimensionValue
 from ..models.annotations import ANNOTATIONS
 from .annotations import ProgramAnnotationType
 from .dimension import ProgramDimensionValueType
@@ -302,6 +303,15 @@ class ProgramType(DjangoObjectType):
         """
         pdvs = program.dimensions.all()
 
+        if "dimensions" in getattr(program, "_prefetched_objects_cache", {}):
+            # filter in Python so as not to throw away the prefetched dimensions
+            return [
+                pdv
+                for pdv in pdvs
+                if (not is_list_filter or pdv.dimension.is_list_filter)
+                and (not is_shown_in_detail or pdv.dimension.is_shown_in_detail)
+            ]
+
         if is_list_filter:
             pdvs = pdvs.filter(dimension__is_list_filter=True)
 
@@ -323,6 +333,30 @@ class ProgramType(DjangoObjectType):
 
     color = graphene.NonNull(graphene.String)
 
+    @staticmethod
+    def prefetch_related_for_selection(programs: models.QuerySet[Program], info) -> models.QuerySet[Program]:
+        """
+        Prefetches the related objects needed by the selected fields so that listing programs
+        costs a constant number of queries instead of some per program.
+        """
+        selected = get_selected_field_names(info)
+
+        if selected & {"links", "signupLink", "calendarExportLink"}:
+            programs = programs.select_related("event")
+
+        if "scheduleItems" in selected:
+            programs = programs.prefetch_related("schedule_items")
+
+        if "dimensions" in selected:
+            programs = programs.prefetch_related(
+                models.Prefetch(
+                    "dimensions",
+                    queryset=ProgramDimensionValue.objects.select_related("dimension", "value"),
+                )
+            )
+
+        return programs
+
     class Meta:
         model = Program
         fields = (
@@ -1 +1 @@
-from . import dimension, program, schedule
+from . import dimension, program, schedule, snapshot
@@ -0,0 +1,22 @@
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from ..models import Dimension, DimensionValue, Program, ProgramDimensionValue
+from ..models.schedule import ScheduleItem
+from ..snapshot import ProgramSnapshot
+
+
+@receiver([post_save, post_delete], sender=Program)
+@receiver([post_save, post_delete], sender=ScheduleItem)
+@receiver([post_save, post_delete], sender=ProgramDimensionValue)
+@receiver([post_save, post_delete], sender=Dimension)
+@receiver([post_save, post_delete], sender=DimensionValue)
+def program_snapshot_invalidate(sender, instance, **kwargs):
+    try:
+        event = instance.event if isinstance(instance, Program | Dimension | DimensionValue) else instance.program.event
+    except ObjectDoesNotExist:
+        # the event is being deleted along with everything else
+        return
+
+    ProgramSnapshot.invalidate([event.slug])
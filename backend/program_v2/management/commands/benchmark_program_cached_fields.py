@@ -0,0 +1,99 @@
+import random
+from datetime import timedelta
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+from tabulate import tabulate
+
+from core.models import Event
+
+from ...models import DimensionValue, Program, ProgramDimensionValue, ScheduleItem
+
+
+class NotReally(RuntimeError):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare refreshing cached fields of all programs of an event per program in Python "
+        "versus with set-based SQL. Synthetic programs with random dimension values are added "
+        "to the event first. Everything is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--event-slug",
+            metavar="EVENT_SLUG",
+            required=True,
+        )
+        parser.add_argument(
+            "--num-programs",
+            type=int,
+            default=2000,
+            help="Number of synthetic programs to add to the event (default: 2000, 0 to use existing programs only)",
+        )
+
+    def handle(self, *args, **options):
+        event = Event.objects.get(slug=options["event_slug"])
+        rows = []
+
+        try:
+            with transaction.atomic():
+                self.create_programs(event, options["num_programs"])
+                queryset = event.programs.all()
+                num_programs = queryset.count()
+
+                for name, set_based in [("python", False), ("set-based", True)]:
+                    for method in [Program.refresh_cached_dimensions_qs, Program.refresh_cached_times_qs]:
+                        with CaptureQueriesContext(connection) as queries:
+                            t0 = perf_counter()
+                            method(queryset, set_based=set_based)
+                            elapsed = perf_counter() - t0
+
+                        rows.append((method.__name__, name, num_programs, len(queries), f"{elapsed:.2f}"))
+
+                raise NotReally("rollback")
+        except NotReally:
+            pass
+
+        print(tabulate(rows, headers=["method", "implementation", "programs", "queries", "seconds"]))
+
+    def create_programs(self, event: Event, num_programs: int):
+        values = list(DimensionValue.objects.filter(dimension__event=event).select_related("dimension"))
+        t = now()
+
+        programs = Program.objects.bulk_create(
+            [
+                Program(
+                    event=event,
+                    title=f"Benchmark program {i}",
+                    slug=f"benchmark-program-{i}",
+                )
+                for i in range(num_programs)
+            ]
+        )
+
+        ScheduleItem.objects.bulk_create(
+            [
+                ScheduleItem(
+                    program=program,
+                    start_time=(start_time := t + timedelta(minutes=random.randrange(0, 3 * 24 * 60, 15))),
+                    length=timedelta(hours=1),
+                    cached_end_time=start_time + timedelta(hours=1),
+                )
+                for program in programs
+                for _ in range(random.randint(1, 3))
+            ]
+        )
+
+        ProgramDimensionValue.objects.bulk_create(
+            [
+                ProgramDimensionValue(program=program, dimension=value.dimension, value=value)
+                for program in programs
+                for value in random.sample(values, k=min(len(values), random.randint(1, 5)))
+            ]
+        )
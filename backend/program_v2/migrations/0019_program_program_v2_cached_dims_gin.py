@@ -0,0 +1,19 @@
+# Generated by Django 5.0.8 on 2026-10-18 12:00
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("program_v2", "0018_rename_other_fields_program_annotations"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="program",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["cached_dimensions"], name="program_v2_cached_dims_gin", opclasses=["jsonb_path_ops"]
+            ),
+        ),
+    ]
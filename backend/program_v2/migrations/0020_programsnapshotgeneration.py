@@ -0,0 +1,31 @@
+# Generated by Django 5.0.8 on 2026-10-18 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0040_rename_emailverificationtoken_person_state_core_emailv_person__722147_idx_and_more"),
+        ("program_v2", "0019_program_program_v2_cached_dims_gin"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProgramSnapshotGeneration",
+            fields=[
+                (
+                    "event",
+                    models.OneToOneField(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="program_snapshot_generation",
+                        serialize=False,
+                        to="core.event",
+                    ),
+                ),
+                ("generation", models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
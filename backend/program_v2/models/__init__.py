@@ -3,3 +3,4 @@ from .meta import ProgramV2EventMeta
 from .offer_form import OfferForm
 from .program import Program
 from .schedule import ScheduleItem
+from .snapshot_generation import ProgramSnapshotGeneration
@@ -5,9 +5,11 @@ from itertools import batched
 from typing import TYPE_CHECKING, Self
 
 from django.conf import settings
-from django.db import models, transaction
+from django.contrib.postgres.indexes import GinIndex
+from django.db import connection, models, transaction
 from django.http import HttpRequest
 from django.urls import reverse
+from pkg_resources import resource_string
 
 from core.models import Event
 from core.utils import validate_slug
@@ -69,6 +71,14 @@ class Program(models.Model):
 
     class Meta:
         unique_together = ("event", "slug")
+        indexes = [
+            # see core/utils/dimension_utils.py
+            GinIndex(
+                fields=["cached_dimensions"],
+                opclasses=["jsonb_path_ops"],
+                name="program_v2_cached_dims_gin",
+            ),
+        ]
 
     def __str__(self):
         return str(self.title)
@@ -133,8 +143,52 @@ class Program(models.Model):
     program_batch_size = 100
     schedule_item_batch_size = 100
 
+    REFRESH_CACHED_DIMENSIONS_QUERY = resource_string(__name__, "queries/refresh_cached_dimensions.sql").decode()
+    REFRESH_SCHEDULE_ITEM_LOCATIONS_QUERY = resource_string(
+        __name__, "queries/refresh_schedule_item_locations.sql"
+    ).decode()
+    REFRESH_CACHED_TIMES_QUERY = resource_string(__name__, "queries/refresh_cached_times.sql").decode()
+
+    @staticmethod
+    def can_refresh_set_based() -> bool:
+        """
+        The set-based refreshes are written in PostgreSQL dialect (jsonb_object_agg, hstore each, UPDATE ... FROM).
+        """
+        return connection.vendor == "postgresql"
+
     @classmethod
-    def refresh_cached_dimensions_qs(cls, queryset: models.QuerySet[Self]):
+    def refresh_cached_dimensions_qs(cls, queryset: models.QuerySet[Self], set_based: bool | None = None):
+        """
+        Refreshes cached_dimensions, cached_location and cached_color of the programs in the queryset
+        as well as cached_location of their schedule items. By default, this is done using a couple of
+        set-based SQL statements regardless of the number of programs. The per-program Python path
+        (set_based=False) is kept as a fallback for other databases and for comparison.
+        """
+        if set_based is None:
+            set_based = cls.can_refresh_set_based()
+
+        if set_based:
+            cls._refresh_cached_dimensions_qs_set_based(queryset)
+        else:
+            cls._refresh_cached_dimensions_qs_python(queryset)
+
+        cls._invalidate_snapshots(queryset)
+        logger.info("Finished refreshing cached dimensions for programs")
+
+    @classmethod
+    def _refresh_cached_dimensions_qs_set_based(cls, queryset: models.QuerySet[Self]):
+        with transaction.atomic():
+            program_ids = list(queryset.order_by("id").select_for_update(of=("self",)).values_list("id", flat=True))
+            if not program_ids:
+                return
+
+            logger.info("Refreshing cached dimensions for %d programs", len(program_ids))
+            with connection.cursor() as cursor:
+                cursor.execute(cls.REFRESH_CACHED_DIMENSIONS_QUERY, dict(program_ids=program_ids))
+                cursor.execute(cls.REFRESH_SCHEDULE_ITEM_LOCATIONS_QUERY, dict(program_ids=program_ids))
+
+    @classmethod
+    def _refresh_cached_dimensions_qs_python(cls, queryset: models.QuerySet[Self]):
         from .schedule import ScheduleItem
 
         with transaction.atomic():
@@ -174,8 +228,6 @@ class Program(models.Model):
                     bulk_update_schedule_items.append(schedule_item)
                 ScheduleItem.objects.bulk_update(bulk_update_schedule_items, ["cached_location"])
 
-        logger.info("Finished refreshing cached dimensions for programs")
-
     def refresh_cached_times(self):
         """
         Used to populate cached_earliest_start_time and cached_latest_end_time
@@ -189,7 +241,35 @@ class Program(models.Model):
         self.save(update_fields=["cached_earliest_start_time", "cached_latest_end_time"])
 
     @classmethod
-    def refresh_cached_times_qs(cls, queryset: models.QuerySet[Self]):
+    def refresh_cached_times_qs(cls, queryset: models.QuerySet[Self], set_based: bool | None = None):
+        """
+        Refreshes cached_earliest_start_time and cached_latest_end_time of the programs in the queryset.
+        See refresh_cached_dimensions_qs for set_based.
+        """
+        if set_based is None:
+            set_based = cls.can_refresh_set_based()
+
+        if set_based:
+            cls._refresh_cached_times_qs_set_based(queryset)
+        else:
+            cls._refresh_cached_times_qs_python(queryset)
+
+        cls._invalidate_snapshots(queryset)
+        logger.info("Finished refreshing cached times for programs")
+
+    @classmethod
+    def _refresh_cached_times_qs_set_based(cls, queryset: models.QuerySet[Self]):
+        with transaction.atomic():
+            program_ids = list(queryset.order_by("id").select_for_update(of=("self",)).values_list("id", flat=True))
+            if not program_ids:
+                return
+
+            logger.info("Refreshing cached times for %d programs", len(program_ids))
+            with connection.cursor() as cursor:
+                cursor.execute(cls.REFRESH_CACHED_TIMES_QUERY, dict(program_ids=program_ids))
+
+    @classmethod
+    def _refresh_cached_times_qs_python(cls, queryset: models.QuerySet[Self]):
         with transaction.atomic():
             for page, batch in enumerate(
                 batched(
@@ -213,7 +293,16 @@ class Program(models.Model):
                     bulk_update.append(program)
                 cls.objects.bulk_update(bulk_update, ["cached_earliest_start_time", "cached_latest_end_time"])
 
-        logger.info("Finished refreshing cached times for programs")
+    @classmethod
+    def _invalidate_snapshots(cls, queryset: models.QuerySet[Self]):
+        """
+        Bulk updates do not send signals, so invalidate the program snapshots of the events concerned explicitly.
+        """
+        from ..snapshot import ProgramSnapshot
+
+        ProgramSnapshot.invalidate(
+            Event.objects.filter(id__in=queryset.values("event_id")).values_list("slug", flat=True)
+        )
 
     @classmethod
     def import_program_from_v1(
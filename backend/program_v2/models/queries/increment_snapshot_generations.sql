@@ -0,0 +1,8 @@
+-- Increments the program snapshot generations of the events whose slugs are given (see program_v2/snapshot.py).
+insert into program_v2_programsnapshotgeneration (event_id, generation)
+select id, 1
+from core_event
+where slug = any(%(event_slugs)s)
+order by id
+on conflict (event_id) do update set
+  generation = program_v2_programsnapshotgeneration.generation + 1;
@@ -0,0 +1,76 @@
+-- Set-based equivalent of Program.refresh_cached_dimensions for the programs whose ids are given.
+-- All dimensions of the event are present in cached_dimensions, even those without values.
+with target_programs as (
+    select id, event_id
+    from program_v2_program
+    where id = any(%(program_ids)s)
+),
+values_by_dimension as (
+    select
+        p.id as program_id,
+        d.slug as dimension_slug,
+        coalesce(
+            jsonb_agg(dv.slug order by dv."order", pdv.id) filter (where dv.id is not null),
+            '[]'::jsonb
+        ) as value_slugs
+    from
+        target_programs p
+        join program_v2_dimension d on (d.event_id = p.event_id)
+        left join program_v2_programdimensionvalue pdv on (pdv.program_id = p.id and pdv.dimension_id = d.id)
+        left join program_v2_dimensionvalue dv on (dv.id = pdv.value_id)
+    group by p.id, d.slug
+),
+dimensions as (
+    select
+        program_id,
+        jsonb_object_agg(dimension_slug, value_slugs) as cached_dimensions
+    from values_by_dimension
+    group by program_id
+),
+locations_by_language as (
+    select
+        pdv.program_id,
+        title.key as lang,
+        string_agg(distinct title.value, ', ' order by title.value) as locations
+    from
+        target_programs p
+        join program_v2_programv2eventmeta m on (m.event_id = p.event_id)
+        join program_v2_programdimensionvalue pdv on (
+            pdv.program_id = p.id
+            and pdv.dimension_id = m.location_dimension_id
+        )
+        join program_v2_dimensionvalue dv on (dv.id = pdv.value_id)
+        cross join lateral each(dv.title) as title
+    where title.value <> ''
+    group by pdv.program_id, title.key
+),
+locations as (
+    select
+        program_id,
+        jsonb_object_agg(lang, locations) as cached_location
+    from locations_by_language
+    group by program_id
+),
+colors as (
+    select
+        pdv.program_id,
+        (array_agg(dv.color order by d."order", dv."order", pdv.id))[1] as cached_color
+    from
+        target_programs p
+        join program_v2_programdimensionvalue pdv on (pdv.program_id = p.id)
+        join program_v2_dimension d on (d.id = pdv.dimension_id)
+        join program_v2_dimensionvalue dv on (dv.id = pdv.value_id)
+    where dv.color <> ''
+    group by pdv.program_id
+)
+update program_v2_program
+set
+    cached_dimensions = coalesce(dimensions.cached_dimensions, '{}'::jsonb),
+    cached_location = coalesce(locations.cached_location, '{}'::jsonb),
+    cached_color = coalesce(colors.cached_color, '')
+from
+    target_programs p
+    left join dimensions on (dimensions.program_id = p.id)
+    left join locations on (locations.program_id = p.id)
+    left join colors on (colors.program_id = p.id)
+where program_v2_program.id = p.id;
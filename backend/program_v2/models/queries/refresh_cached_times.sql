@@ -0,0 +1,18 @@
+-- Set-based equivalent of Program.refresh_cached_times for the programs whose ids are given.
+with times as (
+    select
+        p.id as program_id,
+        min(si.start_time) as earliest_start_time,
+        max(si.cached_end_time) as latest_end_time
+    from
+        program_v2_program p
+        left join program_v2_scheduleitem si on (si.program_id = p.id)
+    where p.id = any(%(program_ids)s)
+    group by p.id
+)
+update program_v2_program p
+set
+    cached_earliest_start_time = times.earliest_start_time,
+    cached_latest_end_time = times.latest_end_time
+from times
+where p.id = times.program_id;
@@ -0,0 +1,8 @@
+-- Copies cached_location of the programs whose ids are given to their schedule items.
+update program_v2_scheduleitem si
+set cached_location = p.cached_location
+from program_v2_program p
+where
+    si.program_id = p.id
+    and p.id = any(%(program_ids)s)
+    and si.cached_location is distinct from p.cached_location;
@@ -0,0 +1,199 @@
+"""
+Per-event snapshot of the public program listing.
+
+Public program data only changes when programs are imported or edited, yet every visitor
+used to recompute the same list from the database. The snapshot contains the programs of an
+event in listing order with their schedule items, dimension values and event prefetched, plus
+their JSON representation. It is stored in the Django cache and versioned by a hash of its
+content, so serving the program listing only needs to ask the database which snapshot is current.
+
+Which snapshot is current is decided by the generation of the event (ProgramSnapshotGeneration).
+The signal handlers in program_v2/handlers and the bulk refresh methods of Program increment it in
+the same transaction as the change, and snapshots are cached per generation. This works with cache
+backends that are not shared between processes (every process builds its own copy), and a
+snapshot whose build started before a change is stored under the old generation and never served
+after the change commits. Snapshots expire after SNAPSHOT_TTL_SECONDS to bound the size of the cache.
+"""
+
+import hashlib
+import json
+import logging
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+from functools import cached_property
+from threading import Lock
+from typing import Any, ClassVar, Self
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils.timezone import now
+
+from core.models import Event
+
+from .models import Program, ProgramDimensionValue, ProgramSnapshotGeneration
+from .models.annotations import ANNOTATIONS
+
+logger = logging.getLogger("kompassi")
+
+SNAPSHOT_TTL_SECONDS = 300
+
+PUBLIC_ANNOTATION_SLUGS = frozenset(annotation.slug for annotation in ANNOTATIONS if annotation.is_public)
+
+
+def program_as_dict(program: Program) -> dict[str, Any]:
+    """
+    JSON representation of a program for the public program listing. Field names follow the GraphQL API.
+    """
+    return dict(
+        slug=program.slug,
+        title=program.title,
+        description=program.description,
+        cachedDimensions=program.cached_dimensions,
+        cachedAnnotations={
+            k: v for k, v in program.annotations.items() if v not in (None, "") and k in PUBLIC_ANNOTATION_SLUGS
+        },
+        color=program.cached_color,
+        location=program.cached_location,
+        cachedEarliestStartTime=program.cached_earliest_start_time,
+        cachedLatestEndTime=program.cached_latest_end_time,
+        scheduleItems=[
+            dict(
+                subtitle=schedule_item.subtitle,
+                title=schedule_item.title,
+                location=schedule_item.cached_location,
+                startTime=schedule_item.start_time,
+                endTime=schedule_item.cached_end_time,
+                lengthMinutes=schedule_item.length.total_seconds() // 60,
+            )
+            for schedule_item in program.schedule_items.all()
+        ],
+    )
+
+
+@dataclass
+class ProgramSnapshot:
+    event_slug: str
+    event_id: int
+    generation: int
+    version: str
+    created_at: datetime
+
+    # in listing order (cached_earliest_start_time) with related objects prefetched
+    programs: list[Program]
+    data: list[dict[str, Any]]
+
+    # process-local copies of snapshots, event slug -> snapshot
+    _local_snapshots: ClassVar[dict[str, "ProgramSnapshot"]] = {}
+    _local_lock: ClassVar[Lock] = Lock()
+
+    @staticmethod
+    def get_generation(event_slug: str) -> tuple[int, int]:
+        """
+        Returns the id and the current snapshot generation of the event.
+        """
+        row = Event.objects.filter(slug=event_slug).values_list("id", "program_snapshot_generation__generation").first()
+        if row is None:
+            raise Event.DoesNotExist(event_slug)
+
+        event_id, generation = row
+        return event_id, generation or 0
+
+    @staticmethod
+    def get_cache_key(event_id: int, generation: int) -> str:
+        return f"program_v2.snapshot:{event_id}:{generation}"
+
+    @classmethod
+    def build(cls, event: Event, generation: int = 0) -> Self:
+        programs = list(
+            Program.objects.filter(event=event)
+            .select_related("event")
+            .prefetch_related(
+                "schedule_items",
+                models.Prefetch(
+                    "dimensions",
+                    queryset=ProgramDimensionValue.objects.select_related("dimension", "value"),
+                ),
+            )
+            .order_by("cached_earliest_start_time")
+        )
+        data = [program_as_dict(program) for program in programs]
+
+        # dimensions are included because they are exposed via GraphQL (not only cached_dimensions)
+        dimensions = [
+            (
+                program.slug,
+                pdv.dimension.slug,
+                pdv.dimension.is_list_filter,
+                pdv.dimension.is_shown_in_detail,
+                pdv.value.slug,
+            )
+            for program in programs
+            for pdv in program.dimensions.all()
+        ]
+        content = json.dumps([data, dimensions], cls=DjangoJSONEncoder, sort_keys=True)
+        version = hashlib.sha256(content.encode("UTF-8")).hexdigest()[:32]
+
+        return cls(
+            event_slug=event.slug,
+            event_id=event.id,
+            generation=generation,
+            version=version,
+            created_at=now(),
+            programs=programs,
+            data=data,
+        )
+
+    @classmethod
+    def get(cls, event: Event | str) -> Self:
+        """
+        Returns the current snapshot of the event, building it if necessary.
+        Unless the snapshot needs to be built, only its generation is read from the database.
+        """
+        event_slug = event if isinstance(event, str) else event.slug
+
+        # read before building so that a build racing with a change is stored under the old generation
+        event_id, generation = cls.get_generation(event_slug)
+
+        with cls._local_lock:
+            snapshot = cls._local_snapshots.get(event_slug)
+        if snapshot is not None and snapshot.event_id == event_id and snapshot.generation == generation:
+            return snapshot
+
+        snapshot = cache.get(cls.get_cache_key(event_id, generation))
+        if snapshot is None:
+            if isinstance(event, str):
+                event = Event.objects.get(id=event_id)
+
+            logger.info("Building program snapshot for %s", event_slug)
+            snapshot = cls.build(event, generation)
+            cache.set(cls.get_cache_key(event_id, generation), snapshot, SNAPSHOT_TTL_SECONDS)
+
+        with cls._local_lock:
+            cls._local_snapshots[event_slug] = snapshot
+
+        return snapshot
+
+    @classmethod
+    def invalidate(cls, event_slugs: Iterable[str]):
+        """
+        Invalidates the snapshots of the given events. Call in the same transaction as the change:
+        the generations of the events stay locked until it commits.
+        """
+        ProgramSnapshotGeneration.increment(list(event_slugs))
+
+    def get_etag(self, programs: list[Program]) -> str:
+        """
+        ETag of a filtered program listing. hide_past makes the result depend on time,
+        so the version of the snapshot is not enough.
+        """
+        digest = hashlib.sha256(" ".join(program.slug for program in programs).encode("UTF-8")).hexdigest()[:16]
+        return f'"{self.version}-{digest}"'
+
+    @cached_property
+    def data_by_slug(self) -> dict[str, dict[str, Any]]:
+        return {program.slug: data for program, data in zip(self.programs, self.data, strict=True)}
+
+    def get_data(self, programs: list[Program]) -> list[dict[str, Any]]:
+        return [self.data_by_slug[program.slug] for program in programs]
@@ -0,0 +1,128 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import Group
+from django.utils.timezone import now
+
+from core.models import Event
+
+from .filters import ProgramFilters
+from .models import Dimension, DimensionValue, Program, ProgramDimensionValue, ProgramV2EventMeta
+from .models.schedule import ScheduleItem
+from .snapshot import ProgramSnapshot
+
+
+@pytest.fixture
+def programs():
+    event, _created = Event.get_or_create_dummy()
+    ProgramV2EventMeta.objects.create(event=event, admin_group=Group.objects.create(name="test-program-admins"))
+
+    room = Dimension.objects.create(event=event, slug="room", is_list_filter=True)
+    values = {slug: DimensionValue.objects.create(dimension=room, slug=slug) for slug in ["main-hall", "side-hall"]}
+
+    t = now()
+    for i, (room_slug, start_time) in enumerate(
+        [
+            ("main-hall", t - timedelta(hours=3)),
+            ("side-hall", t),
+            ("main-hall", t + timedelta(hours=1)),
+        ]
+    ):
+        program = Program.objects.create(event=event, title=f"Program {i}", slug=f"program-{i}")
+        ScheduleItem.objects.create(
+            program=program,
+            start_time=start_time,
+            length=timedelta(hours=1),
+            cached_end_time=start_time + timedelta(hours=1),
+        )
+        ProgramDimensionValue.objects.create(program=program, dimension=room, value=values[room_slug])
+
+    programs = Program.objects.filter(event=event)
+    Program.refresh_cached_dimensions_qs(programs)
+    Program.refresh_cached_times_qs(programs)
+
+    return event
+
+
+@pytest.mark.django_db
+def test_snapshot_filters_match_database(programs):
+    event = programs
+    snapshot = ProgramSnapshot.get(event)
+
+    for filters in [
+        ProgramFilters(),
+        ProgramFilters(dimensions={"room": ["main-hall"]}),
+        ProgramFilters(dimensions={"room": ["main-hall,side-hall"]}),
+        ProgramFilters(dimensions={"room": []}),
+        ProgramFilters(dimensions={"room": ["main-hall"]}, hide_past=True),
+        ProgramFilters(slugs=["program-1"]),
+    ]:
+        expected = [program.slug for program in filters.filter_program(Program.objects.filter(event=event))]
+        actual = [program.slug for program in filters.filter_program_list(snapshot.programs)]
+        assert actual == expected, filters
+
+
+@pytest.mark.django_db
+def test_program_list_json_view(programs, client):
+    event = programs
+    url = f"/events/{event.slug}/programs.json?room=main-hall"
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert [program["slug"] for program in response.json()] == ["program-0", "program-2"]
+    etag = response["ETag"]
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+
+    # changes invalidate the snapshot right away, without waiting for the transaction to commit
+    Program.objects.get(event=event, slug="program-0").delete()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert [program["slug"] for program in response.json()] == ["program-2"]
+
+    # different filters, different content, different ETag
+    response = client.get(f"/events/{event.slug}/programs.json?room=side-hall", HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_set_based_cached_field_refresh_matches_python(programs):
+    event = programs
+    room = Dimension.objects.get(event=event, slug="room")
+    room.values.filter(slug="main-hall").update(title={"fi": "Pääsali", "en": "Main hall"}, color="red")
+    room.values.filter(slug="side-hall").update(title={"fi": "Sivusali", "en": ""})
+    Dimension.objects.create(event=event, slug="empty")
+    ProgramV2EventMeta.objects.filter(event=event).update(location_dimension=room)
+
+    cached_fields = [
+        "slug",
+        "cached_dimensions",
+        "cached_location",
+        "cached_color",
+        "cached_earliest_start_time",
+        "cached_latest_end_time",
+    ]
+    queryset = Program.objects.filter(event=event).order_by("slug")
+
+    def get_cached_fields():
+        return (
+            list(queryset.values_list(*cached_fields)),
+            list(ScheduleItem.objects.filter(program__event=event).order_by("id").values_list("cached_location")),
+        )
+
+    Program.refresh_cached_dimensions_qs(queryset, set_based=False)
+    Program.refresh_cached_times_qs(queryset, set_based=False)
+    expected = get_cached_fields()
+
+    queryset.update(cached_dimensions={}, cached_location={}, cached_color="", cached_latest_end_time=None)
+    ScheduleItem.objects.filter(program__event=event).update(cached_location={})
+
+    Program.refresh_cached_dimensions_qs(queryset, set_based=True)
+    Program.refresh_cached_times_qs(queryset, set_based=True)
+    assert get_cached_fields() == expected
+
+    program_0 = queryset.get(slug="program-0")
+    assert program_0.cached_dimensions == {"room": ["main-hall"], "empty": []}
+    assert program_0.cached_location == {"fi": "Pääsali", "en": "Main hall"}
+    assert program_0.cached_color == "red"
@@ -1,6 +1,7 @@
 from django.urls import path
 
 from .views.calendar_export_view import calendar_export_view, single_program_calendar_export_view
+from .views.program_list_json_view import program_list_json_view
 
 app_name = "program_v2"
 urlpatterns = [
@@ -9,6 +10,11 @@ urlpatterns = [
         calendar_export_view,
         name="calendar_export_view",
     ),
+    path(
+        "events/<slug:event_slug>/programs.json",
+        program_list_json_view,
+        name="program_list_json_view",
+    ),
     path(
         "events/<slug:event_slug>/programs/<slug:program_slug>.ics",
         single_program_calendar_export_view,
@@ -0,0 +1,43 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpRequest, HttpResponse, HttpResponseBadRequest
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+from core.models.event import Event
+
+from ..filters import ProgramFilters
+from ..snapshot import ProgramSnapshot
+
+# clients and proxies may reuse the listing for this long without revalidating
+MAX_AGE_SECONDS = 60
+
+
+def program_list_json_view(request: HttpRequest, event_slug: str):
+    """
+    Public program listing of an event as JSON. Accepts the same filters as the calendar export.
+    Served from the program snapshot with ETag/If-None-Match support, so it does not hit the database.
+    """
+    filters = ProgramFilters.from_query_dict(request.GET)
+    if filters.favorites_only:
+        return HttpResponseBadRequest("Favorites are not supported in the public program listing")
+
+    try:
+        snapshot = ProgramSnapshot.get(event_slug)
+    except Event.DoesNotExist as e:
+        raise Http404("No such event") from e
+
+    programs = filters.filter_program_list(snapshot.programs)
+    etag = snapshot.get_etag(programs)
+
+    if response := get_conditional_response(request, etag=etag):
+        return response
+
+    response = HttpResponse(
+        json.dumps(snapshot.get_data(programs), cls=DjangoJSONEncoder),
+        content_type="application/json",
+    )
+    response["ETag"] = etag
+    patch_cache_control(response, public=True, max_age=MAX_AGE_SECONDS)
+
+    return response
@@ -1 +1 @@
-from . import role, room, view, view_room
+from . import json_snapshot, role, room, view, view_room
@@ -0,0 +1,29 @@
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from ..json_snapshot import ProgrammeJSONSnapshot
+from ..models import Category, FreeformOrganizer, Programme, ProgrammeRole, Room, Tag
+
+
+@receiver([post_save, post_delete], sender=Programme)
+@receiver([post_save, post_delete], sender=ProgrammeRole)
+@receiver([post_save, post_delete], sender=FreeformOrganizer)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Room)
+@receiver([post_save, post_delete], sender=Tag)
+@receiver(m2m_changed, sender=Programme.tags.through)
+def programme_json_snapshot_invalidate(sender, instance, **kwargs):
+    try:
+        if isinstance(instance, ProgrammeRole | FreeformOrganizer):
+            event = instance.programme.event
+        elif isinstance(instance, Programme | Category | Room | Tag):
+            event = instance.event
+        else:
+            return
+    except ObjectDoesNotExist:
+        # the event is being deleted along with everything else
+        return
+
+    if event is not None:
+        ProgrammeJSONSnapshot.invalidate([event.slug])
@@ -0,0 +1,117 @@
+"""
+Per-event, per-format snapshots of the programme v1 JSON API (json_view).
+
+External schedule apps poll the JSON API every minute or so, and every poll used to serialize
+all programmes of the event again, with a query or two per programme for its hosts and tags.
+The snapshot contains the serialized JSON, gzipped as well, with an ETag and Last-Modified
+for conditional requests. It is stored in the Django cache, so an unchanged listing is served
+without hitting the database.
+
+Which snapshots are current is decided by the generation of the event (ProgrammeJSONSnapshotGeneration).
+The signal handlers in programme/handlers and Programme.apply_state increment it in the same
+transaction as the change, and snapshots are cached per generation. This works with cache backends
+that are not shared between processes, and a snapshot whose build started before a change is stored
+under the old generation and never served after the change commits. As a safety net against changes
+that send no signals (such as the name of a host), snapshots also expire after SNAPSHOT_TTL_SECONDS.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Self
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.timezone import now
+
+from core.models import Event
+
+from .models import Programme, ProgrammeJSONSnapshotGeneration
+
+logger = logging.getLogger("kompassi")
+
+SNAPSHOT_TTL_SECONDS = 300
+
+
+def get_programme_json(event: Event, format: str = "default", include_unpublished: bool = False) -> list[Any]:
+    criteria: dict[str, Any] = dict(category__event=event)
+
+    if not include_unpublished:
+        criteria.update(state="published")
+
+    programmes = list(
+        Programme.objects.filter(**criteria)
+        .select_related("category__event", "room", "form_used")
+        .prefetch_related("tags")
+        # Programme.Meta.ordering, made total so that the ETag of the snapshot is stable
+        .order_by("start_time", "room", "id")
+    )
+    Programme.prefetch_formatted_hosts(programmes)
+
+    return [programme.as_json(format=format) for programme in programmes]
+
+
+@dataclass
+class ProgrammeJSONSnapshot:
+    event_slug: str
+    format: str
+    created_at: datetime
+    etag: str
+    content: bytes
+    gzipped_content: bytes
+
+    @staticmethod
+    def get_generation(event: Event) -> int:
+        generation = (
+            ProgrammeJSONSnapshotGeneration.objects.filter(event=event).values_list("generation", flat=True).first()
+        )
+        return generation or 0
+
+    @staticmethod
+    def get_cache_key(event: Event, format: str, generation: int) -> str:
+        return f"programme.json_snapshot:{event.id}:{format}:{generation}"
+
+    @classmethod
+    def build(cls, event: Event, format: str) -> Self:
+        content = json.dumps(get_programme_json(event, format), cls=DjangoJSONEncoder).encode("UTF-8")
+        digest = hashlib.sha256(content).hexdigest()[:32]
+
+        return cls(
+            event_slug=event.slug,
+            format=format,
+            created_at=now(),
+            etag=f'"{digest}"',
+            content=content,
+            gzipped_content=gzip.compress(content),
+        )
+
+    @classmethod
+    def get(cls, event: Event, format: str = "default") -> Self:
+        """
+        Returns the current snapshot of the published programmes of the event in the given format,
+        building it if necessary. Unless the snapshot needs to be built, only its generation is read
+        from the database.
+        """
+        # read before building so that a build racing with a change is stored under the old generation
+        cache_key = cls.get_cache_key(event, format, cls.get_generation(event))
+
+        if snapshot := cache.get(cache_key):
+            return snapshot
+
+        logger.info("Building programme JSON snapshot for %s (%s)", event.slug, format)
+        snapshot = cls.build(event, format)
+        cache.set(cache_key, snapshot, SNAPSHOT_TTL_SECONDS)
+
+        return snapshot
+
+    @classmethod
+    def invalidate(cls, event_slugs: Iterable[str]):
+        """
+        Invalidates the snapshots of the given events. Call in the same transaction as the change:
+        the generations of the events stay locked until it commits.
+        """
+        ProgrammeJSONSnapshotGeneration.increment(list(event_slugs))
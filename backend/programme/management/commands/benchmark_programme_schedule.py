@@ -0,0 +1,170 @@
+from collections import defaultdict
+from datetime import timedelta
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from tabulate import tabulate
+
+from core.models import Event
+
+from ...models import AllRoomsPseudoView, Category, Programme, Room, TimeBlock
+from ...models.schedule import ONE_HOUR
+
+LENGTHS = [60, 60, 120, 60, 180, 240]
+
+
+class NotReally(RuntimeError):
+    pass
+
+
+def get_programmes_by_start_time_per_cell(view: AllRoomsPseudoView):
+    """
+    ViewMethodsMixin.get_programmes_by_start_time as it used to be: the start times are recomputed for the rowspan
+    of every programme, and every empty cell asks the database whether a programme continues there.
+    """
+    results = []
+    prev_start_time = None
+    rooms = view.rooms.all()
+
+    programme_index = defaultdict(lambda: defaultdict(list))
+    programmes = (
+        Programme.objects.filter(
+            category__event=view.event,
+            length__isnull=False,
+            start_time__isnull=False,
+            room__in=rooms,
+            state="published",
+        )
+        .select_related("category__event")
+        .select_related("room")
+        .prefetch_related("tags")
+    )
+    for programme in programmes:
+        programme_index[programme.start_time][programme.room_id].append(programme)
+
+    for start_time in view.start_times():
+        cur_row = []
+
+        incontinuity = prev_start_time and (start_time - prev_start_time > ONE_HOUR)
+        incontinuity = "incontinuity" if incontinuity else ""
+        prev_start_time = start_time
+
+        results.append((start_time, incontinuity, cur_row))
+        for room in rooms:
+            programmes = programme_index[start_time][room.id]
+            if not programmes:
+                if not room.programme_continues_at(start_time, state="published"):
+                    cur_row.append((None, None))
+            else:
+                programme = programmes[0]
+                cur_row.append((programme, view.rowspan(programme)))
+
+    return results
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare building the programme schedule grid cell by cell versus in one sweep. "
+        "Synthetic rooms and programmes are added to the event first. Everything is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--event-slug",
+            metavar="EVENT_SLUG",
+            required=True,
+        )
+        parser.add_argument(
+            "--num-rooms",
+            type=int,
+            default=30,
+            help="Number of synthetic rooms to add to the event (default: 30)",
+        )
+        parser.add_argument(
+            "--num-days",
+            type=int,
+            default=3,
+            help="Number of days of synthetic programme (default: 3)",
+        )
+
+    def handle(self, *args, **options):
+        event = Event.objects.get(slug=options["event_slug"])
+        rows = []
+
+        try:
+            with transaction.atomic():
+                rooms = self.create_programmes(event, options["num_rooms"], options["num_days"])
+                view = AllRoomsPseudoView(event, rooms=Room.objects.filter(id__in=[room.id for room in rooms]))
+
+                results = {}
+                for name, build in [
+                    ("per cell", get_programmes_by_start_time_per_cell),
+                    ("sweep", lambda view: view.get_programmes_by_start_time()),
+                ]:
+                    view.schedule_data = None
+                    with CaptureQueriesContext(connection) as queries:
+                        t0 = perf_counter()
+                        results[name] = build(view)
+                        elapsed = perf_counter() - t0
+
+                    num_cells = sum(len(cells) for _, _, cells in results[name])
+                    rows.append((name, len(results[name]), num_cells, len(queries), f"{elapsed:.2f}"))
+
+                if results["per cell"] != results["sweep"]:
+                    raise AssertionError("The implementations disagree")
+
+                raise NotReally("rollback")
+        except NotReally:
+            pass
+
+        print(tabulate(rows, headers=["implementation", "rows", "cells", "queries", "seconds"]))
+
+    def create_programmes(self, event: Event, num_rooms: int, num_days: int) -> list[Room]:
+        category = Category.objects.filter(event=event).first()
+        if category is None:
+            raise ValueError(f"Event {event.slug} has no programme categories")
+
+        if event.start_time is None:
+            raise ValueError(f"Event {event.slug} has no start time")
+
+        first_day = event.start_time.replace(hour=10, minute=0, second=0, microsecond=0)
+
+        rooms = Room.objects.bulk_create(
+            [Room(event=event, name=f"Benchmark {i}", slug=f"benchmark-{i}") for i in range(num_rooms)]
+        )
+
+        time_blocks = []
+        programmes = []
+        for day in range(num_days):
+            start_time = first_day + timedelta(days=day)
+            end_time = start_time + timedelta(hours=12)
+            time_blocks.append(TimeBlock(event=event, start_time=start_time, end_time=end_time))
+
+            for i, room in enumerate(rooms):
+                t = start_time
+                j = i
+                while t < end_time:
+                    length = LENGTHS[j % len(LENGTHS)]
+                    programmes.append(
+                        Programme(
+                            category=category,
+                            room=room,
+                            title=f"Benchmark {room.name} {t.isoformat()}",
+                            slug=f"benchmark-{room.slug}-{day}-{j}",
+                            start_time=t,
+                            length=length,
+                            end_time=t + timedelta(minutes=length),
+                            state="published",
+                        )
+                    )
+
+                    # leave a gap every now and then
+                    t += timedelta(minutes=length) + ONE_HOUR * (j % 3 == 0)
+                    j += 1
+
+        TimeBlock.objects.bulk_create(time_blocks)
+        Programme.objects.bulk_create(programmes, batch_size=1000)
+
+        return rooms
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.8 on 2026-10-18 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0040_rename_emailverificationtoken_person_state_core_emailv_person__722147_idx_and_more"),
+        ("programme", "0132_tag_public"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProgrammeJSONSnapshotGeneration",
+            fields=[
+                (
+                    "event",
+                    models.OneToOneField(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="programme_json_snapshot_generation",
+                        serialize=False,
+                        to="core.event",
+                    ),
+                ),
+                ("generation", models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -2,6 +2,7 @@ from .alternative_programme_form import AlternativeProgrammeForm, AlternativePro
 from .category import Category
 from .freeform_organizer import FreeformOrganizer
 from .invitation import Invitation
+from .json_snapshot_generation import ProgrammeJSONSnapshotGeneration
 from .programme import START_TIME_LABEL, STATE_CHOICES, Programme
 from .programme_event_meta import ProgrammeEventMeta
 from .programme_feedback import ProgrammeFeedback
@@ -10,6 +11,7 @@ from .role import Role
 from .room import Room
 from .schedule import (
     AllRoomsPseudoView,
+    ScheduleData,
     SpecialStartTime,
     TimeBlock,
     View,
@@ -0,0 +1,36 @@
+from collections.abc import Collection
+
+from django.db import connection, models
+from pkg_resources import resource_string
+
+from core.models import Event
+
+
+class ProgrammeJSONSnapshotGeneration(models.Model):
+    """
+    Incremented in the same transaction as changes to the programme of the event. See programme/json_snapshot.py.
+    """
+
+    # Changes to programmes of an event that is being deleted increment its generation as well,
+    # so the row may outlive the event. Event ids are not reused, so it is only left unused.
+    event = models.OneToOneField(
+        Event,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        primary_key=True,
+        related_name="programme_json_snapshot_generation",
+    )
+    generation = models.PositiveBigIntegerField(default=0)
+
+    INCREMENT_QUERY = resource_string(__name__, "queries/increment_json_snapshot_generations.sql").decode()
+
+    def __str__(self):
+        return f"{self.event_id} {self.generation}"  # type: ignore
+
+    @classmethod
+    def increment(cls, event_slugs: Collection[str]):
+        if not event_slugs:
+            return
+
+        with connection.cursor() as cursor:
+            cursor.execute(cls.INCREMENT_QUERY, dict(event_slugs=list(event_slugs)))
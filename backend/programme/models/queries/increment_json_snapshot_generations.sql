@@ -0,0 +1,8 @@
+-- Increments the programme JSON snapshot generations of the events whose slugs are given (see programme/json_snapshot.py).
+insert into programme_programmejsonsnapshotgeneration (event_id, generation)
+select id, 1
+from core_event
+where slug = any(%(event_slugs)s)
+order by id
+on conflict (event_id) do update set
+  generation = programme_programmejsonsnapshotgeneration.generation + 1;
@@ -1,6 +1,7 @@
 import logging
+from bisect import bisect_left
 from collections import defaultdict
-from datetime import timedelta
+from datetime import datetime, timedelta
 from typing import Any
 
 from dateutil.tz import tzlocal
@@ -46,39 +47,84 @@ class OrderingMixin:
         swappee.save()
 
 
-class ViewMethodsMixin:
-    @property
-    def programmes_by_start_time(self):
-        return self.get_programmes_by_start_time()
-
-    def get_programmes_by_start_time(self, include_unpublished=False, request=None):
-        results = []
-        prev_start_time = None
-        cont_criteria = dict() if include_unpublished else dict(state="published")
-        rooms = self.rooms.all()
+class ScheduleData:
+    """
+    The programmes and start times of an event, loaded once to build the schedule grids of its views
+    (see ViewMethodsMixin.get_programmes_by_start_time). To share one load between several views,
+    set their schedule_data.
+    """
 
+    def __init__(self, event, include_unpublished=False, rooms=None):
         criteria = dict(
-            category__event=self.event,
+            category__event=event,
             length__isnull=False,
             start_time__isnull=False,
-            room__in=rooms,
         )
+        if rooms is not None:
+            criteria.update(room__in=rooms)
         if not include_unpublished:
             criteria.update(state="published")
 
-        # programme_index[start_time][room] = list of programmes
-        # TODO select_related
-        programme_index = defaultdict(lambda: defaultdict(list))
-        programmes = (
+        self.include_unpublished = include_unpublished
+
+        # programmes_by_room[room_id] = programmes ordered by start time
+        self.programmes_by_room: dict[int, list[Programme]] = defaultdict(list)
+        for programme in (
             Programme.objects.filter(**criteria)
-            .select_related("category__event")
-            .select_related("room")
+            .select_related("category__event", "room")
             .prefetch_related("tags")
-        )
-        for programme in programmes:
-            programme_index[programme.start_time][programme.room_id].append(programme)
+            .order_by("start_time", "id")
+        ):
+            self.programmes_by_room[programme.room_id].append(programme)  # type: ignore
 
-        for start_time in self.start_times():
+        self.start_times = self.get_start_times(event)
+
+    @staticmethod
+    def get_start_times(event) -> list[datetime]:
+        result = set(SpecialStartTime.objects.filter(event=event).values_list("start_time", flat=True))
+
+        for start_time, end_time in TimeBlock.objects.filter(event=event).values_list("start_time", "end_time"):
+            cur = start_time
+            while cur <= end_time:
+                result.add(cur)
+                cur += ONE_HOUR
+
+        return sorted(result)
+
+
+class ViewMethodsMixin:
+    schedule_data: ScheduleData | None = None
+
+    @property
+    def programmes_by_start_time(self):
+        return self.get_programmes_by_start_time()
+
+    def get_schedule_data(self, include_unpublished=False) -> ScheduleData:
+        if self.schedule_data is not None and self.schedule_data.include_unpublished == include_unpublished:
+            return self.schedule_data
+
+        return ScheduleData(self.event, include_unpublished=include_unpublished, rooms=self.rooms.all())
+
+    def get_programmes_by_start_time(self, include_unpublished=False, request=None):
+        """
+        Returns the schedule grid as rows of (start_time, incontinuity_css, cells) where each cell is either
+        (programme, rowspan), or (None, None) for an empty slot. Slots covered by a programme that started
+        earlier (rowspan) are left out.
+
+        The grid is built by sweeping the start times in order, keeping track of the latest programme
+        started in each room.
+        """
+        results = []
+        prev_start_time = None
+        data = self.get_schedule_data(include_unpublished)
+        rooms = list(self.rooms.all())
+        start_times = self.filter_start_times(data.start_times)
+
+        # the sweep: index of the first programme not yet started and the latest programme started per room
+        next_index = {room.id: 0 for room in rooms}
+        latest_started: dict[int, Programme] = {}
+
+        for start_time in start_times:
             cur_row = []
 
             incontinuity = prev_start_time and (start_time - prev_start_time > ONE_HOUR)
@@ -87,10 +133,23 @@ class ViewMethodsMixin:
 
             results.append((start_time, incontinuity, cur_row))
             for room in rooms:
-                programmes = programme_index[start_time][room.id]
+                room_programmes = data.programmes_by_room[room.id]
+
+                i = next_index[room.id]
+                while i < len(room_programmes) and room_programmes[i].start_time < start_time:
+                    latest_started[room.id] = room_programmes[i]
+                    i += 1
+                next_index[room.id] = i
+
+                j = i
+                while j < len(room_programmes) and room_programmes[j].start_time == start_time:
+                    j += 1
+                programmes = room_programmes[i:j]
+
                 num_programmes = len(programmes)
                 if num_programmes == 0:
-                    if room.programme_continues_at(start_time, **cont_criteria):
+                    latest = latest_started.get(room.id)
+                    if latest is not None and latest.end_time is not None and start_time < latest.end_time:
                         # programme still continues, handled by rowspan
                         pass
                     else:
@@ -108,19 +167,14 @@ class ViewMethodsMixin:
 
                     programme = programmes[0]
 
-                    rowspan = self.rowspan(programme)
+                    end_time = programme.end_time or programme.start_time
+                    rowspan = bisect_left(start_times, end_time) - bisect_left(start_times, programme.start_time)
                     cur_row.append((programme, rowspan))
 
         return results
 
-    def start_times(self, programme=None):
-        result = [t.start_time for t in SpecialStartTime.objects.filter(event=self.event)]
-
-        for time_block in TimeBlock.objects.filter(event=self.event):
-            cur = time_block.start_time
-            while cur <= time_block.end_time:
-                result.append(cur)
-                cur += ONE_HOUR
+    def filter_start_times(self, start_times, programme=None):
+        result = start_times
 
         if programme:
             result = [i for i in result if programme.start_time <= i < programme.end_time]
@@ -131,7 +185,10 @@ class ViewMethodsMixin:
         if self.end_time:
             result = [i for i in result if i < self.end_time]
 
-        return sorted(set(result))
+        return result
+
+    def start_times(self, programme=None):
+        return self.filter_start_times(ScheduleData.get_start_times(self.event), programme)
 
     def rowspan(self, programme):
         return len(self.start_times(programme=programme))
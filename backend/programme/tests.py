@@ -1,15 +1,18 @@
+import gzip
 from datetime import datetime, timedelta
 
 import pytest
 from dateutil.tz import tzlocal
+from django.core.cache import cache
 from django.test import TestCase
 from django.utils.timezone import now
 
 from access.models import EmailAliasDomain, GroupPrivilege, InternalEmailAlias, Privilege, SlackAccess
+from core.utils import url
 from labour.models import Signup
 from mailings.models import Message, PersonMessage, RecipientGroup
 
-from .models import Programme, ProgrammeEventMeta, ProgrammeRole
+from .models import AllRoomsPseudoView, Programme, ProgrammeEventMeta, ProgrammeRole, TimeBlock
 from .utils import next_full_hour
 
 
@@ -141,6 +144,67 @@ class ProgrammeTestCase(TestCase):
         assert not Programme.get_future_programmes(person).exists()
         assert Programme.get_past_programmes(person).exists()
 
+    def test_programmes_by_start_time(self):
+        t = datetime(2024, 7, 13, 10, 0, 0, tzinfo=tzlocal())
+
+        first, unused = Programme.get_or_create_dummy(title="First")
+        event = first.category.event
+        TimeBlock.objects.create(event=event, start_time=t, end_time=t + timedelta(hours=4))
+
+        first.start_time = t
+        first.length = 120
+        first.save()
+
+        second, unused = Programme.get_or_create_dummy(title="Second")
+        second.start_time = t + timedelta(hours=3)
+        second.length = 60
+        second.save()
+
+        unpublished, unused = Programme.get_or_create_dummy(title="Unpublished", state="accepted")
+        unpublished.start_time = t + timedelta(hours=2)
+        unpublished.length = 60
+        unpublished.save()
+
+        rows = AllRoomsPseudoView(event).get_programmes_by_start_time()
+        assert [(start_time, cells) for start_time, _, cells in rows] == [
+            (t, [(first, 2)]),
+            (t + timedelta(hours=1), []),
+            (t + timedelta(hours=2), [(None, None)]),
+            (t + timedelta(hours=3), [(second, 1)]),
+            (t + timedelta(hours=4), [(None, None)]),
+        ]
+
+        rows = AllRoomsPseudoView(event).get_programmes_by_start_time(include_unpublished=True)
+        assert rows[2][2] == [(unpublished, 1)]
+
+    def test_json_view_snapshot(self):
+        cache.clear()
+
+        programme, unused = Programme.get_or_create_dummy()
+        event = programme.category.event
+        json_url = url("programme:json_view", event.slug)
+
+        response = self.client.get(json_url)
+        assert response.status_code == 200
+        assert [item["title"] for item in response.json()] == [programme.title]
+        etag = response["ETag"]
+
+        response = self.client.get(json_url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+        response = self.client.get(json_url, headers={"Accept-Encoding": "gzip"})
+        assert response["Content-Encoding"] == "gzip"
+        assert response["ETag"] != etag
+        assert gzip.decompress(response.content) == self.client.get(json_url).content
+
+        # changes invalidate the snapshot right away, without waiting for the transaction to commit
+        programme.title = "Renamed programme"
+        programme.save()
+
+        response = self.client.get(json_url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert [item["title"] for item in response.json()] == ["Renamed programme"]
+
 
 @pytest.mark.django_db
 def test_programme_mass_messages():
@@ -2,6 +2,8 @@ from django.contrib.auth.decorators import user_passes_test
 from django.http import HttpResponse
 from django.shortcuts import render
 from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
 from django.utils.translation import gettext_lazy as _
 from django.views.decorators.cache import cache_control, cache_page
 from django.views.decorators.http import require_safe
@@ -12,7 +14,11 @@ from core.tabs import Tab
 from core.utils import url
 
 from ..helpers import group_programmes_by_start_time, programme_event_required, public_programme_required
-from ..models import AllRoomsPseudoView, Category, Programme, Room, View
+from ..json_snapshot import ProgrammeJSONSnapshot, get_programme_json
+from ..models import AllRoomsPseudoView, Category, Room, ScheduleData, View
+
+# clients and proxies may reuse the programme JSON for this long without revalidating
+JSON_MAX_AGE_SECONDS = 60
 
 
 def get_schedule_tabs(request, event):
@@ -104,10 +110,15 @@ def actual_schedule_view(
     if not internal_programmes:
         query.update(public=True)
 
-    views = View.objects.filter(**query)
+    views = list(View.objects.filter(**query))
     rooms = Room.objects.filter(view_rooms__view__in=views).distinct()
     all_rooms = AllRoomsPseudoView(event, rooms=rooms)
 
+    # load the programmes once for all views
+    all_rooms.schedule_data = ScheduleData(event, rooms=rooms)
+    for view in views:
+        view.schedule_data = all_rooms.schedule_data
+
     vars.update(
         event=event,
         views=views,
@@ -227,21 +238,33 @@ def plaintext_view(request, event):
 @require_safe
 @api_view
 def json_view(request, event, format="default", include_unpublished=False):
-    criteria = dict(category__event=event)
-
-    if not include_unpublished:
-        criteria.update(state="published")
-
-    programmes = (
-        Programme.objects.filter(**criteria)
-        .select_related("category__event")
-        .select_related("room")
-        .prefetch_related("tags")
-        # Does not do the needful due to formatted_organizers operating on the "through" model
-        # .prefetch_related('organizers')
-    )
+    """
+    Served from the programme JSON snapshot with ETag and Last-Modified support,
+    gzipped if the client accepts it.
+    """
+    if include_unpublished:
+        return get_programme_json(event, format, include_unpublished=True)
+
+    snapshot = ProgrammeJSONSnapshot.get(event, format)
+    gzipped = "gzip" in request.headers.get("accept-encoding", "")
+    etag = f'{snapshot.etag[:-1]}-gzip"' if gzipped else snapshot.etag
+    last_modified = int(snapshot.created_at.timestamp())
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = HttpResponse(
+            snapshot.gzipped_content if gzipped else snapshot.content,
+            content_type="application/json",
+        )
+        if gzipped:
+            response["Content-Encoding"] = "gzip"
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    patch_vary_headers(response, ["Accept-Encoding"])
+    patch_cache_control(response, public=True, max_age=JSON_MAX_AGE_SECONDS)
 
-    return [programme.as_json(format=format) for programme in programmes]
+    return response
 
 
 def programme_profile_menu_items(request):
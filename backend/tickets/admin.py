@@ -43,6 +43,7 @@ class LimitGroupAdmin(admin.ModelAdmin):
     )
 
     list_filter = ("event",)
+    readonly_fields = ("cached_amount_sold", "cached_amount_reserved")
 
 
 class CustomerInline(admin.StackedInline):
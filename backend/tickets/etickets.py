@@ -0,0 +1,211 @@
+"""
+Rendering of electronic tickets (PDF) of orders.
+
+Rendering an order used to create a fresh lippukala OrderPrinter that loaded and decoded the logo
+of the event from print_logo_path for every PDF. Here the decoded logo is shared by all PDFs
+rendered in the same process, and the rendered PDF is stored (RenderedETickets) so that it does
+not need to be rendered again for re-downloads or repeated confirmation messages.
+
+A stored PDF is valid as long as the code set hash of the order stays the same. The hash covers
+everything that ends up in the PDF: the codes and their statuses, the texts of the Lippukala order
+and the logo settings (including the modification time of the logo file).
+
+For payment confirmations in bulk, the PDFs of a batch of orders are rendered before the messages
+are sent (see the orders_send_confirmation_messages task). To (re)render all tickets of an event
+ahead of time, use the tickets_render_etickets management command which renders in a process pool.
+"""
+
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from itertools import batched
+
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+
+from core.models import Event
+
+from .models import Order, RenderedETickets
+
+logger = logging.getLogger("kompassi")
+
+
+@lru_cache(maxsize=32)
+def _get_print_logo(path: str, mtime: float):
+    from reportlab.lib.utils import ImageReader
+
+    reader = ImageReader(path)
+    # decode now so that the decoded image is what gets cached
+    reader.getRGBData()
+    return reader
+
+
+def get_print_logo(path: str):
+    """
+    Returns the logo as an ImageReader shared by all PDFs rendered in this process.
+    If the logo cannot be read, returns the path and lets the printer deal with it as before.
+    """
+    if not path:
+        return path
+
+    try:
+        return _get_print_logo(path, os.stat(path).st_mtime)
+    except OSError:
+        logger.warning("Could not read e-ticket logo %s", path)
+        return path
+
+
+def get_print_logo_mtime(path: str) -> float | None:
+    try:
+        return os.stat(path).st_mtime if path else None
+    except OSError:
+        return None
+
+
+def get_code_set_hash(order: Order, lippukala_order) -> str:
+    from lippukala.models import Code
+
+    meta = order.event.tickets_event_meta
+    codes = list(
+        Code.objects.filter(order=lippukala_order)
+        .order_by("id")
+        .values_list("full_code", "literate_code", "product_text", "status")
+    )
+    content = json.dumps(
+        [
+            lippukala_order.reference_number,
+            lippukala_order.address_text,
+            lippukala_order.free_text,
+            meta.print_logo_path,
+            get_print_logo_mtime(meta.print_logo_path),
+            meta.print_logo_size_cm,
+            codes,
+        ]
+    )
+    return hashlib.sha256(content.encode("UTF-8")).hexdigest()
+
+
+def render_etickets_pdf(order: Order, lippukala_order) -> bytes:
+    from lippukala.printing import OrderPrinter
+
+    meta = order.event.tickets_event_meta
+
+    printer = OrderPrinter(
+        print_logo_path=get_print_logo(meta.print_logo_path),
+        print_logo_size_cm=meta.print_logo_size_cm,
+    )
+    printer.process_order(lippukala_order)
+
+    return printer.finish()
+
+
+def _store(order: Order, code_set_hash: str, pdf: bytes, rendered: RenderedETickets | None):
+    """
+    Stores the rendered PDF, replacing the previous one. Failing to store is not fatal: the PDF will be rendered
+    again next time.
+    """
+    old_name = rendered.pdf.name if rendered is not None else None
+    if rendered is None:
+        rendered = RenderedETickets(order=order)
+
+    try:
+        with transaction.atomic():
+            rendered.code_set_hash = code_set_hash
+            rendered.pdf.save(f"{order.id}-{code_set_hash[:16]}.pdf", ContentFile(pdf), save=False)
+            rendered.save()
+    except Exception:
+        logger.exception("Failed to store electronic tickets of order %s", order.id)
+        return
+
+    if old_name and old_name != rendered.pdf.name:
+        rendered.pdf.storage.delete(old_name)
+
+
+def get_etickets_pdf(order: Order, force: bool = False) -> bytes:
+    """
+    Returns the electronic tickets of the order as PDF, rendering them only if the codes have changed since
+    they were last rendered (or force is set).
+    """
+    lippukala_order = order.lippukala_order
+    if lippukala_order is None:
+        raise ValueError(f"Order {order.id}: No electronic tickets")
+
+    code_set_hash = get_code_set_hash(order, lippukala_order)
+    rendered = RenderedETickets.objects.filter(order=order).first()
+
+    if not force and rendered is not None and rendered.code_set_hash == code_set_hash:
+        try:
+            with rendered.pdf.open("rb") as pdf_file:
+                return pdf_file.read()
+        except OSError:
+            logger.warning("Stored electronic tickets of order %s missing, rendering again", order.id)
+
+    pdf = render_etickets_pdf(order, lippukala_order)
+    _store(order, code_set_hash, pdf, rendered)
+
+    return pdf
+
+
+def render_etickets_for_orders(order_ids: Sequence[int], force: bool = False) -> int:
+    """
+    Makes sure the electronic tickets of the given orders are rendered and stored.
+    Orders without electronic tickets are skipped. Returns the number of orders processed.
+    """
+    orders = Order.objects.filter(id__in=order_ids).select_related("event__tickets_event_meta").order_by("id")
+
+    num_orders = 0
+    for order in orders:
+        if not order.contains_electronic_tickets or order.lippukala_order is None:
+            continue
+
+        get_etickets_pdf(order, force=force)
+        num_orders += 1
+
+    return num_orders
+
+
+def get_order_ids_with_etickets(event: Event) -> list[int]:
+    return list(
+        Order.objects.filter(
+            event=event,
+            payment_date__isnull=False,
+            cancellation_time__isnull=True,
+            order_product_set__count__gt=0,
+            order_product_set__product__electronic_ticket=True,
+        )
+        .order_by("id")
+        .values_list("id", flat=True)
+        .distinct()
+    )
+
+
+def render_etickets_in_parallel(
+    order_ids: Sequence[int],
+    processes: int | None = None,
+    batch_size: int = 50,
+    force: bool = False,
+) -> Iterator[int]:
+    """
+    Renders the electronic tickets of the given orders in a pool of worker processes.
+    Yields the number of orders processed per batch as batches complete.
+    """
+    batches = [list(batch) for batch in batched(order_ids, batch_size)]
+    render = partial(render_etickets_for_orders, force=force)
+
+    if processes == 1:
+        yield from map(render, batches)
+        return
+
+    # the forked workers must not share the database connections of the parent
+    connections.close_all()
+
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context("fork"),
+    ) as executor:
+        yield from executor.map(render, batches)
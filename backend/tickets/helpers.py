@@ -71,6 +71,7 @@ def destroy_order(request, event):
     if order.is_confirmed:
         order.cancel(send_email=False)
     else:
+        order.release_products()
         if order.customer:
             order.customer.delete()
         order.order_product_set.all().delete()
@@ -0,0 +1,264 @@
+"""
+Ticket inventory: counters of products sold and reserved per LimitGroup.
+
+LimitGroup.cached_amount_sold and cached_amount_reserved are kept up to date with conditional
+updates (UPDATE ... WHERE sold + reserved + n <= limit) when orders are confirmed, cancelled or
+uncancelled and when products are reserved or reservations released. This way showing
+availability does not need to aggregate over all orders, and concurrent sales cannot oversell
+a limit group: the row lock taken by the UPDATE serializes them and the condition is evaluated
+against the latest committed counters.
+
+Reservations hold products for an unconfirmed order while the customer is completing it. Expired
+reservations of a limit group are released whenever products are taken from it (see update_counters),
+so they never make products unavailable. The release_expired_reservations task (see
+CELERY_BEAT_SCHEDULE) releases the rest so that the reported availability stays accurate.
+
+If the counters ever drift (eg. confirmed orders are edited or deleted in the admin),
+reconcile_limit_groups re-derives them from OrderProduct and LimitGroupReservation
+(see the reconcile_ticket_inventory management command).
+
+Limit group rows are always updated in ascending id order to avoid deadlocks.
+"""
+
+import logging
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from django.db import models, transaction
+from django.utils.timezone import now
+
+from .models import LimitGroup, LimitGroupReservation, Order, OrderProduct, Product
+from .models.consts import RESERVATION_SECONDS
+
+logger = logging.getLogger("kompassi")
+
+# limit group id -> amount of products
+Counts = Counter[int]
+
+
+class SoldOut(RuntimeError):
+    def __init__(self, limit_group_id: int):
+        super().__init__(f"Limit group {limit_group_id} does not have enough products available")
+        self.limit_group_id = limit_group_id
+
+
+def get_counts(product_counts: Iterable[tuple[Product, int]]) -> Counts:
+    """
+    Given (product, count) pairs, returns how many products would be taken from each limit group.
+    """
+    counts = Counts()
+    for product, count in product_counts:
+        if count <= 0:
+            continue
+        for limit_group_id in product.limit_groups.values_list("id", flat=True):
+            counts[limit_group_id] += count
+    return counts
+
+
+def get_order_counts(order: Order) -> Counts:
+    counts = Counts()
+    for limit_group_id, count in OrderProduct.objects.filter(
+        order=order,
+        count__gt=0,
+        product__limit_groups__isnull=False,
+    ).values_list("product__limit_groups", "count"):
+        counts[limit_group_id] += count
+    return counts
+
+
+def update_counters(sold: Counts, reserved: Counts):
+    """
+    Adds the given (possibly negative) amounts to the counters of the limit groups.
+    Expired reservations of the limit groups products are taken from are released first.
+    If this would take any of them over its limit, nothing is changed and SoldOut is raised.
+    """
+    t = now()
+
+    with transaction.atomic():
+        for limit_group_id in sorted(sold.keys() | reserved.keys()):
+            sold_delta = sold[limit_group_id]
+            reserved_delta = reserved[limit_group_id]
+            if not sold_delta and not reserved_delta:
+                continue
+
+            limit_groups = LimitGroup.objects.filter(id=limit_group_id)
+            if sold_delta + reserved_delta > 0:
+                for reservation in _take_expired_reservations(
+                    LimitGroupReservation.objects.filter(limit_group_id=limit_group_id),
+                    t,
+                ):
+                    reserved_delta -= reservation.count
+
+                limit_groups = limit_groups.filter(
+                    limit__gte=models.F("cached_amount_sold")
+                    + models.F("cached_amount_reserved")
+                    + (sold_delta + reserved_delta)
+                )
+
+            if not limit_groups.update(
+                cached_amount_sold=models.F("cached_amount_sold") + sold_delta,
+                cached_amount_reserved=models.F("cached_amount_reserved") + reserved_delta,
+            ):
+                raise SoldOut(limit_group_id)
+
+
+def _take_reservations(order: Order) -> Counts:
+    """
+    Deletes the reservations of the order and returns what they held. Must be called in a transaction.
+    The reservations are locked first so that release_expired_reservations cannot release them too.
+    """
+    reservations = list(order.limit_group_reservations.select_for_update())
+    LimitGroupReservation.objects.filter(id__in=[reservation.id for reservation in reservations]).delete()
+    return Counts({reservation.limit_group_id: reservation.count for reservation in reservations})  # type: ignore
+
+
+def _take_expired_reservations(
+    reservations: models.QuerySet[LimitGroupReservation],
+    t: datetime,
+) -> list[LimitGroupReservation]:
+    """
+    Deletes and returns the expired ones of the given reservations. Must be called in a transaction.
+    Reservations being confirmed or released concurrently are skipped.
+    """
+    expired = list(reservations.filter(valid_until__lte=t).select_for_update(skip_locked=True))
+    if expired:
+        LimitGroupReservation.objects.filter(id__in=[reservation.id for reservation in expired]).delete()
+    return expired
+
+
+def reserve(
+    order: Order,
+    product_counts: Iterable[tuple[Product, int]] | None = None,
+    seconds: int = RESERVATION_SECONDS,
+) -> datetime:
+    """
+    Replaces the reservations of the order with ones for the given products (default: the products
+    of the order) valid for the given time. Raises SoldOut if they are not available.
+    """
+    if order.pk is None:
+        raise ValueError("Order must be saved to reserve products")
+
+    new_counts = get_counts(product_counts) if product_counts is not None else get_order_counts(order)
+    valid_until = now() + timedelta(seconds=seconds)
+
+    with transaction.atomic():
+        old_counts = _take_reservations(order)
+
+        reserved = Counts(new_counts)
+        reserved.subtract(old_counts)
+        update_counters(Counts(), reserved)
+
+        LimitGroupReservation.objects.bulk_create(
+            [
+                LimitGroupReservation(
+                    order=order,
+                    limit_group_id=limit_group_id,
+                    count=count,
+                    valid_until=valid_until,
+                )
+                for limit_group_id, count in new_counts.items()
+            ]
+        )
+
+    return valid_until
+
+
+def release(order: Order):
+    with transaction.atomic():
+        reserved = _take_reservations(order)
+        update_counters(Counts(), Counts({limit_group_id: -count for limit_group_id, count in reserved.items()}))
+
+
+def sell(order: Order):
+    """
+    Takes the products of the order from inventory, consuming its reservations.
+    Raises SoldOut if they are not available.
+    """
+    with transaction.atomic():
+        reserved = _take_reservations(order)
+        update_counters(
+            get_order_counts(order),
+            Counts({limit_group_id: -count for limit_group_id, count in reserved.items()}),
+        )
+
+
+def unsell(order: Order):
+    """
+    Returns the products of the order to inventory.
+    """
+    sold = get_order_counts(order)
+    update_counters(Counts({limit_group_id: -count for limit_group_id, count in sold.items()}), Counts())
+
+
+def release_expired_reservations(t: datetime | None = None) -> int:
+    """
+    Releases reservations that have expired. Returns the number of reservations released.
+    Reservations being confirmed or released concurrently are skipped.
+    """
+    if t is None:
+        t = now()
+
+    with transaction.atomic():
+        reservations = _take_expired_reservations(LimitGroupReservation.objects.all(), t)
+        if not reservations:
+            return 0
+
+        reserved = Counts()
+        for reservation in reservations:
+            reserved[reservation.limit_group_id] -= reservation.count  # type: ignore
+
+        update_counters(Counts(), reserved)
+
+    logger.info("Released %d expired ticket reservations", len(reservations))
+    return len(reservations)
+
+
+@dataclass
+class ReconcileResult:
+    limit_group: LimitGroup
+    cached_amount_sold: int
+    amount_sold: int
+    cached_amount_reserved: int
+    amount_reserved: int
+
+    @property
+    def is_changed(self):
+        return self.cached_amount_sold != self.amount_sold or self.cached_amount_reserved != self.amount_reserved
+
+
+def reconcile_limit_groups(limit_groups: models.QuerySet[LimitGroup], dry_run: bool = False) -> list[ReconcileResult]:
+    """
+    Re-derives the counters of the given limit groups from orders and reservations.
+    The limit groups are locked for the duration so that no sales happen in between.
+    """
+    results = []
+
+    with transaction.atomic():
+        for limit_group in limit_groups.select_for_update().order_by("id"):
+            result = ReconcileResult(
+                limit_group=limit_group,
+                cached_amount_sold=limit_group.cached_amount_sold,
+                amount_sold=limit_group.get_amount_sold_from_orders(),
+                cached_amount_reserved=limit_group.cached_amount_reserved,
+                amount_reserved=limit_group.get_amount_reserved_from_reservations(),
+            )
+            results.append(result)
+
+            if result.is_changed:
+                logger.warning(
+                    "Limit group %s counters drifted: sold %d -> %d, reserved %d -> %d",
+                    limit_group.id,
+                    result.cached_amount_sold,
+                    result.amount_sold,
+                    result.cached_amount_reserved,
+                    result.amount_reserved,
+                )
+
+                if not dry_run:
+                    limit_group.cached_amount_sold = result.amount_sold
+                    limit_group.cached_amount_reserved = result.amount_reserved
+                    limit_group.save(update_fields=["cached_amount_sold", "cached_amount_reserved"])
+
+    return results
@@ -0,0 +1,194 @@
+"""
+Bulk minting of Lippukala codes (electronic tickets).
+
+Code.save() looks for an unused code with one query per code, so creating codes one by one
+takes several round trips per ticket. Here the codes of many orders are minted in one
+transaction: unused code numbers are allocated up front (one query per round of candidates),
+Lippukala orders and codes are created with bulk_create.
+
+Minting is idempotent: only the codes an order is missing are created. This makes it safe to
+(re)issue codes for whole events (see the tickets_issue_lippukala_codes management command).
+Codes are matched to products by their title (product_text). If an order has codes with titles
+none of its products have any more (eg. a product was renamed), no codes are minted for it and
+a warning is logged instead, as there is no telling which of its codes are missing.
+
+The literate code is generated with a private method of Lippukala, as Code.save() does. Its
+version is pinned in requirements.in, and if the method goes missing, codes are saved one by one.
+"""
+
+import logging
+import secrets
+from collections import Counter, defaultdict
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+
+from .models import Order, OrderProduct
+
+logger = logging.getLogger("kompassi")
+
+# attempts at minting a batch of codes if a concurrent minter takes the same code numbers
+MAX_ATTEMPTS = 3
+
+
+def _generate_code() -> str:
+    n_digits = settings.LIPPUKALA_CODE_MIN_N_DIGITS + secrets.randbelow(
+        settings.LIPPUKALA_CODE_MAX_N_DIGITS - settings.LIPPUKALA_CODE_MIN_N_DIGITS + 1
+    )
+    # no leading zeroes
+    return str(10 ** (n_digits - 1) + secrets.randbelow(9 * 10 ** (n_digits - 1)))
+
+
+def allocate_codes(num_codes: int) -> list[str]:
+    """
+    Returns num_codes distinct code numbers that are not in use.
+    """
+    from lippukala.models import Code
+
+    codes: set[str] = set()
+    while len(codes) < num_codes:
+        candidates = {_generate_code() for _ in range(2 * (num_codes - len(codes)))} - codes
+        taken = set(Code.objects.filter(code__in=candidates).values_list("code", flat=True))
+        codes.update(candidates - taken)
+
+    return list(codes)[:num_codes]
+
+
+def can_prepare_codes() -> bool:
+    from lippukala.models import Code
+
+    return callable(getattr(Code, "_generate_literate_code", None))
+
+
+def prepare_code(code):
+    """
+    Populates the fields Code.save() would, as bulk_create does not call it. Check can_prepare_codes first.
+    """
+    code.full_code = f"{code.prefix}{code.code}"
+    code.literate_code = code._generate_literate_code()
+
+
+def get_expected_codes(orders: Sequence[Order]) -> dict[int, Counter[str]]:
+    """
+    Returns order id -> product text -> number of codes the order should have.
+    """
+    expected: dict[int, Counter[str]] = defaultdict(Counter)
+
+    for order_id, title, name, count, tickets_per_product in OrderProduct.objects.filter(
+        order__in=orders,
+        count__gt=0,
+        product__electronic_ticket=True,
+    ).values_list(
+        "order_id",
+        "product__override_electronic_ticket_title",
+        "product__name",
+        "count",
+        "product__electronic_tickets_per_product",
+    ):
+        # see Product.electronic_ticket_title
+        expected[order_id][title or name] += count * tickets_per_product
+
+    return expected
+
+
+def create_codes_for_orders(orders: Sequence[Order]) -> int:
+    """
+    Creates the missing Lippukala orders and codes of the given (paid) orders.
+    Returns the number of codes created.
+    """
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            with transaction.atomic():
+                return _create_codes_for_orders(orders)
+        except IntegrityError:
+            # a concurrent minter took some of our code numbers
+            if attempt == MAX_ATTEMPTS:
+                raise
+            logger.warning("Code number collision when minting Lippukala codes, retrying")
+
+    raise AssertionError("unreachable")
+
+
+def _create_codes_for_orders(orders: Sequence[Order]) -> int:
+    from lippukala.models import Code
+    from lippukala.models import Order as LippukalaOrder
+
+    expected = get_expected_codes(orders)
+    orders = [order for order in orders if order.id in expected]
+    if not orders:
+        return 0
+
+    for order in orders:
+        if not order.customer:
+            raise ValueError(f"Order {order.id}: Customer must be set")
+
+    # lippukala orders are matched by reference number
+    lippukala_orders = {
+        lippukala_order.reference_number: lippukala_order
+        for lippukala_order in LippukalaOrder.objects.filter(
+            reference_number__in=[order.reference_number for order in orders]
+        )
+    }
+    ticket_free_texts = {}
+    new_lippukala_orders = []
+    for order in orders:
+        if order.reference_number in lippukala_orders:
+            continue
+
+        if order.event_id not in ticket_free_texts:
+            ticket_free_texts[order.event_id] = order.event.tickets_event_meta.ticket_free_text
+
+        lippukala_order = LippukalaOrder(
+            reference_number=order.reference_number,
+            event=order.event.slug,
+            address_text=order.customer.name,  # type: ignore
+            free_text=ticket_free_texts[order.event_id],
+        )
+        lippukala_orders[order.reference_number] = lippukala_order
+        new_lippukala_orders.append(lippukala_order)
+
+    LippukalaOrder.objects.bulk_create(new_lippukala_orders)
+
+    existing: dict[int, Counter[str]] = defaultdict(Counter)
+    for lippukala_order_id, product_text, num_codes in (
+        Code.objects.filter(order__in=[lippukala_orders[order.reference_number] for order in orders])
+        .values("order_id", "product_text")
+        .annotate(num_codes=models.Count("id"))
+        .values_list("order_id", "product_text", "num_codes")
+    ):
+        existing[lippukala_order_id][product_text] = num_codes
+
+    codes = []
+    for order in orders:
+        lippukala_order = lippukala_orders[order.reference_number]
+        prefix = order.lippukala_prefix
+
+        if unknown_texts := set(existing[lippukala_order.id]) - set(expected[order.id]):
+            logger.warning(
+                "Order %s has codes for %s, which it has no products for (renamed?). Not creating codes for it.",
+                order.reference_number,
+                ", ".join(sorted(unknown_texts)),
+            )
+            continue
+
+        for product_text, num_codes in expected[order.id].items():
+            for _i in range(num_codes - existing[lippukala_order.id][product_text]):
+                codes.append(Code(order=lippukala_order, prefix=prefix, product_text=product_text))
+
+    bulk = can_prepare_codes()
+    if not bulk:
+        logger.warning("Code._generate_literate_code is missing (Lippukala upgraded?), saving codes one by one")
+
+    for code, code_number in zip(codes, allocate_codes(len(codes)), strict=True):
+        code.code = code_number
+        if bulk:
+            prepare_code(code)
+        else:
+            code.save()
+
+    if bulk:
+        Code.objects.bulk_create(codes, batch_size=1000)
+
+    logger.info("Created %d Lippukala codes for %d orders", len(codes), len(orders))
+    return len(codes)
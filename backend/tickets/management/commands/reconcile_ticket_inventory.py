@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+from tabulate import tabulate
+
+from ...inventory import reconcile_limit_groups, release_expired_reservations
+from ...models import LimitGroup
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-derive the sold and reserved counters of limit groups from orders and reservations. "
+        "Expired reservations are released first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "event_slugs",
+            nargs="*",
+            metavar="EVENT_SLUG",
+            help="Limit groups of these events only (default: all events)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            default=False,
+            help="Only report drifted counters",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            default=False,
+            help="Report all limit groups, not only drifted ones",
+        )
+
+    def handle(self, *args, **options):
+        if not options["dry_run"]:
+            release_expired_reservations()
+
+        limit_groups = LimitGroup.objects.all()
+        if event_slugs := options["event_slugs"]:
+            limit_groups = limit_groups.filter(event__slug__in=event_slugs)
+
+        results = reconcile_limit_groups(limit_groups, dry_run=options["dry_run"])
+
+        print(
+            tabulate(
+                [
+                    (
+                        result.limit_group.event.slug,
+                        result.limit_group.description,
+                        result.limit_group.limit,
+                        result.cached_amount_sold,
+                        result.amount_sold,
+                        result.cached_amount_reserved,
+                        result.amount_reserved,
+                    )
+                    for result in results
+                    if options["all"] or result.is_changed
+                ],
+                headers=["event", "limit group", "limit", "sold (cached)", "sold", "reserved (cached)", "reserved"],
+            )
+        )
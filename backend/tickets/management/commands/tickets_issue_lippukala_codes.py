@@ -0,0 +1,59 @@
+from itertools import batched
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Event
+
+from ...lippukala_codes import create_codes_for_orders
+from ...models import Order
+
+
+class Command(BaseCommand):
+    help = (
+        "Create missing Lippukala codes (electronic tickets) for paid orders of an event in batches. "
+        "Orders that already have all their codes are left untouched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "event_slug",
+            metavar="EVENT_SLUG",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of orders per transaction (default: 500)",
+        )
+
+    def handle(self, *args, **options):
+        if "lippukala" not in settings.INSTALLED_APPS:
+            raise CommandError("lippukala is not installed")
+
+        event = Event.objects.get(slug=options["event_slug"])
+        order_ids = list(
+            Order.objects.filter(
+                event=event,
+                payment_date__isnull=False,
+                cancellation_time__isnull=True,
+                order_product_set__count__gt=0,
+                order_product_set__product__electronic_ticket=True,
+            )
+            .order_by("id")
+            .values_list("id", flat=True)
+            .distinct()
+        )
+
+        num_orders_done = 0
+        num_codes_created = 0
+        for batch in batched(order_ids, options["batch_size"]):
+            orders = list(Order.objects.filter(id__in=batch).select_related("event", "customer").order_by("id"))
+            num_codes_created += create_codes_for_orders(orders)
+            num_orders_done += len(orders)
+
+            self.stdout.write(
+                f"{num_orders_done}/{len(order_ids)} orders processed, {num_codes_created} codes created so far"
+            )
+
+        self.stdout.write(f"Done. {num_codes_created} codes created for {len(order_ids)} orders.")
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Event
+
+from ...sales_rollup import refresh_sales_rollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the ticket sales statistics rollup from orders and Lippukala codes. "
+        "Use to backfill and after editing paid orders or product prices outside the tickets admin and Django admin."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "event_slugs",
+            nargs="*",
+            metavar="EVENT_SLUG",
+            help="Only these events (default: all events with ticket sales)",
+        )
+
+    def handle(self, *args, **options):
+        events = Event.objects.filter(ticketseventmeta__isnull=False).order_by("id")
+        if event_slugs := options["event_slugs"]:
+            events = events.filter(slug__in=event_slugs)
+
+        # one transaction per event to keep locks short
+        for event in events:
+            refresh_sales_rollup([event.id])
+            self.stdout.write(f"{event.slug}: done")
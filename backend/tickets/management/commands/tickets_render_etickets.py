@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Event
+
+from ...etickets import get_order_ids_with_etickets, render_etickets_in_parallel
+
+
+class Command(BaseCommand):
+    help = (
+        "Render and store the electronic tickets of paid orders of an event, eg. ahead of sending them "
+        "or after reissuing codes. Tickets whose codes have not changed since last rendered are left untouched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "event_slug",
+            metavar="EVENT_SLUG",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=None,
+            help="Number of worker processes (default: number of CPUs)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50,
+            help="Number of orders per worker task (default: 50)",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            default=False,
+            help="Render all tickets again even if their codes have not changed",
+        )
+
+    def handle(self, *args, **options):
+        if "lippukala" not in settings.INSTALLED_APPS:
+            raise CommandError("lippukala is not installed")
+
+        event = Event.objects.get(slug=options["event_slug"])
+        order_ids = get_order_ids_with_etickets(event)
+
+        num_orders_done = 0
+        for num_batches_done, num_orders in enumerate(
+            render_etickets_in_parallel(
+                order_ids,
+                processes=options["processes"],
+                batch_size=options["batch_size"],
+                force=options["force"],
+            ),
+            start=1,
+        ):
+            num_orders_done += num_orders
+            num_orders_seen = min(num_batches_done * options["batch_size"], len(order_ids))
+            self.stdout.write(f"{num_orders_seen}/{len(order_ids)} orders processed")
+
+        self.stdout.write(f"Done. Electronic tickets of {num_orders_done} orders are up to date.")
@@ -0,0 +1,70 @@
+"""
+Metrics of ticket sales. Orders are counted as they are confirmed and paid. Tickets sold and used
+(Lippukala codes) are read from the sales rollup (see tickets/sales_rollup.py) at scrape time.
+"""
+
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import models
+from django.utils.timezone import now
+
+from metrics.registry import Gauge, collector, shared_counter
+
+from .models import SalesRollup
+from .sales_rollup import refresh_recent_arrivals_on_read
+
+SALES_CACHE_KEY = "tickets.metrics_sales"
+SALES_CACHE_SECONDS = 60
+
+# sales of events that ended longer ago than this are not reported
+SALES_MAX_AGE = timedelta(days=1)
+
+orders_confirmed = shared_counter(
+    "kompassi_tickets_orders_confirmed_total",
+    "Number of ticket orders confirmed",
+    ["event"],
+)
+orders_paid = shared_counter(
+    "kompassi_tickets_orders_paid_total",
+    "Number of ticket orders paid",
+    ["event"],
+)
+
+
+def get_sales() -> list[tuple[str, int, int]]:
+    """
+    Returns (event slug, tickets sold, tickets used) of current and upcoming events.
+    """
+    return list(
+        SalesRollup.objects.filter(event__end_time__gte=now() - SALES_MAX_AGE)
+        .values("event__slug")
+        .annotate(tickets_sold=models.Sum("tickets_sold"), arrivals=models.Sum("arrivals"))
+        .values_list("event__slug", "tickets_sold", "arrivals")
+        .order_by("event__slug")
+    )
+
+
+@collector
+def collect_sales():
+    sales = cache.get(SALES_CACHE_KEY)
+    if sales is None:
+        refresh_recent_arrivals_on_read()
+        sales = get_sales()
+        cache.set(SALES_CACHE_KEY, sales, SALES_CACHE_SECONDS)
+
+    tickets_sold = Gauge(
+        "kompassi_tickets_sold",
+        "Number of tickets sold to current and upcoming events",
+        ["event"],
+    )
+    tickets_used = Gauge(
+        "kompassi_tickets_used",
+        "Number of electronic tickets (Lippukala codes) used in current and upcoming events",
+        ["event"],
+    )
+    for event_slug, num_sold, num_used in sales:
+        tickets_sold.set(num_sold, event=event_slug)
+        tickets_used.set(num_used, event=event_slug)
+
+    return [tickets_sold, tickets_used]
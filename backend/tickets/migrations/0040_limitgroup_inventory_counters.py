@@ -0,0 +1,68 @@
+# Generated by Django 5.0.8 on 2026-10-18 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def initialize_inventory_counters(apps, schema_editor):
+    LimitGroup = apps.get_model("tickets", "LimitGroup")
+    OrderProduct = apps.get_model("tickets", "OrderProduct")
+
+    for limit_group in LimitGroup.objects.all():
+        amount_sold = OrderProduct.objects.filter(
+            product__limit_groups=limit_group,
+            order__confirm_time__isnull=False,
+            order__cancellation_time__isnull=True,
+        ).aggregate(models.Sum("count"))["count__sum"]
+
+        limit_group.cached_amount_sold = amount_sold or 0
+        limit_group.save(update_fields=["cached_amount_sold"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tickets", "0039_alter_ticketseventmeta_terms_and_conditions_url"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="limitgroup",
+            name="cached_amount_reserved",
+            field=models.IntegerField(default=0, verbose_name="Amount reserved"),
+        ),
+        migrations.AddField(
+            model_name="limitgroup",
+            name="cached_amount_sold",
+            field=models.IntegerField(default=0, verbose_name="Amount sold"),
+        ),
+        migrations.CreateModel(
+            name="LimitGroupReservation",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("count", models.PositiveIntegerField()),
+                ("valid_until", models.DateTimeField(db_index=True)),
+                (
+                    "limit_group",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="reservations",
+                        to="tickets.limitgroup",
+                    ),
+                ),
+                (
+                    "order",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="limit_group_reservations",
+                        to="tickets.order",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "reservation",
+                "verbose_name_plural": "reservations",
+                "unique_together": {("order", "limit_group")},
+            },
+        ),
+        migrations.RunPython(initialize_inventory_counters, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.0.8 on 2026-10-18 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0039_alter_person_birth_date_alter_person_email_and_more"),
+        ("tickets", "0040_limitgroup_inventory_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticketseventmeta",
+            name="admission_seconds",
+            field=models.PositiveIntegerField(
+                default=1200,
+                help_text="How long a customer admitted from the waiting room may stay idle in the ticket shop before their place is given to the next one in line.",
+                verbose_name="Admission period (seconds)",
+            ),
+        ),
+        migrations.AddField(
+            model_name="ticketseventmeta",
+            name="max_concurrent_customers",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="If set, customers exceeding this number are placed in a waiting room and admitted to the ticket shop in the order they arrived as others finish. Use this for ticket sale openings of popular events.",
+                null=True,
+                verbose_name="Maximum concurrent customers",
+            ),
+        ),
+        migrations.CreateModel(
+            name="WaitingRoomEntry",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("admitted_at", models.DateTimeField(blank=True, null=True)),
+                ("expires_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "event",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="core.event",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "waiting room entry",
+                "verbose_name_plural": "waiting room entries",
+                "indexes": [
+                    models.Index(fields=["event", "admitted_at", "id"], name="tickets_waitingroom_queue_idx"),
+                    models.Index(fields=["event", "expires_at"], name="tickets_waitingroom_active_idx"),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.8 on 2026-10-18 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+import tickets.models.rendered_etickets
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tickets", "0041_waiting_room"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RenderedETickets",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("code_set_hash", models.CharField(max_length=64)),
+                ("pdf", models.FileField(upload_to=tickets.models.rendered_etickets.make_filename)),
+                ("created_at", models.DateTimeField(auto_now=True)),
+                (
+                    "order",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rendered_etickets",
+                        to="tickets.order",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "rendered electronic tickets",
+                "verbose_name_plural": "rendered electronic tickets",
+            },
+        ),
+    ]
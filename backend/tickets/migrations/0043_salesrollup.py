@@ -0,0 +1,73 @@
+# Generated by Django 5.0.8 on 2026-10-18 12:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from pkg_resources import resource_string
+
+
+def backfill_sales_rollup(apps, schema_editor):
+    Order = apps.get_model("tickets", "Order")
+
+    event_ids = list(Order.objects.filter(payment_date__isnull=False).values_list("event_id", flat=True).distinct())
+    if not event_ids:
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            resource_string("tickets", "models/queries/refresh_sales_rollup.sql").decode(),
+            dict(event_ids=event_ids, time_zone=settings.TIME_ZONE),
+        )
+
+        if apps.is_installed("lippukala"):
+            from lippukala.consts import USED
+
+            cursor.execute(
+                resource_string("tickets", "models/queries/refresh_arrivals_rollup.sql").decode(),
+                dict(event_ids=event_ids, since="1970-01-01T00:00:00Z", used=USED),
+            )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0039_alter_person_birth_date_alter_person_email_and_more"),
+        ("tickets", "0042_renderedetickets"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SalesRollup",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("hour", models.DateTimeField()),
+                ("products_sold", models.IntegerField(default=0)),
+                ("tickets_sold", models.IntegerField(default=0)),
+                ("amount_cents", models.BigIntegerField(default=0)),
+                ("arrivals", models.IntegerField(default=0)),
+                (
+                    "event",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="core.event",
+                    ),
+                ),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="tickets.product",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "sales rollup",
+                "verbose_name_plural": "sales rollups",
+                "constraints": [
+                    models.UniqueConstraint(fields=("event", "product", "hour"), name="tickets_salesrollup_unique")
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_sales_rollup, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.8 on 2026-10-18 12:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tickets", "0043_salesrollup"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="waitingroomentry",
+            name="seen_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
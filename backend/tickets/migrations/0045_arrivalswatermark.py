@@ -0,0 +1,23 @@
+# Generated by Django 5.0.8 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tickets", "0044_waitingroomentry_seen_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArrivalsWatermark",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("refreshed_until", models.DateTimeField()),
+            ],
+            options={
+                "verbose_name": "arrivals watermark",
+                "verbose_name_plural": "arrivals watermarks",
+            },
+        ),
+    ]
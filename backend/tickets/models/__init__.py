@@ -2,10 +2,15 @@
 from .accommodation_information import AccommodationInformation
 from .customer import Customer
 from .limit_group import LimitGroup
+from .limit_group_reservation import LimitGroupReservation
 from .order import Order
 from .order_product import OrderProduct
 from .product import Product
+from .rendered_etickets import RenderedETickets
+from .sales_rollup import ArrivalsWatermark, SalesRollup
+from .waiting_room_entry import WaitingRoomEntry
 
+# isort: split
 # non-database models
 from .product_handout import ProductHandout
 from .tickets_event_meta import TicketsEventMeta
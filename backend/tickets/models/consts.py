@@ -12,3 +12,9 @@ LANGUAGE_CHOICES = [
     ("fi", _("Finnish")),
     ("en", _("English")),
 ]
+
+# how long products selected by a customer are held for them before confirming the order
+RESERVATION_SECONDS = 15 * 60
+
+# number of orders whose e-tickets are rendered in one go when sending payment confirmations in bulk
+ETICKETS_BATCH_SIZE = 50
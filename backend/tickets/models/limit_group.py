@@ -1,5 +1,4 @@
 import logging
-from functools import cached_property
 from typing import TYPE_CHECKING
 
 from django.db import models
@@ -8,6 +7,7 @@ from django.utils.translation import gettext_lazy as _
 from .consts import LOW_AVAILABILITY_THRESHOLD
 
 if TYPE_CHECKING:
+    from .limit_group_reservation import LimitGroupReservation
     from .product import Product
 
 
@@ -18,11 +18,16 @@ class LimitGroup(models.Model):
     id: int
     pk: int
     product_set: models.QuerySet["Product"]
+    reservations: models.QuerySet["LimitGroupReservation"]
 
     event = models.ForeignKey("core.Event", on_delete=models.CASCADE, verbose_name=_("Event"))
     description = models.CharField(max_length=255, verbose_name=_("Description"))
     limit = models.IntegerField(verbose_name=_("Maximum amount to sell"))
 
+    # denormalized fields, maintained by tickets/inventory.py
+    cached_amount_sold = models.IntegerField(default=0, verbose_name=_("Amount sold"))
+    cached_amount_reserved = models.IntegerField(default=0, verbose_name=_("Amount reserved"))
+
     def __str__(self):
         return f"{self.description} ({self.amount_available}/{self.limit})"
 
@@ -30,8 +35,22 @@ class LimitGroup(models.Model):
         verbose_name = _("limit group")
         verbose_name_plural = _("limit groups")
 
-    @cached_property
+    @property
     def amount_sold(self):
+        return self.cached_amount_sold
+
+    @property
+    def amount_reserved(self):
+        return self.cached_amount_reserved
+
+    @property
+    def amount_available(self):
+        return self.limit - self.cached_amount_sold - self.cached_amount_reserved
+
+    def get_amount_sold_from_orders(self) -> int:
+        """
+        Derives the amount sold from confirmed orders. Used to reconcile cached_amount_sold.
+        """
         from .order_product import OrderProduct
 
         amount_sold = OrderProduct.objects.filter(
@@ -42,15 +61,9 @@ class LimitGroup(models.Model):
 
         return amount_sold if amount_sold is not None else 0
 
-    def refresh_from_db(self, *args, **kwargs):
-        super().refresh_from_db(*args, **kwargs)
-
-        # invalidate cached properties
-        self.__dict__.pop("amount_sold", None)
-
-    @property
-    def amount_available(self):
-        return self.limit - self.amount_sold
+    def get_amount_reserved_from_reservations(self) -> int:
+        amount_reserved = self.reservations.aggregate(models.Sum("count"))["count__sum"]
+        return amount_reserved if amount_reserved is not None else 0
 
     @property
     def is_sold_out(self):
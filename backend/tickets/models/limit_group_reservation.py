@@ -0,0 +1,30 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class LimitGroupReservation(models.Model):
+    """
+    Products held for an unconfirmed order until valid_until. See tickets/inventory.py.
+    Counted in LimitGroup.cached_amount_reserved until confirmed or released.
+    """
+
+    order = models.ForeignKey(
+        "tickets.Order",
+        on_delete=models.CASCADE,
+        related_name="limit_group_reservations",
+    )
+    limit_group = models.ForeignKey(
+        "tickets.LimitGroup",
+        on_delete=models.CASCADE,
+        related_name="reservations",
+    )
+    count = models.PositiveIntegerField()
+    valid_until = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.count}x {self.limit_group.description} until {self.valid_until}"
+
+    class Meta:
+        verbose_name = _("reservation")
+        verbose_name_plural = _("reservations")
+        unique_together = [("order", "limit_group")]
@@ -1,13 +1,15 @@
 import logging
+from collections import Counter
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta
 from datetime import time as dtime
+from itertools import batched
 from typing import TYPE_CHECKING
 
 from dateutil.tz import tzlocal
 from django.conf import settings
 from django.core.mail import EmailMessage
-from django.db import connection, models
+from django.db import connection, models, transaction
 from django.template.loader import render_to_string
 from django.utils import timezone, translation
 from django.utils.translation import gettext_lazy as _
@@ -17,10 +19,11 @@ from core.models.event import Event
 from core.utils import url
 
 from ..utils import append_reference_number_checksum, format_date, format_price
-from .consts import LANGUAGE_CHOICES, UNPAID_CANCEL_HOURS
+from .consts import ETICKETS_BATCH_SIZE, LANGUAGE_CHOICES, UNPAID_CANCEL_HOURS
 from .tickets_event_meta import TicketsEventMeta
 
 if TYPE_CHECKING:
+    from .limit_group_reservation import LimitGroupReservation
     from .order_product import OrderProduct
 
 
@@ -38,6 +41,7 @@ class ArrivalsRow:
 
 class Order(models.Model):
     order_product_set: models.QuerySet["OrderProduct"]
+    limit_group_reservations: models.QuerySet["LimitGroupReservation"]
 
     event = models.ForeignKey("core.Event", on_delete=models.CASCADE)
 
@@ -149,17 +153,41 @@ class Order(models.Model):
     def clean_up_order_products(self):
         self.order_product_set.filter(count__lte=0).delete()
 
+    def reserve_products(self, product_counts=None):
+        """
+        Holds the given (product, count) pairs (default: the products of this order) for this order
+        for a while. Raises tickets.inventory.SoldOut if they are not available.
+        """
+        from ..inventory import reserve
+
+        return reserve(self, product_counts)
+
+    def release_products(self):
+        from ..inventory import release
+
+        release(self)
+
     def confirm_order(self):
+        """
+        Raises tickets.inventory.SoldOut if the products of the order are not available.
+        """
+        from ..inventory import sell
+        from ..metrics import orders_confirmed
+
         if not self.customer:
             raise ValueError("Customer not set")
         if self.is_confirmed:
             raise ValueError("Already confirmed")
 
-        self.clean_up_order_products()
+        with transaction.atomic():
+            self.clean_up_order_products()
+            sell(self)
+
+            self.reference_number = self._make_reference_number()
+            self.confirm_time = timezone.now()
+            self.save()
 
-        self.reference_number = self._make_reference_number()
-        self.confirm_time = timezone.now()
-        self.save()
+            transaction.on_commit(lambda: orders_confirmed.inc(event=self.event.slug))
 
     def confirm_payment(self, payment_date=None, send_email=True):
         if not self.is_confirmed:
@@ -170,9 +198,15 @@ class Order(models.Model):
         if payment_date is None:
             payment_date = date.today()
 
+        from ..metrics import orders_paid
+        from ..sales_rollup import record_sales
+
         self.payment_date = payment_date
 
-        self.save()
+        with transaction.atomic():
+            self.save()
+            record_sales([self])
+            transaction.on_commit(lambda: orders_paid.inc(event=self.event.slug))
 
         if "lippukala" in settings.INSTALLED_APPS:
             self.lippukala_create_codes()
@@ -180,29 +214,95 @@ class Order(models.Model):
         if send_email:
             self.send_confirmation_message("payment_confirmation")
 
+    @classmethod
+    def confirm_payments(cls, orders: list["Order"], payment_date=None, send_email=True):
+        """
+        Bulk version of confirm_payment for eg. payments found in bank reconciliation.
+        Lippukala codes of all the orders are created in one go.
+        """
+        for order in orders:
+            if not order.is_confirmed:
+                raise ValueError(f"Order {order.pk}: Must be confirmed to pay")
+            if order.is_paid:
+                raise ValueError(f"Order {order.pk}: Already paid")
+
+        from ..metrics import orders_paid
+        from ..sales_rollup import record_sales
+
+        if payment_date is None:
+            payment_date = date.today()
+
+        with transaction.atomic():
+            for order in orders:
+                order.payment_date = payment_date
+            cls.objects.bulk_update(orders, ["payment_date"])
+            record_sales(orders)
+
+            num_paid_by_event_id = Counter(order.event_id for order in orders)  # type: ignore
+
+            def count_paid():
+                for event_id, event_slug in Event.objects.filter(id__in=num_paid_by_event_id).values_list("id", "slug"):
+                    orders_paid.inc(num_paid_by_event_id[event_id], event=event_slug)
+
+            transaction.on_commit(count_paid)
+
+            if "lippukala" in settings.INSTALLED_APPS:
+                from ..lippukala_codes import create_codes_for_orders
+
+                create_codes_for_orders(orders)
+
+        if send_email:
+            if "background_tasks" in settings.INSTALLED_APPS:
+                from ..tasks import orders_send_confirmation_messages
+
+                # e-tickets of a batch are rendered in one go before its messages are sent
+                for batch in batched([order.pk for order in orders], ETICKETS_BATCH_SIZE):
+                    orders_send_confirmation_messages.delay(list(batch), "payment_confirmation")  # type: ignore
+            else:
+                for order in orders:
+                    order.send_confirmation_message("payment_confirmation")
+
     def cancel(self, send_email=True):
         if not self.is_confirmed:
             raise ValueError("Must be confirmed to cancel")
 
+        from ..inventory import unsell
+        from ..sales_rollup import record_sales
+
         if "lippukala" in settings.INSTALLED_APPS:
             self.lippukala_revoke_codes()
 
-        self.cancellation_time = timezone.now()
-        self.save()
+        with transaction.atomic():
+            if not self.is_cancelled:
+                unsell(self)
+                record_sales([self], sign=-1)
+
+            self.cancellation_time = timezone.now()
+            self.save()
 
         if send_email:
             self.send_confirmation_message("cancellation_notice")
 
     def uncancel(self, send_email=True):
+        """
+        Raises tickets.inventory.SoldOut if the products of the order are no longer available.
+        """
+        from ..inventory import sell
+        from ..sales_rollup import record_sales
+
         if not self.is_cancelled:
             raise ValueError("Must be cancelled to uncancel")
 
+        with transaction.atomic():
+            sell(self)
+            record_sales([self])
+
+            self.cancellation_time = None
+            self.save()
+
         if "lippukala" in settings.INSTALLED_APPS:
             self.lippukala_reinstate_codes()
 
-        self.cancellation_time = None
-        self.save()
-
         if send_email:
             self.send_confirmation_message("uncancellation_notice")
 
@@ -276,35 +376,9 @@ class Order(models.Model):
         if "lippukala" not in settings.INSTALLED_APPS:
             raise NotImplementedError("lippukala is not installed")
 
-        if not self.contains_electronic_tickets:
-            return
-
-        from lippukala.models import Code
-        from lippukala.models import Order as LippukalaOrder
-
-        if not self.customer:
-            raise ValueError("Customer must be set")
-
-        lippukala_order, created = LippukalaOrder.objects.get_or_create(
-            reference_number=self.reference_number,
-            defaults=dict(
-                event=self.event.slug,
-                address_text=self.customer.name,
-                free_text=self.event.tickets_event_meta.ticket_free_text,
-            ),
-        )
+        from ..lippukala_codes import create_codes_for_orders
 
-        if not created:
-            logger.debug("Lippukala order already exists")
-            return
-
-        for op in self.order_product_set.filter(count__gt=0, product__electronic_ticket=True):
-            for _i in range(op.count * op.product.electronic_tickets_per_product):
-                Code.objects.create(
-                    order=lippukala_order,
-                    prefix=self.lippukala_prefix,
-                    product_text=op.product.electronic_ticket_title,
-                )
+        create_codes_for_orders([self])
 
     def lippukala_revoke_codes(self):
         if "lippukala" not in settings.INSTALLED_APPS:
@@ -345,17 +419,9 @@ class Order(models.Model):
         if "lippukala" not in settings.INSTALLED_APPS:
             raise NotImplementedError("lippukala not installed")
 
-        from lippukala.printing import OrderPrinter
-
-        meta = self.event.tickets_event_meta
-
-        printer = OrderPrinter(
-            print_logo_path=meta.print_logo_path,
-            print_logo_size_cm=meta.print_logo_size_cm,
-        )
-        printer.process_order(self.lippukala_order)
+        from ..etickets import get_etickets_pdf
 
-        return printer.finish()
+        return get_etickets_pdf(self)
 
     def send_confirmation_message(self, msgtype):
         if "background_tasks" in settings.INSTALLED_APPS:
@@ -2,7 +2,7 @@ import logging
 from functools import cached_property
 from typing import Any
 
-from django.db import models
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 
 from core.models import Event
@@ -88,6 +88,20 @@ class Product(models.Model):
         sm = cnt["count__sum"]
         return sm if sm is not None else 0
 
+    def save(self, *args, **kwargs):
+        price_changed = (
+            self.pk is not None and Product.objects.filter(pk=self.pk).exclude(price_cents=self.price_cents).exists()
+        )
+
+        super().save(*args, **kwargs)
+
+        if price_changed:
+            # the sales rollup counts revenue at the current price (see tickets/sales_rollup.py)
+            from ..tasks import refresh_sales_rollup
+
+            event_id = self.event_id  # type: ignore
+            transaction.on_commit(lambda: refresh_sales_rollup.delay([event_id]))
+
     def __str__(self):
         return f"{self.name} ({self.formatted_price})"
 
@@ -0,0 +1,14 @@
+insert into tickets_salesrollup (
+  event_id,
+  product_id,
+  hour,
+  products_sold,
+  tickets_sold,
+  amount_cents,
+  arrivals
+)
+values (%s, %s, %s, %s, %s, %s, 0)
+on conflict (event_id, product_id, hour) do update set
+  products_sold = tickets_salesrollup.products_sold + excluded.products_sold,
+  tickets_sold = tickets_salesrollup.tickets_sold + excluded.tickets_sold,
+  amount_cents = tickets_salesrollup.amount_cents + excluded.amount_cents;
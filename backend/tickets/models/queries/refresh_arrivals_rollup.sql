@@ -0,0 +1,42 @@
+-- Counts used Lippukala codes of the given events by hour of use since the given time into the rollup.
+-- Codes are attributed to the first product (in display order) whose e-ticket title matches the code.
+with products_by_title as (
+  select distinct on (p.event_id, title)
+    p.event_id,
+    coalesce(nullif(p.override_electronic_ticket_title, ''), p.name) as title,
+    p.id as product_id
+  from
+    tickets_product p
+  where
+    p.event_id = any(%(event_ids)s)
+    and p.electronic_ticket = true
+  order by p.event_id, title, p.ordering, p.id
+)
+insert into tickets_salesrollup (
+  event_id,
+  product_id,
+  hour,
+  products_sold,
+  tickets_sold,
+  amount_cents,
+  arrivals
+)
+select
+  e.id as event_id,
+  pbt.product_id,
+  date_trunc('hour', c.used_on) as hour,
+  0 as products_sold,
+  0 as tickets_sold,
+  0 as amount_cents,
+  count(*) as arrivals
+from
+  lippukala_code c
+  join lippukala_order lo on c.order_id = lo.id
+  join core_event e on lo.event = e.slug
+  join products_by_title pbt on pbt.event_id = e.id and pbt.title = c.product_text
+where
+  e.id = any(%(event_ids)s)
+  and c.status = %(used)s
+  and c.used_on >= %(since)s
+group by 1, 2, 3
+on conflict (event_id, product_id, hour) do update set arrivals = excluded.arrivals;
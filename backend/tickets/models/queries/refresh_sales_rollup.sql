@@ -0,0 +1,30 @@
+-- Rebuilds the sales counters of the rollup of the given events from their paid orders.
+-- As payment_date has no time of day, sales are recorded at local midnight of the payment date.
+insert into tickets_salesrollup (
+  event_id,
+  product_id,
+  hour,
+  products_sold,
+  tickets_sold,
+  amount_cents,
+  arrivals
+)
+select
+  o.event_id,
+  op.product_id,
+  o.payment_date::timestamp at time zone %(time_zone)s as hour,
+  sum(op.count) as products_sold,
+  sum(op.count * p.electronic_tickets_per_product) as tickets_sold,
+  sum(op.count * p.price_cents) as amount_cents,
+  0 as arrivals
+from
+  tickets_order o
+  join tickets_orderproduct op on o.id = op.order_id
+  join tickets_product p on op.product_id = p.id
+where
+  o.event_id = any(%(event_ids)s)
+  and o.confirm_time is not null
+  and o.payment_date is not null
+  and o.cancellation_time is null
+  and op.count <> 0
+group by 1, 2, 3;
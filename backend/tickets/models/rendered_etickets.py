@@ -0,0 +1,36 @@
+import os
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+def make_filename(instance: "RenderedETickets", filename: str) -> str:
+    return os.path.join(
+        instance._meta.app_label,
+        "etickets",
+        instance.order.event.slug,
+        os.path.basename(filename),
+    )
+
+
+class RenderedETickets(models.Model):
+    """
+    The electronic tickets of an order as last rendered. See tickets/etickets.py.
+    Valid as long as the codes of the order hash to code_set_hash.
+    """
+
+    order = models.OneToOneField(
+        "tickets.Order",
+        on_delete=models.CASCADE,
+        related_name="rendered_etickets",
+    )
+    code_set_hash = models.CharField(max_length=64)
+    pdf = models.FileField(upload_to=make_filename)
+    created_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.pdf.name
+
+    class Meta:
+        verbose_name = _("rendered electronic tickets")
+        verbose_name_plural = _("rendered electronic tickets")
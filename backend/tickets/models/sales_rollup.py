@@ -0,0 +1,125 @@
+from datetime import datetime
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from core.models import Event
+
+from .order import ArrivalsRow
+from .product_handout import ProductHandout
+
+
+class SalesRollup(models.Model):
+    """
+    Sales, revenue and arrivals per event, product and hour. See tickets/sales_rollup.py.
+
+    As payment_date has no time of day, sales are recorded at local midnight of the payment date.
+    Arrivals (used electronic tickets) are recorded at the hour they were used.
+    """
+
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="+")
+    product = models.ForeignKey("tickets.Product", on_delete=models.CASCADE, related_name="+")
+    hour = models.DateTimeField()
+
+    products_sold = models.IntegerField(default=0)
+    tickets_sold = models.IntegerField(default=0)
+    amount_cents = models.BigIntegerField(default=0)
+    arrivals = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.event.slug} {self.product.name} {self.hour}"
+
+    class Meta:
+        verbose_name = _("sales rollup")
+        verbose_name_plural = _("sales rollups")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["event", "product", "hour"],
+                name="tickets_salesrollup_unique",
+            ),
+        ]
+
+    @classmethod
+    def get_ticket_counts(cls, event: Event) -> dict[str, tuple[int, int]]:
+        """
+        Returns e-ticket title -> (tickets issued, tickets used).
+        """
+        counts: dict[str, tuple[int, int]] = {}
+
+        for override_title, name, tickets_sold, arrivals in (
+            cls.objects.filter(event=event, product__electronic_ticket=True)
+            .values("product__override_electronic_ticket_title", "product__name", "product__ordering", "product__id")
+            .annotate(tickets_sold=models.Sum("tickets_sold"), arrivals=models.Sum("arrivals"))
+            .order_by("product__ordering", "product__id")
+            .values_list("product__override_electronic_ticket_title", "product__name", "tickets_sold", "arrivals")
+        ):
+            # see Product.electronic_ticket_title
+            title = override_title or name
+            old_tickets_sold, old_arrivals = counts.get(title, (0, 0))
+            counts[title] = (old_tickets_sold + tickets_sold, old_arrivals + arrivals)
+
+        return counts
+
+    @classmethod
+    def get_product_handouts(cls, event: Event) -> list[ProductHandout]:
+        return [
+            ProductHandout(
+                title=title,
+                handed_out_count=arrivals,
+                not_handed_out_count=max(tickets_sold - arrivals, 0),
+            )
+            for title, (tickets_sold, arrivals) in cls.get_ticket_counts(event).items()
+        ]
+
+    @classmethod
+    def get_arrivals_by_hour(cls, event: Event) -> list[ArrivalsRow]:
+        """
+        Like Order.get_arrivals_by_hour. Tickets not used yet are reported on a last row with hour=None.
+        """
+        arrivals_by_hour: list[tuple[datetime | None, int]] = list(
+            cls.objects.filter(event=event, product__electronic_ticket=True, arrivals__gt=0)
+            .values("hour")
+            .annotate(num_arrivals=models.Sum("arrivals"))
+            .order_by("hour")
+            .values_list("hour", "num_arrivals")
+        )
+
+        num_not_used = sum(
+            max(tickets_sold - arrivals, 0) for tickets_sold, arrivals in cls.get_ticket_counts(event).values()
+        )
+        if num_not_used:
+            arrivals_by_hour.append((None, num_not_used))
+
+        rows = []
+        cum_arrivals = 0
+        for hour, arrivals in arrivals_by_hour:
+            cum_arrivals += arrivals
+            rows.append(ArrivalsRow(hour, arrivals, cum_arrivals))
+
+        return rows
+
+
+class ArrivalsWatermark(models.Model):
+    """
+    The time up to which the arrivals of all events have been recounted into the sales rollup.
+    There is at most one row. See refresh_recent_arrivals in tickets/sales_rollup.py.
+    """
+
+    refreshed_until = models.DateTimeField()
+
+    class Meta:
+        verbose_name = _("arrivals watermark")
+        verbose_name_plural = _("arrivals watermarks")
+
+    @classmethod
+    def get(cls) -> datetime | None:
+        return cls.objects.filter(id=1).values_list("refreshed_until", flat=True).first()
+
+    @classmethod
+    def advance(cls, t: datetime):
+        """
+        Moves the watermark forward to the given time. It is never moved backwards.
+        """
+        unused, created = cls.objects.get_or_create(id=1, defaults=dict(refreshed_until=t))
+        if not created:
+            cls.objects.filter(id=1, refreshed_until__lt=t).update(refreshed_until=t)
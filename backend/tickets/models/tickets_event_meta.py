@@ -62,6 +62,25 @@ class TicketsEventMeta(ContactEmailMixin, EventMetaBase):
         default=1800,
     )
 
+    max_concurrent_customers = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name=_("Maximum concurrent customers"),
+        help_text=_(
+            "If set, customers exceeding this number are placed in a waiting room and admitted to the ticket shop "
+            "in the order they arrived as others finish. Use this for ticket sale openings of popular events."
+        ),
+    )
+
+    admission_seconds = models.PositiveIntegerField(
+        default=1200,
+        verbose_name=_("Admission period (seconds)"),
+        help_text=_(
+            "How long a customer admitted from the waiting room may stay idle in the ticket shop before their "
+            "place is given to the next one in line."
+        ),
+    )
+
     ticket_free_text = models.TextField(
         blank=True,
         verbose_name=_("E-ticket text"),
@@ -0,0 +1,36 @@
+from django.db import models
+from django.utils.timezone import now
+from django.utils.translation import gettext_lazy as _
+
+
+class WaitingRoomEntry(models.Model):
+    """
+    A visitor queueing to the ticket shop of an event. See tickets/waiting_room.py.
+    Entries are admitted in id order.
+    """
+
+    id: int
+    event_id: int
+
+    event = models.ForeignKey("core.Event", on_delete=models.CASCADE, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    # updated as the visitor polls the waiting room; visitors who stop polling are not admitted
+    seen_at = models.DateTimeField(default=now)
+
+    admitted_at = models.DateTimeField(null=True, blank=True)
+
+    # set on admission; extended when the visitor enters and uses the shop
+    # an admitted entry takes up one of the max_concurrent_customers slots until this time
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.event_id} #{self.id}"
+
+    class Meta:
+        verbose_name = _("waiting room entry")
+        verbose_name_plural = _("waiting room entries")
+        indexes = [
+            models.Index(fields=["event", "admitted_at", "id"], name="tickets_waitingroom_queue_idx"),
+            models.Index(fields=["event", "expires_at"], name="tickets_waitingroom_active_idx"),
+        ]
@@ -0,0 +1,178 @@
+"""
+Ticket sales statistics rolled up per event, product and hour (SalesRollup).
+
+The tickets admin reports view and the yearly statistics export used to aggregate over all
+orders and Lippukala codes of the event on every request, competing with live sales. They now
+read from the rollup, which is maintained as follows:
+
+- Sales are counted when an order is paid and uncounted when a paid order is cancelled
+  (and counted again if it is uncancelled). See record_sales.
+- Arrivals (used electronic tickets) are recounted by the refresh_recent_arrivals task
+  (see CELERY_BEAT_SCHEDULE), as codes are used by the Lippukala POS without going through our
+  code. The reports view and the metrics collector also recount them on read, at most every
+  ARRIVALS_REFRESH_SECONDS. Recounting starts from the persisted ArrivalsWatermark (or the
+  recent hours, whichever is earlier), so arrivals are not lost if the task does not run for a while.
+- Editing the products of a paid order in the tickets admin uncounts and recounts the order.
+- Revenue is counted at the current price of the product, like everywhere else in tickets.
+  Changing the price of a product rebuilds the rollup of its event (see Product.save), so that
+  cancelling an order later uncounts the same amount that the rebuild counted.
+- refresh_sales_rollup rebuilds the rollup of events from scratch. Use it to backfill and after
+  editing paid orders by other means (see the tickets_refresh_sales_rollup management command).
+
+Rollup rows are always upserted in sorted order to avoid deadlocks.
+"""
+
+import logging
+from collections import Counter
+from collections.abc import Collection, Iterable
+from datetime import UTC, date, datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils.timezone import get_current_timezone, now
+from pkg_resources import resource_string
+
+from core.models import Event
+
+from .models import ArrivalsWatermark, Order, OrderProduct, SalesRollup
+
+logger = logging.getLogger("kompassi")
+
+INCREMENT_QUERY = resource_string(__name__, "models/queries/increment_sales_rollup.sql").decode()
+REFRESH_SALES_QUERY = resource_string(__name__, "models/queries/refresh_sales_rollup.sql").decode()
+REFRESH_ARRIVALS_QUERY = resource_string(__name__, "models/queries/refresh_arrivals_rollup.sql").decode()
+
+# how far back refresh_recent_arrivals recounts arrivals at least (covers codes committed late)
+RECENT_ARRIVALS_HOURS = 1
+
+# how often refresh_recent_arrivals_on_read recounts arrivals at most
+ARRIVALS_REFRESH_SECONDS = 60
+
+# event id, product id, hour
+Key = tuple[int, int, datetime]
+
+
+def get_sales_hour(payment_date: date) -> datetime:
+    return datetime.combine(payment_date, time(), tzinfo=get_current_timezone())
+
+
+def record_sales(orders: Iterable[Order], sign: int = 1):
+    """
+    Adds (sign=1) or removes (sign=-1) the products of the given paid orders to or from the rollup.
+    Revenue is counted at the current prices of the products, which is why changing the price of a
+    product rebuilds the rollup of its event.
+    """
+    orders = [order for order in orders if order.payment_date is not None]
+    if not orders:
+        return
+
+    hours = {order.id: get_sales_hour(order.payment_date) for order in orders}  # type: ignore
+    products_sold: Counter[Key] = Counter()
+    tickets_sold: Counter[Key] = Counter()
+    amount_cents: Counter[Key] = Counter()
+
+    for order_id, event_id, product_id, count, tickets_per_product, price_cents in OrderProduct.objects.filter(
+        order__in=orders,
+    ).values_list(
+        "order_id",
+        "order__event_id",
+        "product_id",
+        "count",
+        "product__electronic_tickets_per_product",
+        "product__price_cents",
+    ):
+        if not count:
+            continue
+
+        key = (event_id, product_id, hours[order_id])
+        products_sold[key] += sign * count
+        tickets_sold[key] += sign * count * tickets_per_product
+        amount_cents[key] += sign * count * price_cents
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(
+            INCREMENT_QUERY,
+            [(*key, products_sold[key], tickets_sold[key], amount_cents[key]) for key in sorted(products_sold)],
+        )
+
+
+def refresh_arrivals(event_ids: Collection[int], since: datetime):
+    """
+    Recounts the arrivals of the given events from the given time on.
+    """
+    if not event_ids:
+        return
+
+    from lippukala.consts import USED
+
+    with transaction.atomic():
+        SalesRollup.objects.filter(event_id__in=event_ids, hour__gte=since, arrivals__gt=0).update(arrivals=0)
+
+        with connection.cursor() as cursor:
+            cursor.execute(REFRESH_ARRIVALS_QUERY, dict(event_ids=list(event_ids), since=since, used=USED))
+
+
+def refresh_recent_arrivals(t: datetime | None = None, event_ids: Collection[int] | None = None):
+    """
+    Recounts arrivals from the hour of the arrivals watermark, or of the last RECENT_ARRIVALS_HOURS full
+    hours and the current one if that is earlier. Only events that have had arrivals during that time are
+    touched, optionally limited to the given events.
+
+    Refreshing all events advances the watermark to t. Refreshing some events leaves it alone, as the
+    arrivals of the other events have not been recounted.
+    """
+    from lippukala.models import Code
+
+    if t is None:
+        t = now()
+
+    since = t - timedelta(hours=RECENT_ARRIVALS_HOURS)
+    if (watermark := ArrivalsWatermark.get()) is not None:
+        since = min(since, watermark)
+    since = since.replace(minute=0, second=0, microsecond=0)
+
+    event_slugs = set(Code.objects.filter(used_on__gte=since).values_list("order__event", flat=True).distinct())
+    if event_slugs:
+        events = Event.objects.filter(slug__in=event_slugs)
+        if event_ids is not None:
+            events = events.filter(id__in=event_ids)
+
+        refresh_arrivals(list(events.values_list("id", flat=True)), since)
+
+    if event_ids is None:
+        ArrivalsWatermark.advance(t)
+
+
+def refresh_recent_arrivals_on_read(event_ids: Collection[int] | None = None):
+    """
+    Recounts recent arrivals of the given events (default: all events) before reading the rollup,
+    unless that has been done within ARRIVALS_REFRESH_SECONDS.
+    """
+    if "lippukala" not in settings.INSTALLED_APPS:
+        return
+
+    scope = ",".join(str(event_id) for event_id in sorted(event_ids)) if event_ids is not None else "*"
+    if not cache.add(f"tickets.sales_rollup.arrivals_refreshed:{scope}", True, ARRIVALS_REFRESH_SECONDS):
+        return
+
+    refresh_recent_arrivals(event_ids=event_ids)
+
+
+def refresh_sales_rollup(event_ids: Collection[int]):
+    """
+    Rebuilds the rollup of the given events from their orders and Lippukala codes.
+    """
+    if not event_ids:
+        return
+
+    with transaction.atomic():
+        SalesRollup.objects.filter(event_id__in=event_ids).delete()
+
+        with connection.cursor() as cursor:
+            cursor.execute(REFRESH_SALES_QUERY, dict(event_ids=list(event_ids), time_zone=settings.TIME_ZONE))
+
+        if "lippukala" in settings.INSTALLED_APPS:
+            refresh_arrivals(event_ids, datetime(1970, 1, 1, tzinfo=UTC))
+
+    logger.info("Rebuilt sales rollup of %d events", len(event_ids))
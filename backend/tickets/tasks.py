@@ -7,3 +7,36 @@ def order_send_confirmation_message(order_id: int, msgtype: str):
 
     order = Order.objects.get(pk=order_id)
     order._send_confirmation_message(msgtype)
+
+
+@shared_task(ignore_result=True)
+def orders_send_confirmation_messages(order_ids: list[int], msgtype: str):
+    from .etickets import render_etickets_for_orders
+    from .models import Order
+
+    if msgtype == "payment_confirmation":
+        render_etickets_for_orders(order_ids)
+
+    for order in Order.objects.filter(pk__in=order_ids).order_by("pk"):
+        order._send_confirmation_message(msgtype)
+
+
+@shared_task(ignore_result=True)
+def release_expired_reservations():
+    from .inventory import release_expired_reservations
+
+    release_expired_reservations()
+
+
+@shared_task(ignore_result=True)
+def refresh_recent_arrivals():
+    from .sales_rollup import refresh_recent_arrivals
+
+    refresh_recent_arrivals()
+
+
+@shared_task(ignore_result=True)
+def refresh_sales_rollup(event_ids: list[int]):
+    from .sales_rollup import refresh_sales_rollup
+
+    refresh_sales_rollup(event_ids)
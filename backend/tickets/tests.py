@@ -1,6 +1,35 @@
-from django.test import TestCase
+import tempfile
+import threading
+from datetime import timedelta
 
-from .models import LimitGroup, Order, Product
+from django.db import connection
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.utils.timezone import now
+
+from .helpers import ORDER_KEY_TEMPLATE
+from .inventory import SoldOut, reconcile_limit_groups, release_expired_reservations, reserve
+from .models import (
+    ArrivalsWatermark,
+    Customer,
+    LimitGroup,
+    Order,
+    Product,
+    RenderedETickets,
+    SalesRollup,
+    TicketsEventMeta,
+    WaitingRoomEntry,
+)
+from .sales_rollup import refresh_recent_arrivals, refresh_sales_rollup
+from .waiting_room import (
+    create_entry,
+    enter,
+    get_cookie_name,
+    get_entry,
+    get_status,
+    has_active_order,
+    make_token,
+    prune,
+)
 
 
 class LimitGroupsTestCase(TestCase):
@@ -18,12 +47,13 @@ class LimitGroupsTestCase(TestCase):
         assert sunday.in_stock
 
         order, unused = Order.get_or_create_dummy()
-        order.confirm_order()
 
         order.order_product_set.create(product=saturday, count=2000)
         order.order_product_set.create(product=sunday, count=1500)
         order.order_product_set.create(product=weekend, count=3000)
 
+        order.confirm_order()
+
         # saturday + weekend now 5000 which is the limit
         # sunday + weekend now 4500 which is below the limit
 
@@ -34,3 +64,324 @@ class LimitGroupsTestCase(TestCase):
         assert not weekend.in_stock
         assert not saturday.in_stock
         assert sunday.in_stock
+
+    def test_reservations(self):
+        limit_saturday, limit_sunday = LimitGroup.get_or_create_dummies()
+        weekend, saturday, sunday = Product.get_or_create_dummies()
+
+        order, unused = Order.get_or_create_dummy()
+        order.order_product_set.create(product=weekend, count=4000)
+        order.reserve_products()
+
+        limit_saturday.refresh_from_db()
+        assert limit_saturday.amount_reserved == 4000
+        assert limit_saturday.amount_available == 1000
+
+        # other customers cannot take reserved products
+        other_order = Order.objects.create(event=order.event)
+        with self.assertRaises(SoldOut):
+            other_order.reserve_products([(saturday, 1001)])
+        other_order.reserve_products([(saturday, 1000)])
+
+        # confirming consumes the reservation
+        order.confirm_order()
+        limit_saturday.refresh_from_db()
+        assert limit_saturday.amount_sold == 4000
+        assert limit_saturday.amount_reserved == 1000
+        assert limit_saturday.amount_available == 0
+
+        # expired reservations are released
+        assert release_expired_reservations(now() + timedelta(days=1)) == 1
+        limit_saturday.refresh_from_db()
+        assert limit_saturday.amount_reserved == 0
+
+        order.cancel(send_email=False)
+        limit_saturday.refresh_from_db()
+        assert limit_saturday.amount_sold == 0
+
+        order.uncancel(send_email=False)
+        limit_saturday.refresh_from_db()
+        assert limit_saturday.amount_sold == 4000
+
+        # expired reservations do not make products unavailable even if nothing releases them
+        abandoned_order = Order.objects.create(event=order.event)
+        reserve(abandoned_order, [(saturday, 1000)], seconds=0)
+        other_order.reserve_products([(saturday, 1000)])
+        assert not abandoned_order.limit_group_reservations.exists()
+
+        assert not any(
+            result.is_changed for result in reconcile_limit_groups(LimitGroup.objects.filter(event=order.event))
+        )
+
+
+class LippukalaCodesTestCase(TestCase):
+    def test_create_codes_for_orders(self):
+        from lippukala.models import Code
+
+        weekend, saturday, sunday = Product.get_or_create_dummies()
+        saturday.electronic_tickets_per_product = 2
+        saturday.save()
+
+        orders = []
+        for i in range(3):
+            customer = Customer.objects.create(
+                first_name="Code", last_name=f"Testinen {i}", email=f"code{i}@example.com"
+            )
+            order = Order.objects.create(event=weekend.event, customer=customer)
+            order.order_product_set.create(product=weekend, count=i + 1)
+            order.order_product_set.create(product=saturday, count=1)
+            order.confirm_order()
+            orders.append(order)
+
+        Order.confirm_payments(orders, send_email=False)
+
+        codes = Code.objects.filter(order__reference_number__in=[order.reference_number for order in orders])
+        assert codes.count() == (1 + 2 + 3) + 3 * 2
+        assert len({code.code for code in codes}) == codes.count()
+        assert all(code.full_code == f"{code.prefix}{code.code}" for code in codes)
+
+        # only missing codes are created
+        codes.filter(order__reference_number=orders[2].reference_number, product_text=weekend.name).first().delete()
+        orders[2].lippukala_create_codes()
+        assert codes.count() == (1 + 2 + 3) + 3 * 2
+
+        # the same fields are set as by Code.save()
+        code = codes.first()
+        literate_code, code.literate_code = code.literate_code, ""
+        code.save()
+        assert code.literate_code == literate_code
+
+        # renaming a product does not mint a second set of codes
+        weekend.name = "Renamed weekend test product"
+        weekend.save()
+        orders[2].lippukala_create_codes()
+        assert codes.count() == (1 + 2 + 3) + 3 * 2
+
+    def test_etickets_are_stored(self):
+        from lippukala.models import Code
+
+        order, unused = Order.get_or_create_dummy()
+        product, unused = Product.get_or_create_dummy()
+        order.order_product_set.create(product=product, count=2)
+        order.confirm_order()
+        Order.confirm_payments([order], send_email=False)
+
+        with tempfile.TemporaryDirectory() as media_root:
+            storages = {"default": {"BACKEND": "django.core.files.storage.FileSystemStorage"}}
+            with override_settings(MEDIA_ROOT=media_root, STORAGES=storages):
+                pdf = order.get_etickets_pdf()
+                assert pdf.startswith(b"%PDF")
+
+                rendered = RenderedETickets.objects.get(order=order)
+                assert order.get_etickets_pdf() == pdf
+                assert RenderedETickets.objects.get(order=order).pdf.name == rendered.pdf.name
+
+                # changing the codes invalidates the stored tickets
+                Code.objects.filter(order__reference_number=order.reference_number).first().delete()
+                order.get_etickets_pdf()
+                assert RenderedETickets.objects.get(order=order).code_set_hash != rendered.code_set_hash
+
+
+class SalesRollupTestCase(TestCase):
+    def get_rollup(self, event):
+        return sorted(
+            SalesRollup.objects.filter(event=event)
+            .exclude(products_sold=0, arrivals=0)
+            .values_list("product_id", "hour", "products_sold", "tickets_sold", "amount_cents", "arrivals")
+        )
+
+    def test_sales_rollup(self):
+        weekend, saturday, sunday = Product.get_or_create_dummies()
+        event = weekend.event
+
+        orders = []
+        for i in range(3):
+            customer = Customer.objects.create(
+                first_name="Rollup", last_name=f"Testinen {i}", email=f"rollup{i}@example.com"
+            )
+            order = Order.objects.create(event=event, customer=customer)
+            order.order_product_set.create(product=weekend, count=i + 1)
+            order.order_product_set.create(product=saturday, count=1)
+            order.confirm_order()
+            orders.append(order)
+
+        # only paid orders count
+        Order.confirm_payments(orders[:2], send_email=False)
+        orders[2].confirm_payment(send_email=False)
+        orders[1].cancel(send_email=False)
+
+        rollup = self.get_rollup(event)
+        weekend_sold, saturday_sold = (row[2:5] for row in rollup)
+        assert weekend_sold[0] == 1 + 3
+        assert weekend_sold[2] == (1 + 3) * weekend.price_cents
+        assert saturday_sold[0] == 2
+
+        # incrementally maintained rollup matches one rebuilt from scratch
+        refresh_sales_rollup([event.id])
+        assert self.get_rollup(event) == rollup
+
+        handouts = SalesRollup.get_product_handouts(event)
+        assert sum(handout.total_count for handout in handouts) == 1 + 3 + 2
+
+        # changing the price rebuilds the rollup, so cancelling afterwards uncounts the same amount
+        with self.captureOnCommitCallbacks(execute=True):
+            weekend.price_cents += 500
+            weekend.save()
+        orders[2].cancel(send_email=False)
+
+        rollup = self.get_rollup(event)
+        refresh_sales_rollup([event.id])
+        assert self.get_rollup(event) == rollup
+        assert rollup[0][4] == 1 * weekend.price_cents
+
+    def test_arrivals_after_gap(self):
+        from lippukala.consts import USED
+        from lippukala.models import Code
+
+        order, unused = Order.get_or_create_dummy()
+        product, unused = Product.get_or_create_dummy()
+        order.order_product_set.create(product=product, count=2)
+        order.confirm_order()
+        Order.confirm_payments([order], send_email=False)
+
+        # arrivals were last refreshed long ago, and a code was used after that
+        t = now()
+        ArrivalsWatermark.advance(t - timedelta(hours=4))
+        code = Code.objects.filter(order__reference_number=order.reference_number).first()
+        Code.objects.filter(id=code.id).update(status=USED, used_on=t - timedelta(hours=3))
+
+        refresh_recent_arrivals(t)
+        assert sum(row[5] for row in self.get_rollup(order.event)) == 1
+        assert ArrivalsWatermark.get() == t
+
+        # refreshing some events leaves the watermark alone
+        refresh_recent_arrivals(t + timedelta(minutes=1), event_ids=[order.event.id])
+        assert ArrivalsWatermark.get() == t
+
+
+class WaitingRoomTestCase(TestCase):
+    def test_admission_order(self):
+        meta, unused = TicketsEventMeta.get_or_create_dummy()
+        meta.max_concurrent_customers = 1
+        meta.save()
+        event = meta.event
+
+        first = create_entry(event)
+        second = create_entry(event)
+        third = create_entry(event)
+
+        assert get_status(first, event, meta).admitted
+        assert enter(first, event, meta)
+
+        status = get_status(third, event, meta)
+        assert not status.admitted
+        assert status.position == 2
+        assert status.num_waiting == 2
+
+        # first customer finishes
+        WaitingRoomEntry.objects.filter(id=first.id).update(expires_at=now())
+
+        assert not get_status(third, event, meta).admitted
+        assert get_status(second, event, meta).admitted
+        assert get_status(third, event, meta).position == 1
+
+    def test_admission_token(self):
+        meta, unused = TicketsEventMeta.get_or_create_dummy()
+        event = meta.event
+        entry = create_entry(event)
+        factory = RequestFactory()
+
+        request = factory.get("/")
+        request.COOKIES[get_cookie_name(event)] = make_token(entry)
+        assert get_entry(request, event) == entry
+
+        # cannot skip the line by guessing entry ids
+        request = factory.get("/")
+        request.COOKIES[get_cookie_name(event)] = make_token(entry).replace(":", ";", 1)
+        assert get_entry(request, event) is None
+
+    def test_prune(self):
+        meta, unused = TicketsEventMeta.get_or_create_dummy()
+        meta.max_concurrent_customers = 1
+        meta.save()
+        event = meta.event
+        t = now()
+
+        finished = create_entry(event)
+        WaitingRoomEntry.objects.filter(id=finished.id).update(admitted_at=t, expires_at=t)
+        abandoned = create_entry(event)
+        WaitingRoomEntry.objects.filter(id=abandoned.id).update(seen_at=t - timedelta(hours=1))
+        waiting = create_entry(event)
+
+        # abandoned entries are skipped when admitting
+        assert get_status(waiting, event, meta).admitted
+        assert not WaitingRoomEntry.objects.filter(id=abandoned.id, admitted_at__isnull=False).exists()
+
+        # and deleted along with finished ones (admitting may have done that already)
+        prune(event)
+        assert list(WaitingRoomEntry.objects.filter(event=event)) == [waiting]
+
+    def test_order_bypass(self):
+        meta, unused = TicketsEventMeta.get_or_create_dummy()
+        event = meta.event
+        customer = Customer.objects.create(first_name="Bypass", last_name="Testinen", email="bypass@example.com")
+        order = Order.objects.create(event=event, customer=customer)
+
+        request = RequestFactory().get("/")
+        request.session = {ORDER_KEY_TEMPLATE.format(event=event): order.id}  # type: ignore
+
+        # an order that is not confirmed yet does not skip the line
+        assert not has_active_order(request, event)
+
+        Order.objects.filter(id=order.id).update(confirm_time=now())
+        assert has_active_order(request, event)
+
+
+class InventoryConcurrencyTestCase(TransactionTestCase):
+    num_products = 10
+    num_customers = 30
+
+    def test_no_overselling(self):
+        product, unused = Product.get_or_create_dummy()
+        limit_group = LimitGroup.objects.create(event=product.event, description="Stress test", limit=self.num_products)
+        product.limit_groups.set([limit_group])
+
+        orders = []
+        for i in range(self.num_customers):
+            customer = Customer.objects.create(
+                first_name="Stress",
+                last_name=f"Testinen {i}",
+                email=f"stress{i}@example.com",
+            )
+            order = Order.objects.create(event=product.event, customer=customer)
+            order.order_product_set.create(product=product, count=1)
+            orders.append(order)
+
+        barrier = threading.Barrier(self.num_customers)
+        results: list[bool] = []
+
+        def buy(order: Order):
+            try:
+                barrier.wait()
+                order.confirm_order()
+            except SoldOut:
+                results.append(False)
+            else:
+                results.append(True)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buy, args=(order,)) for order in orders]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(results) == self.num_customers
+        assert results.count(True) == self.num_products
+
+        limit_group.refresh_from_db()
+        assert limit_group.amount_sold == limit_group.get_amount_sold_from_orders() == self.num_products
+        assert Order.objects.filter(id__in=[order.id for order in orders], confirm_time__isnull=False).count() == (
+            self.num_products
+        )
@@ -21,6 +21,7 @@ from .views import (
     tickets_router_view,
     tickets_thanks_view,
     tickets_tickets_view,
+    tickets_waiting_room_status_view,
 )
 
 urlpatterns = [
@@ -29,6 +30,11 @@ urlpatterns = [
         tickets_router_view,
         name="tickets_welcome_view",
     ),
+    re_path(
+        r"events/(?P<event_slug>[a-z0-9-]+)/tickets/waiting-room.json$",
+        tickets_waiting_room_status_view,
+        name="tickets_waiting_room_status_view",
+    ),
     re_path(
         r"events/(?P<event_slug>[a-z0-9-]+)/tickets/products/?$",
         tickets_tickets_view,
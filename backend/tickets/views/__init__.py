@@ -25,3 +25,4 @@ from .tickets_v1_views import (
     tickets_tickets_view,
     tickets_welcome_view,
 )
+from .tickets_waiting_room_views import tickets_waiting_room_status_view
@@ -29,12 +29,14 @@ from ..forms import (
     SearchForm,
 )
 from ..helpers import perform_search, tickets_admin_required, tickets_event_required
+from ..inventory import SoldOut, reconcile_limit_groups
 from ..models import (
     AccommodationInformation,
     LimitGroup,
     Order,
 )
 from ..models.consts import UNPAID_CANCEL_HOURS
+from ..sales_rollup import record_sales
 from ..utils import format_price
 
 __all__ = [
@@ -200,6 +202,11 @@ def tickets_admin_order_view(request, vars, event, order_id):
         ):
 
             def save():
+                # products of paid orders are counted in the sales rollup
+                is_counted = order.is_paid and not order.is_cancelled
+                if is_counted:
+                    record_sales([order], sign=-1)
+
                 customer_form.save()
                 for form in order_product_forms:
                     if form.fields["count"].widget.attrs.get("readonly", False):
@@ -209,6 +216,17 @@ def tickets_admin_order_view(request, vars, event, order_id):
 
                 order.clean_up_order_products()
 
+                # changing products of confirmed orders bypasses inventory counters
+                if order.is_active:
+                    reconcile_limit_groups(
+                        LimitGroup.objects.filter(
+                            id__in=LimitGroup.objects.filter(product__order_product_set__order=order).values("id")
+                        )
+                    )
+
+                if is_counted:
+                    record_sales([order])
+
             if "cancel" in request.POST and can_cancel:
                 save()
                 order.cancel()
@@ -217,8 +235,12 @@ def tickets_admin_order_view(request, vars, event, order_id):
 
             elif "uncancel" in request.POST and can_uncancel:
                 save()
-                order.uncancel()
-                messages.success(request, "Tilaus palautettiin.")
+                try:
+                    order.uncancel()
+                except SoldOut:
+                    messages.error(request, "Tilausta ei voitu palauttaa, koska tuotteita ei ole riittävästi jäljellä.")
+                else:
+                    messages.success(request, "Tilaus palautettiin.")
                 return redirect("tickets_admin_order_view", event.slug, order.pk)
 
             elif "mark-paid" in request.POST and can_mark_paid:
@@ -4,6 +4,7 @@ from dataclasses import dataclass
 from datetime import date, datetime, timedelta
 from typing import Any
 
+from django.conf import settings
 from django.db import connection
 from django.http import HttpResponse
 from pkg_resources import resource_string
@@ -53,7 +54,7 @@ def tickets_admin_export_yearly_statistics_view(request, vars, event: Event):
     rows_by_event_by_days: defaultdict[int, dict[int, QueryRow]] = defaultdict(dict)
 
     cursor = connection.cursor()
-    cursor.execute(STATISTICS_QUERY, [event_ids])
+    cursor.execute(STATISTICS_QUERY, dict(event_ids=event_ids, time_zone=settings.TIME_ZONE))
     for row in cursor.fetchall():
         row = QueryRow(*row)
         rows_by_event_by_days[row.event_id][row.days_to_event] = row
@@ -15,6 +15,8 @@ from payments.models.checkout_payment import CHECKOUT_PAYMENT_WALL_ORIGIN, Check
 
 from ..forms import CustomerForm, OrderProductForm
 from ..helpers import tickets_event_required
+from ..inventory import SoldOut
+from ..waiting_room import leave_waiting_room, waiting_room_required
 from .tickets_v1_views import clear_order, get_order, set_order, tickets_welcome_view
 
 
@@ -28,6 +30,7 @@ def tickets_router_view(request, event, *args, **kwargs):
 
 
 @csp_update(FORM_ACTION=CHECKOUT_PAYMENT_WALL_ORIGIN)
+@waiting_room_required
 def tickets_view(request, event):
     order = get_order(request, event)
     if order.is_confirmed:
@@ -60,29 +63,36 @@ def tickets_view(request, event):
             messages.error(request, _("Please select at least one product."))
             return render(request, "v1.5/tickets_view.pug", vars)
 
+        sold_out_message = _(
+            "We're sorry to inform you that a product you have selected "
+            "is not available in the quantity you have requested."
+        )
+
         # TODO as OrderProductForm sets max_value, this should not be necessary
         if any(op.product.amount_available < op.count for op in order_products):
-            messages.error(
-                request,
-                _(
-                    "We're sorry to inform you that a product you have selected "
-                    "is not available in the quantity you have requested."
-                ),
-            )
+            messages.error(request, sold_out_message)
             return render(request, "v1.5/tickets_view.pug", vars)
 
-        order.save()
-        set_order(request, event, order)
+        try:
+            # the above check is not atomic, confirm_order is
+            with transaction.atomic():
+                order.save()
 
-        customer = customer_form.save(commit=False)
-        customer.order = order
-        customer.save()
+                customer = customer_form.save(commit=False)
+                customer.order = order
+                customer.save()
 
-        for op in order_products:
-            op.order = order
-            op.save()
+                for op in order_products:
+                    op.order = order
+                    op.save()
 
-        order.confirm_order()
+                order.confirm_order()
+        except SoldOut:
+            messages.error(request, sold_out_message)
+            return render(request, "v1.5/tickets_view.pug", vars)
+
+        set_order(request, event, order)
+        leave_waiting_room(request, event)
 
         payment = CheckoutPayment.from_order(order)
         payment.save()
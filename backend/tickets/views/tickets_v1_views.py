@@ -18,7 +18,9 @@ from ..helpers import (
     set_order,
     tickets_event_required,
 )
+from ..inventory import SoldOut
 from ..models import OrderProduct
+from ..waiting_room import leave_waiting_room, waiting_room_required
 
 
 def multiform_validate(forms):
@@ -46,6 +48,7 @@ def decorate(view_obj):
     """
 
     @tickets_event_required
+    @waiting_room_required
     def wrapper(request, event, *args, **kwargs):
         return view_obj(request, event, *args, **kwargs)
 
@@ -181,6 +184,7 @@ class Phase:
     def cancel(self, request, event):
         messages.warning(request, _("The order was aborted."))
         destroy_order(request, event)
+        leave_waiting_room(request, event)
         return redirect("core_event_view", event.slug)
 
     def vars(self, request, event, form):
@@ -236,7 +240,10 @@ class TicketsPhase(Phase):
             errors.append("zero")
             return errors
 
-        if any(i.instance.product.amount_available < i.cleaned_data["count"] for i in form):
+        # hold the selected products while the customer completes the order
+        try:
+            get_order(request, event).reserve_products((i.instance.product, i.cleaned_data["count"]) for i in form)
+        except SoldOut:
             messages.error(request, _("Unfortunately a product you have selected has just been sold out."))
             errors.append("soldout")
             return errors
@@ -337,9 +344,11 @@ class ConfirmPhase(Phase):
     def validate(self, request, event, form):
         errors = multiform_validate(form)
         order = get_order(request, event)
-        order_products = order.order_product_set.filter(count__gt=0)
 
-        if any(i.product.amount_available < i.count for i in order_products):
+        # renew the reservation made in TicketsPhase as it may have expired
+        try:
+            order.reserve_products()
+        except SoldOut:
             messages.error(
                 request,
                 _("We're sorry to inform you that a product you have selected has just been sold out."),
@@ -367,6 +376,7 @@ class ConfirmPhase(Phase):
 
         if action == "next" and not order.is_confirmed:
             order.confirm_order()
+            leave_waiting_room(request, event)
 
     def can_go_back(self, request, event):
         order = get_order(request, event)
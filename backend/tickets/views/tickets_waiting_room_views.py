@@ -0,0 +1,33 @@
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_safe
+
+from core.utils import url
+
+from ..models import TicketsEventMeta
+from ..waiting_room import get_entry, get_status
+
+
+@require_safe
+def tickets_waiting_room_status_view(request, event_slug):
+    """
+    Polled by the waiting room page. Only touches the WaitingRoomEntry table (and event meta).
+    """
+    meta = TicketsEventMeta.objects.filter(event__slug=event_slug).select_related("event").first()
+    if meta is None:
+        raise Http404()
+
+    event = meta.event
+    entry = get_entry(request, event)
+    if entry is None:
+        raise Http404()
+
+    status = get_status(entry, event, meta)
+
+    response = JsonResponse(
+        dict(
+            status.as_dict(),
+            url=url("tickets_welcome_view", event.slug),
+        )
+    )
+    response["Cache-Control"] = "no-store"
+    return response
@@ -0,0 +1,319 @@
+"""
+Waiting room (admission queue) for ticket sale openings.
+
+If TicketsEventMeta.max_concurrent_customers is set, visitors of the ticket shop are first given
+a WaitingRoomEntry and a signed admission token (stored in a cookie) and are admitted to the shop
+in the order they arrived, at most max_concurrent_customers at a time. Waiting visitors poll
+tickets_waiting_room_status_view, which only touches the WaitingRoomEntry table.
+
+An admitted visitor must enter the shop within CLAIM_SECONDS or their place is given to the next
+one in line. Only visitors whose waiting room page has polled within ABANDON_SECONDS are admitted,
+so visitors who closed the page do not hold up the line. Once in the shop, the admission is
+extended on use up to admission_seconds of inactivity, and ended when the order is confirmed or
+cancelled. Visitors who have a confirmed order in their session are not queued, so that they can
+complete the payment.
+
+Admitting is done by whichever request happens to notice free slots. A transaction-level
+advisory lock makes sure only one request per event admits at a time. Expired admissions and
+abandoned entries are deleted while admitting, at most every PRUNE_INTERVAL_SECONDS.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import wraps
+
+from django.core import signing
+from django.core.cache import cache
+from django.db import connection, models, transaction
+from django.http import HttpRequest, HttpResponse
+from django.shortcuts import render
+from django.utils.timezone import now
+
+from core.models import Event
+from core.utils import url
+from metrics.registry import counter, gauge, histogram
+
+from .helpers import ORDER_KEY_TEMPLATE
+from .models import Order, TicketsEventMeta, WaitingRoomEntry
+
+logger = logging.getLogger("kompassi")
+
+CLAIM_SECONDS = 60
+
+# the waiting room page polls every 5 to 15 seconds, but browsers slow down timers of background tabs
+ABANDON_SECONDS = 180
+SEEN_UPDATE_SECONDS = 30
+PRUNE_INTERVAL_SECONDS = 30
+TOKEN_SALT = "tickets.waiting_room"
+COOKIE_NAME_TEMPLATE = "tickets_waiting_room_{event.slug}"
+
+# advisory lock namespace (first key of pg_try_advisory_xact_lock(int, int))
+ADVISORY_LOCK_NAMESPACE = 0x7469636B  # "tick"
+
+entries_created = counter(
+    "kompassi_tickets_waiting_room_entries_total",
+    "Number of visitors placed in the ticket shop waiting room",
+    ["event"],
+)
+entries_admitted = counter(
+    "kompassi_tickets_waiting_room_admissions_total",
+    "Number of visitors admitted from the ticket shop waiting room",
+    ["event"],
+)
+queue_length = gauge(
+    "kompassi_tickets_waiting_room_queue_length",
+    "Number of visitors waiting as last seen by this process",
+    ["event"],
+)
+queue_position = histogram(
+    "kompassi_tickets_waiting_room_position",
+    "Queue positions reported to polling visitors",
+    ["event"],
+    buckets=(1, 10, 50, 100, 500, 1000, 5000, 10000),
+)
+wait_seconds = histogram(
+    "kompassi_tickets_waiting_room_wait_seconds",
+    "Time from entering the waiting room to entering the ticket shop",
+    ["event"],
+    buckets=(1, 10, 30, 60, 120, 300, 600, 1200, 3600),
+)
+
+
+@dataclass
+class WaitingRoomStatus:
+    admitted: bool
+    position: int | None
+    num_waiting: int
+
+    def as_dict(self):
+        return dict(admitted=self.admitted, position=self.position, numWaiting=self.num_waiting)
+
+
+def get_cookie_name(event: Event) -> str:
+    return COOKIE_NAME_TEMPLATE.format(event=event)
+
+
+def make_token(entry: WaitingRoomEntry) -> str:
+    return signing.dumps(dict(event=entry.event_id, entry=entry.id), salt=TOKEN_SALT)
+
+
+def get_entry(request: HttpRequest, event: Event) -> WaitingRoomEntry | None:
+    """
+    Returns the WaitingRoomEntry of the admission token cookie of the request, if valid.
+    """
+    if not (token := request.COOKIES.get(get_cookie_name(event))):
+        return None
+
+    try:
+        payload = signing.loads(token, salt=TOKEN_SALT)
+    except signing.BadSignature:
+        return None
+
+    if payload.get("event") != event.id:
+        return None
+
+    return WaitingRoomEntry.objects.filter(id=payload.get("entry"), event=event).first()
+
+
+def set_cookie(request: HttpRequest, response: HttpResponse, entry: WaitingRoomEntry, event: Event):
+    response.set_cookie(
+        get_cookie_name(event),
+        make_token(entry),
+        max_age=24 * 60 * 60,
+        path=f"/events/{event.slug}/tickets",
+        secure=request.is_secure(),
+        httponly=True,
+        samesite="Lax",
+    )
+
+
+def prune(event: Event, t: datetime | None = None) -> int:
+    """
+    Deletes expired admissions and entries of visitors who have stopped polling the waiting room.
+    Returns the number of entries deleted.
+    """
+    if t is None:
+        t = now()
+
+    num_deleted, unused = (
+        WaitingRoomEntry.objects.filter(event=event)
+        .filter(
+            models.Q(expires_at__lte=t)
+            | models.Q(admitted_at__isnull=True, seen_at__lte=t - timedelta(seconds=ABANDON_SECONDS))
+        )
+        .delete()
+    )
+    return num_deleted
+
+
+def admit(event: Event, meta: TicketsEventMeta):
+    """
+    Admits waiting visitors in arrival order as long as there are free slots.
+    """
+    max_concurrent_customers = meta.max_concurrent_customers
+    if max_concurrent_customers is None:
+        return
+
+    t = now()
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute("select pg_try_advisory_xact_lock(%s, %s)", [ADVISORY_LOCK_NAMESPACE, event.id])
+            (locked,) = cursor.fetchone()
+        if not locked:
+            # someone else is admitting right now
+            return
+
+        if cache.add(f"tickets.waiting_room.pruned:{event.id}", True, PRUNE_INTERVAL_SECONDS):
+            prune(event, t)
+
+        num_active = WaitingRoomEntry.objects.filter(event=event, expires_at__gt=t).count()
+        num_free = max_concurrent_customers - num_active
+        if num_free <= 0:
+            return
+
+        entry_ids = list(
+            WaitingRoomEntry.objects.filter(
+                event=event,
+                admitted_at__isnull=True,
+                seen_at__gt=t - timedelta(seconds=ABANDON_SECONDS),
+            )
+            .order_by("id")
+            .values_list("id", flat=True)[:num_free]
+        )
+        if not entry_ids:
+            return
+
+        num_admitted = WaitingRoomEntry.objects.filter(id__in=entry_ids).update(
+            admitted_at=t,
+            expires_at=t + timedelta(seconds=CLAIM_SECONDS),
+        )
+
+    entries_admitted.inc(num_admitted, event=event.slug)
+
+
+def get_status(entry: WaitingRoomEntry, event: Event, meta: TicketsEventMeta) -> WaitingRoomStatus:
+    """
+    Called when a visitor polls the waiting room. To avoid a write per poll, the visitor is only
+    marked as seen every SEEN_UPDATE_SECONDS.
+    """
+    t = now()
+    if entry.admitted_at is None and t - entry.seen_at >= timedelta(seconds=SEEN_UPDATE_SECONDS):
+        entry.seen_at = t
+        entry.save(update_fields=["seen_at"])
+
+    if entry.admitted_at is None:
+        admit(event, meta)
+        entry.refresh_from_db()
+
+    num_waiting = WaitingRoomEntry.objects.filter(event=event, admitted_at__isnull=True).count()
+    queue_length.set(num_waiting, event=event.slug)
+
+    if entry.admitted_at is not None:
+        return WaitingRoomStatus(admitted=True, position=None, num_waiting=num_waiting)
+
+    position = WaitingRoomEntry.objects.filter(event=event, admitted_at__isnull=True, id__lte=entry.id).count()
+    queue_position.observe(position, event=event.slug)
+    return WaitingRoomStatus(admitted=False, position=position, num_waiting=num_waiting)
+
+
+def enter(entry: WaitingRoomEntry, event: Event, meta: TicketsEventMeta) -> bool:
+    """
+    Called when an admitted visitor uses the shop. Returns False if the admission has expired.
+    To avoid a write per request, the admission is only extended once half of it has been used.
+    """
+    t = now()
+    if entry.admitted_at is None or entry.expires_at is None or entry.expires_at <= t:
+        return False
+
+    admission = timedelta(seconds=meta.admission_seconds)
+    if entry.expires_at - t < admission / 2:
+        if entry.expires_at - entry.admitted_at <= timedelta(seconds=CLAIM_SECONDS):
+            # first entry to the shop
+            wait_seconds.observe((t - entry.created_at).total_seconds(), event=event.slug)
+
+        entry.expires_at = t + admission
+        entry.save(update_fields=["expires_at"])
+
+    return True
+
+
+def leave_waiting_room(request: HttpRequest, event: Event):
+    """
+    Frees the slot of the visitor for the next one in line. Call when the order is confirmed or cancelled.
+    """
+    meta = event.tickets_event_meta
+    if meta is None or meta.max_concurrent_customers is None:
+        return
+
+    if entry := get_entry(request, event):
+        WaitingRoomEntry.objects.filter(id=entry.id).update(expires_at=now())
+
+
+def create_entry(event: Event) -> WaitingRoomEntry:
+    entry = WaitingRoomEntry.objects.create(event=event)
+    entries_created.inc(event=event.slug)
+    return entry
+
+
+def has_active_order(request: HttpRequest, event: Event) -> bool:
+    """
+    Whether the session has a confirmed order that is not cancelled (see Order.is_active).
+    Unconfirmed orders need an admission like everyone else.
+    """
+    if (order_id := request.session.get(ORDER_KEY_TEMPLATE.format(event=event))) is None:
+        return False
+
+    return Order.objects.filter(
+        id=order_id,
+        event=event,
+        confirm_time__isnull=False,
+        cancellation_time__isnull=True,
+    ).exists()
+
+
+def get_waiting_room_response(request: HttpRequest, event: Event, meta: TicketsEventMeta) -> HttpResponse | None:
+    """
+    Returns the waiting room page if the visitor may not enter the ticket shop yet, or None if they may.
+    """
+    if meta.max_concurrent_customers is None:
+        return None
+
+    if meta.is_user_admin(request.user) or has_active_order(request, event):
+        return None
+
+    entry = get_entry(request, event)
+    if entry is not None and enter(entry, event, meta):
+        return None
+
+    if entry is None or entry.admitted_at is not None:
+        # new visitor or admission expired: to the end of the line
+        entry = create_entry(event)
+
+    status = get_status(entry, event, meta)
+    vars = dict(
+        event=event,
+        status=status,
+        status_url=url("tickets_waiting_room_status_view", event.slug),
+        login_page=True,
+    )
+    response = render(request, "tickets_waiting_room_view.pug", vars)
+    response["Cache-Control"] = "no-store"
+    set_cookie(request, response, entry, event)
+    return response
+
+
+def waiting_room_required(view_func):
+    """
+    Decorator for customer facing ticket shop views. Apply inside tickets_event_required.
+    """
+
+    @wraps(view_func)
+    def wrapper(request, event, *args, **kwargs):
+        if response := get_waiting_room_response(request, event, event.tickets_event_meta):
+            return response
+
+        return view_func(request, event, *args, **kwargs)
+
+    return wrapper